@@ -0,0 +1,203 @@
+"""
+Interviewer analytics: score distribution, per-difficulty averages, per-question pass rates.
+
+Questions are rows in interview_questions, so everything is a GROUP BY in the database
+(Postgres or SQLite), with no JSON to parse: completed interviews grouped by score, and
+graded answers grouped by (difficulty, question). Both read a covering index, and each
+returns one row per distinct score or bank question. Percentiles and the histogram come
+from the score frequencies. The per-difficulty figures are sums of the per-question rows.
+Archived interviews (app/archive.py) are included: their scores are grouped the same way
+in interview_archive, and their answers come pre-counted per (difficulty, question, score)
+from archived_answer_scores.
+
+An answer passes when it scores at least ANALYTICS_PASS_RATIO of its difficulty's points.
+
+The result is cached per process. Completing an interview drops it once the transaction
+commits (leaderboard.record_completion calls interview_completed); completions in other
+processes (the scoring worker, other API workers) show up within ANALYTICS_CACHE_TTL
+seconds. Concurrent requests on a cold cache share one computation.
+"""
+import asyncio
+import math
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import database, models
+from app.config import settings
+from app.utils.ai_utils import MAX_POINTS
+
+ANALYTICS_CACHE_TTL = settings.analytics_cache_ttl
+ANALYTICS_PASS_RATIO = settings.analytics_pass_ratio
+PASS_SCORES = {difficulty: math.ceil(points * ANALYTICS_PASS_RATIO) for difficulty, points in MAX_POINTS.items()}
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+HISTOGRAM_BUCKET = 10
+
+Question = models.InterviewQuestion
+ArchivedScore = models.ArchivedAnswerScore
+
+_cached = None  # (expires_at, result)
+_generation = 0  # bumped by every invalidation
+_computing = None  # (loop, Task) while a computation runs
+
+
+def interview_completed(db: AsyncSession):
+    """Drop the cached analytics once the caller's transaction commits."""
+    db.info["analytics_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("analytics_stale", False):
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_rollback(session):
+    session.info.pop("analytics_stale", None)
+
+
+def invalidate():
+    global _cached, _generation
+    _cached = None
+    _generation += 1
+
+
+async def get_analytics(refresh: bool = False):
+    """Cached analytics; `refresh` recomputes them."""
+    global _computing
+    if not refresh and _cached is not None and _cached[0] > time.monotonic():
+        return {**_cached[1], "cached": True}
+    loop = asyncio.get_running_loop()
+    if _computing is None or _computing[0] is not loop or _computing[1].done():
+        _computing = (loop, loop.create_task(_compute()))
+    return {**await asyncio.shield(_computing[1]), "cached": False}
+
+
+async def _compute():
+    global _cached
+    # a completion committed while we read makes this result stale before it is cached
+    generation = _generation
+    async with database.AsyncSessionLocal() as db:
+        result = await compute(db)
+    if generation == _generation:
+        _cached = (time.monotonic() + ANALYTICS_CACHE_TTL, result)
+    return result
+
+
+async def compute(db: AsyncSession):
+    """The analytics, computed now (uncached)."""
+    start = time.perf_counter()
+    scores = await score_frequencies(db)
+    questions = await question_stats(db)
+    difficulties = {}
+    for row in questions:
+        totals = difficulties.setdefault(row["difficulty"], {"answers": 0, "total_score": 0, "passed": 0})
+        for name in totals:
+            totals[name] += row[name]
+    return {
+        "computed_at": datetime.now(timezone.utc).isoformat(),
+        "took_ms": round((time.perf_counter() - start) * 1000, 2),
+        "pass_scores": PASS_SCORES,
+        "interviews": score_distribution(scores),
+        "difficulties": [
+            {"difficulty": difficulty, **_rates(totals)}
+            for difficulty, totals in sorted(difficulties.items(), key=lambda item: MAX_POINTS.get(item[0], math.inf))
+        ],
+        # most answered first
+        "questions": [
+            {"question": row["question"], "difficulty": row["difficulty"], **_rates(row)}
+            for row in sorted(questions, key=lambda row: (-row["answers"], row["question"]))
+        ],
+    }
+
+
+async def score_frequencies(db: AsyncSession):
+    """[(score, interviews)] over completed interviews, archived ones included, lowest score first."""
+    interview = models.Interview
+    archived = models.InterviewArchive
+    counts = {}
+    for stmt in (
+        select(interview.score, func.count())
+        .where(interview.status == "completed", interview.score.isnot(None))
+        .group_by(interview.score),
+        select(archived.score, func.count()).where(archived.score.isnot(None)).group_by(archived.score),
+    ):
+        for score, count in await db.execute(stmt):
+            counts[score] = counts.get(score, 0) + count
+    return sorted(counts.items())
+
+
+async def question_stats(db: AsyncSession):
+    """Answers, summed score and passes over graded answers, per (difficulty, question)."""
+    pass_score = case(PASS_SCORES, value=Question.difficulty)
+    hot = (
+        select(
+            Question.difficulty,
+            Question.question,
+            func.count().label("answers"),
+            func.sum(Question.score).label("total_score"),
+            func.sum(case((Question.score >= pass_score, 1), else_=0)).label("passed"),
+        )
+        .where(Question.score.isnot(None))
+        .group_by(Question.difficulty, Question.question)
+    )
+    archived_pass_score = case(PASS_SCORES, value=ArchivedScore.difficulty)
+    archived = (
+        select(
+            ArchivedScore.difficulty,
+            ArchivedScore.question,
+            func.sum(ArchivedScore.answers).label("answers"),
+            func.sum(ArchivedScore.score * ArchivedScore.answers).label("total_score"),
+            func.sum(case((ArchivedScore.score >= archived_pass_score, ArchivedScore.answers), else_=0)).label("passed"),
+        )
+        .group_by(ArchivedScore.difficulty, ArchivedScore.question)
+    )
+    stats = {}
+    for stmt in (hot, archived):
+        for row in await db.execute(stmt):
+            key = (row.difficulty, row.question)
+            if key in stats:
+                for name in ("answers", "total_score", "passed"):
+                    stats[key][name] += row._mapping[name]
+            else:
+                stats[key] = dict(row._mapping)
+    return list(stats.values())
+
+
+def _rates(totals):
+    return {
+        "answers": totals["answers"],
+        "avg_score": round(totals["total_score"] / totals["answers"], 2),
+        "pass_rate": round(totals["passed"] / totals["answers"], 4),
+    }
+
+
+def score_distribution(frequencies):
+    """Count, mean, nearest-rank percentiles and a histogram from [(score, count)] (sorted)."""
+    total = sum(count for _, count in frequencies)
+    if not total:
+        return {"completed": 0, "mean_score": None, "percentiles": {}, "histogram": []}
+    percentiles = {}
+    targets = [(p, min(total, max(1, round(p / 100 * total)))) for p in PERCENTILES]
+    seen = 0
+    for score, count in frequencies:
+        seen += count
+        while targets and targets[0][1] <= seen:
+            percentiles[f"p{targets.pop(0)[0]}"] = score
+    histogram = {}
+    for score, count in frequencies:
+        start = score // HISTOGRAM_BUCKET * HISTOGRAM_BUCKET
+        histogram[start] = histogram.get(start, 0) + count
+    return {
+        "completed": total,
+        "mean_score": round(sum(score * count for score, count in frequencies) / total, 2),
+        "percentiles": percentiles,
+        "histogram": [
+            {"from": start, "to": start + HISTOGRAM_BUCKET - 1, "interviews": count}
+            for start, count in sorted(histogram.items())
+        ],
+    }
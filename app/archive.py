@@ -0,0 +1,223 @@
+"""
+Archival of old completed interviews, so the hot tables stay small as history grows.
+
+interviews and interview_questions keep what the API works on: unfinished interviews and
+each candidate's latest completed one (status, chat, the candidate page and the leaderboard
+read those). A completed interview with a newer completed interview of the same candidate
+is moved to interview_archive ARCHIVE_AFTER_DAYS after it completed:
+
+    python -m app.archive [--older-than-days 90] [--batch 1000] [--every SECONDS]
+
+Each archive row holds the interview's columns and its questions as zlib-compressed JSON.
+Per batch, one transaction inserts the archive rows, adds their graded answers to
+archived_answer_scores (counts per difficulty, question and score, read by analytics) and
+deletes the hot rows. candidate_scores already counts the interview and is not touched.
+
+On Postgres interview_archive is range-partitioned by completed_at, one partition per
+month, created here before the first row goes in; old months can be detached or dropped
+as a unit. The hot table is not partitioned: the partition key would have to be part of
+its primary key and of every foreign key that references it, so it is kept small by
+moving rows out instead. On SQLite the archive is a plain table.
+"""
+import argparse
+import asyncio
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from sqlalchemy import delete, exists, func, insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as postgres_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app import database, models
+from app.config import settings
+
+ARCHIVE_AFTER_DAYS = settings.archive_after_days
+ARCHIVE_BATCH_SIZE = settings.archive_batch_size
+
+Interview = models.Interview
+Question = models.InterviewQuestion
+Archive = models.InterviewArchive
+ArchivedScore = models.ArchivedAnswerScore
+
+_QUESTION_COLUMNS = ("question_index", "question", "difficulty", "answer", "score", "asked_at", "answered_at")
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def compress_questions(questions) -> bytes:
+    return zlib.compress(orjson.dumps(questions))
+
+
+def load_questions(data: bytes):
+    """The archived question rows (dicts, datetimes as ISO strings), in question order."""
+    return orjson.loads(zlib.decompress(data))
+
+
+def archived_answers(connection, batch: int = ARCHIVE_BATCH_SIZE):
+    """(candidate id, non-empty answers joined by newlines) per archived interview (sync connection)."""
+    rows = connection.execute(
+        select(Archive.candidate_id, Archive.questions)
+        .order_by(Archive.candidate_id, Archive.id)
+        .execution_options(yield_per=batch)
+    )
+    for candidate_id, data in rows:
+        answers = [q["answer"] for q in load_questions(data) if q["answer"] and q["answer"].strip()]
+        if answers:
+            yield candidate_id, "\n".join(answers)
+
+
+async def backfill_completed_at(db: AsyncSession):
+    """Date completed interviews that predate completed_at by their last answer."""
+    last_answer = (
+        select(func.max(Question.answered_at))
+        .where(Question.interview_id == Interview.id)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(Interview)
+        .where(Interview.status == "completed", Interview.completed_at.is_(None))
+        .values(completed_at=func.coalesce(last_answer, _now()))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+def archivable(cutoff: datetime, after: int = 0):
+    """SELECT of the ids (> `after`) of interviews completed before `cutoff` with a newer completed one."""
+    newer = aliased(Interview)
+    return (
+        select(Interview.id)
+        .where(
+            Interview.id > after,
+            Interview.status == "completed",
+            Interview.completed_at < cutoff,
+            exists().where(
+                newer.candidate_id == Interview.candidate_id,
+                newer.id > Interview.id,
+                newer.status == "completed",
+            ),
+        )
+        .order_by(Interview.id)
+    )
+
+
+def _month(value: datetime):
+    return value.year, value.month
+
+
+async def ensure_partitions(db: AsyncSession, months):
+    """Create the monthly interview_archive partitions for (year, month) pairs (Postgres)."""
+    for year, month in sorted(months):
+        following = (year + month // 12, month % 12 + 1)
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS interview_archive_{year}_{month:02d} PARTITION OF interview_archive "
+            f"FOR VALUES FROM ('{year}-{month:02d}-01 00:00:00+00') "
+            f"TO ('{following[0]}-{following[1]:02d}-01 00:00:00+00')"
+        ))
+
+
+async def archive_batch(db: AsyncSession, cutoff: datetime, limit: int = ARCHIVE_BATCH_SIZE, after: int = 0):
+    """Move up to `limit` archivable interviews with ids above `after`; returns the ids moved."""
+    ids = (await db.execute(archivable(cutoff, after).limit(limit))).scalars().all()
+    if not ids:
+        return ids
+    interviews = (await db.execute(
+        select(Interview.id, Interview.candidate_id, Interview.score, Interview.summary, Interview.completed_at)
+        .where(Interview.id.in_(ids))
+    )).all()
+    questions = {interview_id: [] for interview_id in ids}
+    question_table = Question.__table__
+    for interview_id, *values in await db.execute(
+        select(question_table.c.interview_id, *(question_table.c[name] for name in _QUESTION_COLUMNS))
+        .where(question_table.c.interview_id.in_(ids))
+        .order_by(question_table.c.interview_id, question_table.c.question_index)
+    ):
+        questions[interview_id].append(dict(zip(_QUESTION_COLUMNS, values)))
+
+    now = _now()
+    rows = [
+        {
+            "id": interview.id,
+            "completed_at": interview.completed_at,
+            "candidate_id": interview.candidate_id,
+            "score": interview.score,
+            "summary": interview.summary,
+            "questions_answered": sum(q["answered_at"] is not None for q in questions[interview.id]),
+            "questions": compress_questions(questions[interview.id]),
+            "archived_at": now,
+        }
+        for interview in interviews
+    ]
+    postgres = db.bind.dialect.name == "postgresql"
+    if postgres:
+        await ensure_partitions(db, {_month(interview.completed_at) for interview in interviews})
+    # Core statements on the tables: the ORM bulk paths add nothing here but per-row overhead
+    await db.execute(insert(Archive.__table__), rows)
+
+    graded = Counter(
+        (q["difficulty"], q["question"], q["score"])
+        for interview_questions in questions.values() for q in interview_questions if q["score"] is not None
+    )
+    if graded:
+        scores = ArchivedScore.__table__
+        upsert = (postgres_insert if postgres else sqlite_insert)(scores)
+        await db.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[scores.c.difficulty, scores.c.question, scores.c.score],
+                set_={"answers": scores.c.answers + upsert.excluded.answers},
+            ),
+            [
+                {"difficulty": difficulty, "question": question, "score": score, "answers": count}
+                for (difficulty, question, score), count in graded.items()
+            ],
+        )
+
+    jobs = models.ScoringJob.__table__
+    await db.execute(delete(jobs).where(jobs.c.interview_id.in_(ids)))
+    await db.execute(delete(question_table).where(question_table.c.interview_id.in_(ids)))
+    await db.execute(delete(Interview.__table__).where(Interview.__table__.c.id.in_(ids)))
+    await db.commit()
+    return ids
+
+
+async def archive(db: AsyncSession, older_than_days: float = ARCHIVE_AFTER_DAYS, batch: int = ARCHIVE_BATCH_SIZE):
+    """Archive everything that is due, one transaction per batch; returns the number archived."""
+    cutoff = _now() - timedelta(days=older_than_days)
+    await backfill_completed_at(db)
+    total = after = 0
+    while True:
+        # ids only grow, so each batch continues where the previous one stopped
+        ids = await archive_batch(db, cutoff, batch, after)
+        total += len(ids)
+        if len(ids) < batch:
+            return total
+        after = ids[-1]
+
+
+async def run(older_than_days: float, batch: int, every: float = None):
+    try:
+        while True:
+            async with database.AsyncSessionLocal() as db:
+                moved = await archive(db, older_than_days, batch)
+            print(f"Archived {moved} interviews completed over {older_than_days:g} days ago")
+            if every is None:
+                return
+            await asyncio.sleep(every)
+    finally:
+        await database.dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old completed interviews to interview_archive")
+    parser.add_argument("--older-than-days", type=float, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch", type=int, default=ARCHIVE_BATCH_SIZE, help="interviews per transaction")
+    parser.add_argument("--every", type=float, help="keep running, archiving every this many seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.older_than_days, args.batch, args.every))
@@ -1,30 +1,131 @@
 from passlib.context import CryptContext
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from jose import jwt
+import asyncio
 import bcrypt
-import os
-from dotenv import load_dotenv
+import multiprocessing
+from app.config import settings
 
-# Load environment variables
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY", "YOUR_SECRET_KEY")  # Fallback for local dev
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+SECRET_KEY = settings.secret_key
+ALGORITHM = settings.algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+# Password hashing runs in its own process pool so it can't starve request handling
+PASSWORD_WORKERS = settings.password_workers
+PASSWORD_MAX_PENDING = settings.password_max_pending or PASSWORD_WORKERS * 8
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def hash_password(password: str):
+@dataclass(frozen=True)
+class Principal:
+    """Who the caller is, as resolved from an access token (no ORM row attached)."""
+    id: int
+    email: str
+    role: str
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when too many hash/verify jobs are already waiting for the password pool."""
+
+
+def hash_password(password: str, rounds: int = None):
     # encode and truncate if needed
     pw_bytes = password.encode("utf-8")[:72]  # bcrypt limit
-    hashed = bcrypt.hashpw(pw_bytes, bcrypt.gensalt())
+    hashed = bcrypt.hashpw(pw_bytes, bcrypt.gensalt(rounds or BCRYPT_ROUNDS))
     return hashed.decode()
 
 def verify_password(plain_password: str, hashed_password: str):
     pw_bytes = plain_password.encode("utf-8")[:72]
     return bcrypt.checkpw(pw_bytes, hashed_password.encode())
 
+def needs_rehash(hashed_password: str):
+    # bcrypt hashes look like $2b$<cost>$<salt+hash>
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+_password_pool = None
+_password_pending = 0
+
+def _get_password_pool():
+    global _password_pool
+    if _password_pool is None:
+        # spawn: forking a process that already runs an event loop and DB pool is unsafe
+        _password_pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _password_pool
+
+async def _run_password_job(fn, *args):
+    global _password_pending
+    if _password_pending >= PASSWORD_MAX_PENDING:
+        raise PasswordPoolBusy()
+    _password_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_password_pool(), fn, *args)
+    finally:
+        _password_pending -= 1
+
+async def hash_password_async(password: str):
+    return await _run_password_job(hash_password, password, BCRYPT_ROUNDS)
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+def hash_passwords(passwords, rounds: int = None):
+    return [hash_password(password, rounds) for password in passwords]
+
+BULK_HASH_CHUNK = 16
+
+_bulk_slots = None  # (loop, Semaphore) shared by every bulk caller
+
+def _get_bulk_slots():
+    global _bulk_slots
+    loop = asyncio.get_running_loop()
+    if _bulk_slots is None or _bulk_slots[0] is not loop:
+        # asyncio primitives are bound to one loop
+        _bulk_slots = (loop, asyncio.Semaphore(max(1, PASSWORD_WORKERS - 1)))
+    return _bulk_slots[1]
+
+async def hash_passwords_bulk(passwords):
+    """Hash many passwords (bulk import) across the password pool.
+
+    Small jobs with at most PASSWORD_WORKERS - 1 in flight across all concurrent imports,
+    so logins and signups still get a worker; waits instead of raising PasswordPoolBusy.
+    """
+    slots = _get_bulk_slots()
+
+    async def run(chunk):
+        async with slots:
+            while True:
+                try:
+                    return await _run_password_job(hash_passwords, chunk, BCRYPT_ROUNDS)
+                except PasswordPoolBusy:
+                    await asyncio.sleep(0.1)
+
+    chunks = [passwords[i:i + BULK_HASH_CHUNK] for i in range(0, len(passwords), BULK_HASH_CHUNK)]
+    hashed = await asyncio.gather(*(run(chunk) for chunk in chunks))
+    return [h for chunk in hashed for h in chunk]
+
+def password_pool_stats():
+    return {
+        "workers": PASSWORD_WORKERS,
+        "pending": _password_pending,
+        "max_pending": PASSWORD_MAX_PENDING,
+    }
+
+def shutdown_password_pool():
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(wait=False, cancel_futures=True)
+        _password_pool = None
+
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -0,0 +1,325 @@
+"""
+Bulk candidate import and streaming exports.
+
+Import reads a CSV or NDJSON request body as it arrives, validates each row like
+/api/auth/signup (but only creates interviewee accounts), and inserts BULK_BATCH_SIZE rows at a time: passwords are hashed in
+parallel on the password pool, rows go in with one multi-row INSERT (COPY on Postgres),
+and each batch commits on its own. Rows that fail are reported with their line number.
+
+Exports stream query results with yield_per (a server-side cursor on Postgres), so
+memory use does not depend on the size of the table.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, literal, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import auth, database, leaderboard, models, schemas
+from app.config import settings
+
+BULK_BATCH_SIZE = settings.bulk_batch_size
+IMPORT_MAX_ERRORS = settings.import_max_errors
+
+FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+IMPORT_FIELDS = ["name", "email", "phone", "password", "role"]
+_COPY_COLUMNS = ["name", "email", "phone", "hashed_password", "role"]
+
+
+class BulkFormatError(ValueError):
+    """The import body can't be read at all (bad header, not UTF-8)."""
+
+
+def format_for(content_type: str):
+    """Import format from a Content-Type header, or None."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+# --- reading the body ---
+
+async def _lines(chunks):
+    """(line_number, text) for each line of a UTF-8 byte stream."""
+    buffer = b""
+    number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, _decode(line, number)
+    if buffer.strip():
+        yield number + 1, _decode(buffer, number + 1)
+
+
+def _decode(line: bytes, number: int):
+    try:
+        return line.decode("utf-8-sig" if number == 1 else "utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        raise BulkFormatError(f"Line {number} is not valid UTF-8")
+
+
+async def _csv_rows(lines):
+    header = None
+    record, start, quotes = [], None, 0
+    async for number, line in lines:
+        if header is None:
+            if not line.strip():
+                continue
+            header = [column.strip().lower() for column in next(csv.reader([line]))]
+            missing = {"email", "password"} - set(header)
+            if missing:
+                raise BulkFormatError(f"CSV header is missing: {', '.join(sorted(missing))}")
+            continue
+        # a quoted field may span lines: the record ends once its quotes are balanced
+        record.append(line)
+        start = start or number
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        text, line_number = "\n".join(record), start
+        record, start, quotes = [], None, 0
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if len(values) != len(header):
+            yield line_number, None, f"Expected {len(header)} fields, got {len(values)}"
+            continue
+        yield line_number, {k: (v if v != "" else None) for k, v in zip(header, values) if k in IMPORT_FIELDS}, None
+    if record:
+        yield start, None, "Unterminated quoted field"
+
+
+async def _ndjson_rows(lines):
+    async for number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "Expected a JSON object"
+            continue
+        yield number, {k: v for k, v in row.items() if k in IMPORT_FIELDS}, None
+
+
+def _validation_message(exc: ValidationError):
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+
+# --- import ---
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line: int, email, message: str):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "email": email, "error": message})
+
+    def as_dict(self):
+        return {
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def import_candidates(db: AsyncSession, chunks, fmt: str):
+    """Import candidates from an async iterator of body bytes; returns the report dict."""
+    report = ImportReport()
+    rows = _csv_rows(_lines(chunks)) if fmt == "csv" else _ndjson_rows(_lines(chunks))
+    batch = []
+    try:
+        async for line, fields, error in rows:
+            if error is not None:
+                report.error(line, None, error)
+                continue
+            # like signup, but name/phone may be left out; interviewer accounts are not imported
+            fields = {name: fields.get(name) for name in IMPORT_FIELDS}
+            if fields.pop("role") not in (None, "interviewee"):
+                report.error(line, fields.get("email"), "role: only interviewee accounts can be imported")
+                continue
+            try:
+                batch.append((line, schemas.CandidateCreate(**fields)))
+            except ValidationError as exc:
+                report.error(line, fields.get("email"), _validation_message(exc))
+                continue
+            if len(batch) >= BULK_BATCH_SIZE:
+                await _import_batch(db, batch, report)
+                batch = []
+    except BulkFormatError as exc:
+        # nothing read yet: reject the request; otherwise keep what was read and stop there
+        if not (batch or report.created or report.failed):
+            raise
+        report.error(None, None, str(exc))
+    if batch:
+        await _import_batch(db, batch, report)
+    return report.as_dict()
+
+
+async def _import_batch(db: AsyncSession, batch, report: ImportReport):
+    seen = set()
+    unique = []
+    for line, candidate in batch:
+        if candidate.email in seen:
+            report.error(line, candidate.email, "Duplicate email in import")
+        else:
+            seen.add(candidate.email)
+            unique.append((line, candidate))
+    registered = set((await db.execute(
+        select(models.Candidate.email).where(models.Candidate.email.in_(seen))
+    )).scalars())
+    rows = []
+    for line, candidate in unique:
+        if candidate.email in registered:
+            report.error(line, candidate.email, "Email already registered")
+        else:
+            rows.append((line, candidate))
+    if not rows:
+        await db.rollback()
+        return
+
+    hashes = await auth.hash_passwords_bulk([candidate.password for _, candidate in rows])
+    values = [
+        {"name": candidate.name, "email": candidate.email, "phone": candidate.phone,
+         "hashed_password": hashed, "role": "interviewee"}
+        for (_, candidate), hashed in zip(rows, hashes)
+    ]
+    try:
+        ids = await _insert_candidates(db, values)
+        await leaderboard.add_candidates(db, ids)
+        await db.commit()
+        report.created += len(ids)
+    except IntegrityError:
+        # an email was registered concurrently; retry row by row to find it
+        await db.rollback()
+        await _insert_one_by_one(db, rows, values, report)
+
+
+async def _insert_candidates(db: AsyncSession, values):
+    """Insert a batch of candidate rows; returns their ids."""
+    if db.bind.dialect.name != "postgresql":
+        result = await db.execute(
+            insert(models.Candidate.__table__).returning(models.Candidate.__table__.c.id), values
+        )
+        return list(result.scalars())
+
+    connection = await (await db.connection()).get_raw_connection()
+    try:
+        await connection.driver_connection.copy_records_to_table(
+            "candidates", columns=_COPY_COLUMNS, records=[[row[c] for c in _COPY_COLUMNS] for row in values]
+        )
+    except Exception as exc:
+        if getattr(exc, "sqlstate", None) == "23505":  # unique_violation
+            raise IntegrityError("COPY candidates", None, exc) from exc
+        raise
+    emails = [row["email"] for row in values]
+    return list((await db.execute(
+        select(models.Candidate.id).where(models.Candidate.email.in_(emails))
+    )).scalars())
+
+
+async def _insert_one_by_one(db: AsyncSession, rows, values, report: ImportReport):
+    # one short transaction per row rather than SAVEPOINTs: the sqlite3 driver manages
+    # BEGIN itself and does not nest them reliably, and this path only runs after a conflict
+    for (line, candidate), row in zip(rows, values):
+        try:
+            candidate_id = (await db.execute(
+                insert(models.Candidate.__table__).returning(models.Candidate.__table__.c.id), row
+            )).scalar()
+            await leaderboard.add_candidates(db, [candidate_id])
+            await db.commit()
+            report.created += 1
+        except IntegrityError:
+            await db.rollback()
+            report.error(line, candidate.email, "Email already registered")
+
+
+# --- export ---
+
+def candidates_export():
+    score = models.CandidateScore
+    return (
+        select(
+            models.Candidate.id, models.Candidate.name, models.Candidate.email, models.Candidate.phone,
+            models.Candidate.role, models.Candidate.created_at,
+            score.score, score.best_score, score.interview_count, score.latest_status, score.last_activity_at,
+        )
+        .outerjoin(score, score.candidate_id == models.Candidate.id)
+        .order_by(models.Candidate.id)
+    )
+
+
+def interviews_export():
+    interview = models.Interview
+    archived = models.InterviewArchive
+    answered = (
+        select(func.count())
+        .where(models.InterviewQuestion.interview_id == interview.id,
+               models.InterviewQuestion.answered_at.isnot(None))
+        .correlate(interview)
+        .scalar_subquery()
+    )
+    # archived interviews (app/archive.py) are completed and carry their answered count
+    rows = union_all(
+        select(
+            interview.id.label("interview_id"), interview.candidate_id, interview.status, interview.score,
+            answered.label("questions_answered"), interview.summary,
+        ),
+        select(
+            archived.id, archived.candidate_id, literal("completed"), archived.score,
+            archived.questions_answered, archived.summary,
+        ),
+    ).subquery()
+    return (
+        select(
+            rows.c.interview_id, rows.c.candidate_id, models.Candidate.email.label("candidate_email"),
+            rows.c.status, rows.c.score, rows.c.questions_answered, rows.c.summary,
+        )
+        .join(models.Candidate, models.Candidate.id == rows.c.candidate_id)
+        .order_by(rows.c.interview_id)
+    )
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def stream_export(stmt, fmt: str):
+    """Yield the rows of `stmt` as CSV (with a header) or NDJSON, one chunk per BULK_BATCH_SIZE rows."""
+    async with database.AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=BULK_BATCH_SIZE))
+        columns = list(result.keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if fmt == "csv":
+            writer.writerow(columns)
+        async for partition in result.partitions():
+            for row in partition:
+                values = [_plain(value) for value in row]
+                if fmt == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, values)), separators=(",", ":")) + "\n")
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if fmt == "csv" and buffer.tell():
+            yield buffer.getvalue().encode()
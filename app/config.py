@@ -0,0 +1,125 @@
+"""
+Application settings, read once from the environment (and .env) into `settings`.
+
+Every tunable lives here; modules keep their usual constant names (BCRYPT_ROUNDS,
+EVAL_TIMEOUT, ...) but take the values from this object. Field names are the
+environment variable names in lower case.
+"""
+import os
+import tempfile
+from typing import Optional
+
+from dotenv import load_dotenv
+from pydantic_settings import BaseSettings
+
+# .env values also reach libraries that read os.environ themselves
+load_dotenv()
+
+_CPUS = min(4, os.cpu_count() or 1)
+
+
+class Settings(BaseSettings):
+    # auth
+    secret_key: str = "YOUR_SECRET_KEY"  # fallback for local dev
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = 60
+    bcrypt_rounds: int = 12
+    password_workers: int = _CPUS
+    password_max_pending: Optional[int] = None  # default: password_workers * 8
+    principal_cache_size: int = 10000
+    principal_cache_ttl: float = 300
+
+    # database; SQLite (./swipe_interview.db) unless all of user/password/host/name are set
+    db_user: Optional[str] = None
+    db_password: Optional[str] = None
+    db_host: Optional[str] = None
+    db_port: str = "5432"
+    db_name: Optional[str] = None
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    # create missing tables at startup; default: on for SQLite, off for Postgres (run init_db.py)
+    auto_create_schema: Optional[bool] = None
+
+    # interviews and scoring
+    status_version_ttl: float = 2
+    status_long_poll_max: float = 30
+    scoring_mode: str = "inline"  # inline | deferred
+    scoring_max_attempts: int = 5
+    scoring_job_timeout: float = 300
+    eval_backend: str = "stub"
+    eval_max_batch: int = 8
+    eval_batch_wait_ms: float = 10
+    eval_timeout: float = 30
+    eval_retries: int = 2
+    eval_retry_backoff: float = 0.2
+    eval_concurrency: int = 4
+    eval_stub_latency_ms: float = 0
+    idempotency_ttl: float = 24 * 3600
+    idempotency_lock_timeout: float = 120
+    question_bank_path: Optional[str] = None
+    question_topic_bias: float = 0.7
+    # live interviews over WebSocket: answer writes are batched across sessions
+    session_flush_ms: float = 50
+    session_flush_batch: int = 200
+
+    # rate limits ("<requests>/<seconds>" token buckets) and concurrency caps per route class
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # memory | database
+    rate_limit_auth: str = "20/60"  # signup + login, per client IP
+    rate_limit_resume: str = "10/600"  # resume uploads, per candidate
+    rate_limit_answer: str = "30/60"  # answer submissions, per candidate
+    rate_limit_import: str = "5/600"  # bulk candidate imports, per interviewer
+    concurrency_auth: int = 32
+    concurrency_resume: int = 8
+    concurrency_answer: int = 64
+    concurrency_import: int = 2
+    concurrency_max_queue: int = 64  # requests waiting for a slot, per route class
+    concurrency_queue_timeout: float = 5
+
+    # interviewer analytics
+    analytics_cache_ttl: float = 300
+    analytics_pass_ratio: float = 0.7  # share of a question's points that counts as a pass
+
+    # interviewer review: rendered transcripts kept per (interview, version); gzip above this size
+    transcript_cache_size: int = 10000
+    gzip_min_bytes: int = 1024
+
+    # archival of completed interviews (python -m app.archive)
+    archive_after_days: float = 90
+    archive_batch_size: int = 1000
+
+    # resumes
+    max_resume_bytes: int = 10 * 1024 * 1024
+    max_resume_pages: int = 50
+    resume_page_timeout: float = 10
+    resume_workers: int = _CPUS
+    resume_spool_dir: str = tempfile.gettempdir()
+
+    # bulk import/export, responses, logging
+    bulk_batch_size: int = 500
+    import_max_errors: int = 1000
+    validate_responses: bool = False
+    debug_log_sample_rate: float = 0.01
+
+    @property
+    def use_sqlite(self):
+        return not all([self.db_user, self.db_password, self.db_host, self.db_name])
+
+    @property
+    def database_url(self):
+        if self.use_sqlite:
+            return "sqlite:///./swipe_interview.db"
+        return f"postgresql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
+
+    @property
+    def async_database_url(self):
+        if self.use_sqlite:
+            return "sqlite+aiosqlite:///./swipe_interview.db"
+        return f"postgresql+asyncpg://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
+
+    @property
+    def create_schema_on_startup(self):
+        return self.use_sqlite if self.auto_create_schema is None else self.auto_create_schema
+
+
+settings = Settings()
@@ -1,19 +1,153 @@
-from sqlalchemy.orm import Session
-from app import models, auth
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, undefer
+from app import models, auth, leaderboard
 
-def create_candidate(db: Session, candidate):
-    hashed_pwd = auth.hash_password(candidate.password)
+async def create_candidate(db: AsyncSession, candidate):
+    hashed_pwd = await auth.hash_password_async(candidate.password)
     db_candidate = models.Candidate(
         name=candidate.name,
         email=candidate.email,
         phone=candidate.phone,
         hashed_password=hashed_pwd,
+        resume_text=None,  # set explicitly: the column is deferred and can't lazy-load later
         role=candidate.role if hasattr(candidate, 'role') else "interviewee"
     ) 
     db.add(db_candidate)
-    db.commit()
-    db.refresh(db_candidate)
+    await db.flush()  # assigns db_candidate.id
+    leaderboard.add_candidate(db, db_candidate.id)
+    await db.commit()
     return db_candidate
 
-def get_candidate_by_email(db: Session, email: str):
-    return db.query(models.Candidate).filter(models.Candidate.email == email).first()
+async def get_candidate_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.Candidate).where(models.Candidate.email == email))
+    return result.scalars().first()
+
+async def candidate_exists(db: AsyncSession, candidate_id: int):
+    result = await db.execute(select(models.Candidate.id).where(models.Candidate.id == candidate_id))
+    return result.scalar() is not None
+
+async def get_candidate_with_resume(db: AsyncSession, candidate_id: int):
+    # resume_text is deferred; undefer it for the few routes that return the full profile
+    return await db.get(models.Candidate, candidate_id, options=[undefer(models.Candidate.resume_text)])
+
+async def get_candidate_overview(db: AsyncSession, candidate_id: int, with_resume: bool = False):
+    """Profile columns plus the latest scored interview; resume_text only if `with_resume`."""
+    scored = aliased(models.Interview)
+    latest_scored = (
+        select(scored.id)
+        .where(scored.candidate_id == models.Candidate.id, scored.score.isnot(None))
+        .order_by(scored.id.desc())
+        .limit(1)
+        .correlate(models.Candidate)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            models.Candidate.id,
+            models.Candidate.name,
+            models.Candidate.email,
+            models.Candidate.phone,
+            models.Candidate.resume_text.isnot(None).label("has_resume"),
+            models.Interview.score,
+            models.Interview.summary,
+        )
+        .outerjoin(models.Interview, models.Interview.id == latest_scored)
+        .where(models.Candidate.id == candidate_id)
+    )
+    if with_resume:
+        stmt = stmt.add_columns(models.Candidate.resume_text)
+    return (await db.execute(stmt)).first()
+
+async def get_candidate_reviews(db: AsyncSession, candidate_ids):
+    """get_candidate_overview for many candidates in one query, plus each one's latest interview
+    (interview_id, version, final_score, summary; None without interviews)."""
+    scored = aliased(models.Interview)
+    latest = aliased(models.Interview)
+
+    def newest(scored_only: bool):
+        interview = aliased(models.Interview)
+        stmt = select(interview.id).where(interview.candidate_id == models.Candidate.id)
+        if scored_only:
+            stmt = stmt.where(interview.score.isnot(None))
+        return stmt.order_by(interview.id.desc()).limit(1).correlate(models.Candidate).scalar_subquery()
+
+    stmt = (
+        select(
+            models.Candidate.id,
+            models.Candidate.name,
+            models.Candidate.email,
+            models.Candidate.phone,
+            models.Candidate.resume_text.isnot(None).label("has_resume"),
+            scored.score,
+            scored.summary.label("latest_summary"),
+            latest.id.label("interview_id"),
+            latest.version,
+            latest.score.label("final_score"),
+            latest.summary,
+        )
+        .select_from(models.Candidate)
+        .outerjoin(scored, scored.id == newest(scored_only=True))
+        .outerjoin(latest, latest.id == newest(scored_only=False))
+        .where(models.Candidate.id.in_(candidate_ids))
+    )
+    return (await db.execute(stmt)).all()
+
+async def get_resume_text(db: AsyncSession, candidate_id: int):
+    """Returns (found, resume_text)."""
+    row = (await db.execute(
+        select(models.Candidate.resume_text).where(models.Candidate.id == candidate_id)
+    )).first()
+    return (row is not None, row.resume_text if row else None)
+
+async def get_latest_interview(db: AsyncSession, candidate_id: int, scored_only: bool = False):
+    stmt = select(models.Interview).where(models.Interview.candidate_id == candidate_id)
+    if scored_only:
+        stmt = stmt.where(models.Interview.score.isnot(None))
+    result = await db.execute(stmt.order_by(models.Interview.id.desc()).limit(1))
+    return result.scalars().first()
+
+async def get_active_interview(db: AsyncSession, candidate_id: int):
+    """Latest interview not yet completed (in progress or grading), read through ix_interviews_active."""
+    result = await db.execute(
+        select(models.Interview)
+        .where(models.Interview.candidate_id == candidate_id, models.Interview.status != "completed")
+        .order_by(models.Interview.id.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
+
+async def list_candidate_scores(db: AsyncSession, limit: int, after=None, min_score=None, max_score=None, status=None):
+    """Rank candidates by the score of their latest scored interview.
+
+    Reads the candidate_scores leaderboard, so a page costs an index range scan plus
+    primary-key lookups. Rows are ordered by score desc, id asc. `after` is the
+    (score, id) of the last row of the previous page (keyset pagination). `status`
+    filters on the status of each candidate's latest interview, scored or not.
+    """
+    score = models.CandidateScore.score
+    candidate_id = models.CandidateScore.candidate_id
+    stmt = (
+        select(models.Candidate.id, models.Candidate.name, models.Candidate.email, score.label("score"))
+        .join(models.Candidate, models.Candidate.id == candidate_id)
+    )
+    if status is not None:
+        stmt = stmt.where(models.CandidateScore.latest_status == status)
+    if min_score is not None:
+        stmt = stmt.where(score >= min_score)
+    if max_score is not None:
+        stmt = stmt.where(score <= max_score)
+    if after is not None:
+        after_score, after_id = after
+        stmt = stmt.where(or_(score < after_score, (score == after_score) & (candidate_id > after_id)))
+
+    stmt = stmt.order_by(score.desc(), candidate_id.asc()).limit(limit)
+    return (await db.execute(stmt)).all()
+
+async def get_interview_questions(db: AsyncSession, interview_id: int):
+    result = await db.execute(
+        select(models.InterviewQuestion)
+        .where(models.InterviewQuestion.interview_id == interview_id)
+        .order_by(models.InterviewQuestion.question_index)
+    )
+    return result.scalars().all()
@@ -0,0 +1,110 @@
+"""
+Idempotency-Key support for the interview write endpoints.
+
+A client that may retry a request (timeouts, double clicks) sends a unique
+`Idempotency-Key` header. The first request with a key claims it with an INSERT into
+idempotency_keys and runs; its 2xx response body is stored with the key. Later requests
+with the same key and body get the stored response back (`Idempotent-Replayed: true`)
+without running again, so a retried answer is neither re-evaluated nor scored twice.
+
+- same key while the first request is still running: 409 with Retry-After
+- same key with a different endpoint or body: 422
+- the request fails (4xx/5xx, exception): the key is released and a retry runs again
+
+Keys are per candidate and kept for IDEMPOTENCY_TTL seconds. A claim older than
+IDEMPOTENCY_LOCK_TIMEOUT without a response (its worker died) can be taken over.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.config import settings
+
+IDEMPOTENCY_TTL = settings.idempotency_ttl
+IDEMPOTENCY_LOCK_TIMEOUT = settings.idempotency_lock_timeout
+MAX_KEY_LENGTH = 255
+
+Key = models.IdempotencyKey
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def fingerprint(endpoint: str, body) -> str:
+    return hashlib.sha256(orjson.dumps([endpoint, body], option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def _this_key(candidate_id: int, key: str):
+    return (Key.candidate_id == candidate_id) & (Key.key == key)
+
+
+async def claim(db: AsyncSession, candidate_id: int, key: str, request_fingerprint: str):
+    """Claim `key` for this request. Returns None if claimed, else the stored response body."""
+    now = _now()
+    # expired keys of this candidate, and an abandoned claim on this key
+    await db.execute(delete(Key).where(
+        Key.candidate_id == candidate_id, Key.created_at < now - timedelta(seconds=IDEMPOTENCY_TTL)
+    ))
+    await db.execute(delete(Key).where(
+        _this_key(candidate_id, key), Key.completed_at.is_(None),
+        Key.created_at < now - timedelta(seconds=IDEMPOTENCY_LOCK_TIMEOUT),
+    ))
+    try:
+        await db.execute(insert(Key).values(
+            candidate_id=candidate_id, key=key, fingerprint=request_fingerprint, created_at=now
+        ))
+        await db.commit()
+        return None
+    except IntegrityError:
+        await db.rollback()
+
+    row = (await db.execute(select(Key).where(_this_key(candidate_id, key)))).scalars().first()
+    await db.commit()
+    if row is None or row.completed_at is None:
+        # still running (or released a moment ago): the client should retry shortly
+        raise HTTPException(
+            status_code=409, detail="A request with this Idempotency-Key is in progress",
+            headers={"Retry-After": "1"},
+        )
+    if row.fingerprint != request_fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    return row.response
+
+
+async def complete(db: AsyncSession, candidate_id: int, key: str, body):
+    await db.execute(
+        update(Key).where(_this_key(candidate_id, key)).values(response=body, completed_at=_now())
+    )
+    await db.commit()
+
+
+async def release(db: AsyncSession, candidate_id: int, key: str):
+    await db.rollback()
+    await db.execute(delete(Key).where(_this_key(candidate_id, key), Key.completed_at.is_(None)))
+    await db.commit()
+
+
+async def run_once(db: AsyncSession, candidate_id: int, key, endpoint: str, body, handler):
+    """Run `handler()` (returning a JSON-able dict) at most once per (candidate, key)."""
+    if key is None:
+        return await handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+    stored = await claim(db, candidate_id, key, fingerprint(endpoint, body))
+    if stored is not None:
+        return ORJSONResponse(stored, headers={"Idempotent-Replayed": "true"})
+    try:
+        result = await handler()
+    except Exception:
+        await release(db, candidate_id, key)
+        raise
+    await complete(db, candidate_id, key, result)
+    return result
@@ -0,0 +1,165 @@
+"""
+Interview change notifications for cheap status polling.
+
+Every write that changes what GET /api/interview/status returns bumps Interview.version
+(`bump()`, in the writer's transaction). After the commit the new version is published
+in-process; on Postgres a NOTIFY is also sent, so other API processes and the scoring
+worker's updates reach every listener.
+
+Each process keeps candidate -> (latest interview id, version) in memory, so a poll with a
+matching If-None-Match, or a long-poll/SSE waiter, is answered without touching the DB.
+Without LISTEN (SQLite) the cached version is trusted for STATUS_VERSION_TTL seconds.
+"""
+import asyncio
+import json
+import logging
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+from app.utils.cache import TTLCache
+
+STATUS_VERSION_TTL = settings.status_version_ttl
+STATUS_LONG_POLL_MAX = settings.status_long_poll_max
+CHANNEL = "interview_changes"
+
+logger = logging.getLogger(__name__)
+
+
+class InterviewNotifier:
+    def __init__(self):
+        # entries stay valid for an hour while LISTEN keeps them fresh
+        self._versions = TTLCache(maxsize=100000, ttl=3600)
+        self._waiters = {}  # candidate_id -> (loop, asyncio.Event), replaced on every publish
+        self.listening = False
+
+    def get(self, candidate_id: int):
+        return self._versions.get(candidate_id)
+
+    def remember(self, candidate_id: int, interview_id: int, version: int):
+        current = self._versions.get(candidate_id)
+        if current is not None and current >= (interview_id, version):
+            return False
+        self._versions.set(candidate_id, (interview_id, version), None if self.listening else STATUS_VERSION_TTL)
+        return True
+
+    def publish(self, candidate_id: int, interview_id: int, version: int):
+        if self.remember(candidate_id, interview_id, version):
+            entry = self._waiters.pop(candidate_id, None)
+            if entry is not None and not entry[0].is_closed():
+                # commits can happen off the loop thread (sync sessions, LISTEN callbacks)
+                entry[0].call_soon_threadsafe(entry[1].set)
+
+    async def wait(self, candidate_id: int, timeout: float):
+        """Wait up to `timeout` seconds for a publish for this candidate."""
+        loop = asyncio.get_running_loop()
+        entry = self._waiters.get(candidate_id)
+        if entry is None or entry[0] is not loop:
+            entry = self._waiters[candidate_id] = (loop, asyncio.Event())
+        try:
+            await asyncio.wait_for(entry[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def disconnected(self):
+        # notifications may have been missed: stop trusting cached versions
+        self.listening = False
+        self._versions.clear()
+
+    def stats(self):
+        return {**self._versions.stats(), "waiting": len(self._waiters), "listening": self.listening}
+
+
+notifier = InterviewNotifier()
+
+
+async def bump(db: AsyncSession, interview_id: int):
+    """Increment the interview's version in the caller's transaction; published on commit."""
+    candidate_id, version = (await db.execute(
+        update(models.Interview)
+        .where(models.Interview.id == interview_id)
+        .values(version=models.Interview.version + 1)
+        .returning(models.Interview.candidate_id, models.Interview.version)
+        .execution_options(synchronize_session=False)
+    )).one()
+    await changed(db, candidate_id, interview_id, version)
+    return version
+
+
+async def changed(db: AsyncSession, candidate_id: int, interview_id: int, version: int):
+    """Publish (candidate, interview, version) once the caller's transaction commits."""
+    db.info.setdefault("interview_changes", []).append((candidate_id, interview_id, version))
+    if db.bind.dialect.name == "postgresql":
+        # delivered to every LISTENing process at commit, dropped on rollback
+        payload = json.dumps([candidate_id, interview_id, version])
+        await db.execute(select(func.pg_notify(CHANNEL, payload)))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session):
+    for change in session.info.pop("interview_changes", ()):
+        notifier.publish(*change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_rollback(session):
+    session.info.pop("interview_changes", None)
+
+
+async def current_version(db: AsyncSession, candidate_id: int):
+    """(interview id, version) of the candidate's latest interview, or None."""
+    cached = notifier.get(candidate_id)
+    if cached is not None:
+        return cached
+    row = (await db.execute(
+        select(models.Interview.id, models.Interview.version)
+        .where(models.Interview.candidate_id == candidate_id)
+        .order_by(models.Interview.id.desc())
+        .limit(1)
+    )).first()
+    await db.commit()  # don't keep the connection while a long-poll waits
+    if row is None:
+        return None
+    notifier.remember(candidate_id, row.id, row.version)
+    return (row.id, row.version)
+
+
+# --- Postgres LISTEN ---
+
+_listener = None
+
+def _on_notify(connection, pid, channel, payload):
+    try:
+        candidate_id, interview_id, version = json.loads(payload)
+    except (TypeError, ValueError):
+        return
+    notifier.publish(candidate_id, interview_id, version)
+
+
+async def start_listener(async_engine):
+    """LISTEN on a dedicated connection (Postgres only); otherwise rely on STATUS_VERSION_TTL."""
+    global _listener
+    if async_engine.dialect.name != "postgresql" or _listener is not None:
+        return
+    import asyncpg
+
+    url = async_engine.url.set(drivername="postgresql")
+    try:
+        _listener = await asyncpg.connect(url.render_as_string(hide_password=False))
+        await _listener.add_listener(CHANNEL, _on_notify)
+        _listener.add_termination_listener(lambda conn: notifier.disconnected())
+        notifier.listening = True
+    except Exception:
+        logger.warning("LISTEN %s unavailable; status versions expire after %ss", CHANNEL, STATUS_VERSION_TTL)
+        _listener = None
+
+
+async def stop_listener():
+    global _listener
+    if _listener is not None:
+        notifier.disconnected()
+        await _listener.close()
+        _listener = None
@@ -0,0 +1,418 @@
+"""
+Live interview sessions for the WebSocket channel (/api/interview/ws).
+
+A connection authenticates once. The worker then keeps the candidate's active interview
+in memory as an InterviewSession: its status and its questions with their versions. An
+answer is evaluated against that state, so a turn needs no authentication and no reads,
+and the reply goes out at once. The writes are queued. Every SESSION_FLUSH_MS
+milliseconds, up to SESSION_FLUSH_BATCH turns, from all sessions, are written in one
+transaction (`write_turns`). Each turn writes what POST /answer writes:
+- the question's compare-and-swap UPDATE
+- the next question
+- the scoring job (deferred mode)
+- the search document
+- the interview version
+- the grading or completion status, with the leaderboard
+
+Once its turns are committed, the client gets a `saved` message.
+
+Sessions belong to one worker and are keyed by candidate. A reconnect to the same worker
+picks up the session in memory, unsaved turns included. Otherwise the session is read
+from the database again. After a disconnect, a restart or a move to another worker, the
+client therefore resumes at the last saved turn. Turns that were acknowledged but not yet
+saved when a worker dies are lost, and those questions are asked again. Shutdown writes
+every queued turn first (see the main.py lifespan).
+
+While a session is live, POST /start and POST /answer on the same worker get 409. A write
+from another worker makes the flush's compare-and-swap fail. The session's unsaved turns
+are then dropped and the session is reloaded. The client gets a `conflict` message with
+the current state.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from app import crud, database, interview_events, leaderboard, models, scoring_queue, search
+from app.config import settings
+from app.utils.ai_utils import summarize_interview
+from app.utils.evaluator import EvaluationUnavailable, get_evaluator
+from app.utils.metrics import COUNT_BUCKETS, Histogram
+from app.utils.question_bank import get_resume_topics, resume_topics_cache
+
+SESSION_FLUSH_MS = settings.session_flush_ms
+SESSION_FLUSH_BATCH = settings.session_flush_batch
+TOTAL_QUESTIONS = 6
+
+logger = logging.getLogger(__name__)
+
+turn_latency = Histogram("interview_ws_message_seconds", "WebSocket interview messages, receipt to reply", ("type",))
+flush_turns = Histogram("interview_flush_turns", "Turns written per session flush", buckets=COUNT_BUCKETS)
+flush_latency = Histogram("interview_flush_seconds", "Session flush transactions")
+
+Question = models.InterviewQuestion
+
+_QUESTION_FIELDS = ("question_index", "question", "difficulty", "answer", "score", "answered_at", "version")
+
+
+def _qa(question):
+    # InterviewQuestion.to_qa_dict for the in-memory rows
+    qa = {"question": question["question"], "difficulty": question["difficulty"]}
+    if question["answered_at"] is not None:
+        qa["answer"] = question["answer"]
+        qa["score"] = question["score"]
+    return qa
+
+
+@dataclass
+class Turn:
+    """One answer to write: the question's CAS, plus what the answer led to."""
+    session: "InterviewSession"
+    interview_id: int
+    question_index: int
+    version: int  # the question version the answer was evaluated against
+    answer: str
+    score: Optional[int]
+    answered_at: datetime
+    deferred: bool
+    next_question: Optional[dict] = None  # question_index, question, difficulty
+    status: Optional[str] = None  # "grading" or "completed" when this answer ends the interview
+    final_score: Optional[int] = None
+    summary: Optional[str] = None
+
+
+class InterviewSession:
+    """A candidate's active interview as this worker sees it, saved turns or not."""
+
+    def __init__(self, candidate_id: int):
+        self.candidate_id = candidate_id
+        self.interview_id = None
+        self.status = None
+        self.score = None
+        self.summary = None
+        self.questions = []  # dicts of _QUESTION_FIELDS, in question order
+        self.generation = 0  # bumped by every load; a turn evaluated on older state is refused
+        self.stale = False  # set when a flush finds the interview changed elsewhere
+        self.unsaved = 0  # turns queued and not yet committed
+        self.websocket = None
+        self.lock = asyncio.Lock()  # one message at a time
+        self._send_lock = asyncio.Lock()
+
+    async def load(self):
+        """(Re)read the candidate's active interview."""
+        async with database.AsyncSessionLocal() as db:
+            interview = await crud.get_active_interview(db, self.candidate_id)
+            questions = await crud.get_interview_questions(db, interview.id) if interview else []
+        self.generation += 1
+        self.stale = False
+        self.interview_id = interview.id if interview else None
+        self.status = interview.status if interview else None
+        self.score = self.summary = None
+        self.questions = [{name: getattr(q, name) for name in _QUESTION_FIELDS} for q in questions]
+
+    def state(self):
+        """GET /status's fields, from memory (no grading_status), plus the unsaved turn count."""
+        attempted = [q["question_index"] for q in self.questions if q["answered_at"] is not None]
+        current = min(attempted[-1] + 1 if attempted else 0, len(self.questions) - 1) if self.questions else 0
+        return {
+            "interview_id": self.interview_id,
+            "status": self.status,
+            "score": self.score,
+            "summary": self.summary,
+            "qa_pairs": [_qa(q) for q in self.questions],
+            "current_question": current,
+            "total_questions": TOTAL_QUESTIONS,
+            "unsaved": self.unsaved,
+        }
+
+    async def send(self, message):
+        websocket = self.websocket
+        if websocket is None:
+            return False
+        async with self._send_lock:
+            try:
+                await websocket.send_text(orjson.dumps(message).decode())
+            except Exception:
+                # the socket went away; its handler detaches the session
+                return False
+        return True
+
+    async def answer(self, answer: str, question_index: int = None):
+        """Evaluate an answer against the in-memory interview and queue its write; returns the reply."""
+        if self.stale:
+            await self.load()
+        if self.status != "in_progress":
+            raise HTTPException(status_code=404, detail="Active interview not found")
+        generation, questions = self.generation, self.questions
+        # the first question without an answer attempt, as in POST /answer
+        current = next((q for q in questions if q["answered_at"] is None), questions[-1])
+        if question_index is not None and question_index != current["question_index"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Question {question_index} is not the current question ({current['question_index']})",
+            )
+
+        deferred = scoring_queue.SCORING_MODE == "deferred" and bool(answer.strip())
+        evaluator = get_evaluator()
+        try:
+            if deferred:
+                score = None  # graded later by app.scoring_worker
+            else:
+                score = await evaluator.evaluate(answer, current["difficulty"]) if answer.strip() else 0
+            next_q = None
+            if len(questions) < TOTAL_QUESTIONS:
+                topics = resume_topics_cache.get(self.candidate_id)
+                if topics is None:
+                    async with database.AsyncSessionLocal() as db:
+                        topics = await get_resume_topics(db, self.candidate_id)
+                next_q = await evaluator.generate_question(
+                    len(questions), exclude={q["question"] for q in questions}, topics=topics,
+                )
+        except EvaluationUnavailable:
+            raise HTTPException(status_code=503, detail="Answer evaluation unavailable, please retry")
+        if generation != self.generation:
+            raise HTTPException(status_code=409, detail="The interview changed elsewhere; answer the current question")
+
+        now = datetime.now(timezone.utc)
+        turn = Turn(self, self.interview_id, current["question_index"], current["version"], answer, score, now, deferred)
+        current.update(answer=answer, score=score, answered_at=now, version=current["version"] + 1)
+        questions_done = len(questions)
+        if next_q is not None:
+            turn.next_question = {"question_index": len(questions), **next_q}
+            questions.append({"answer": None, "score": None, "answered_at": None, "version": 1, **turn.next_question})
+            reply = {
+                "type": "question",
+                "question_index": turn.next_question["question_index"],
+                "next_question": next_q,
+                "questions_done": questions_done,
+                "total_questions": TOTAL_QUESTIONS,
+            }
+        else:
+            reply = {"type": "answered", "message": "Interview completed",
+                     "questions_done": questions_done, "total_questions": TOTAL_QUESTIONS}
+            if all(q["answer"] for q in questions) and any(q["score"] is None for q in questions):
+                # some scores are still queued; the worker completes the interview
+                self.status = turn.status = "grading"
+                reply.update(type="grading", message="Interview submitted for grading")
+            elif all(q["answer"] for q in questions):
+                self.status = turn.status = "completed"
+                self.score = turn.final_score = sum(q["score"] for q in questions)
+                self.summary = turn.summary = summarize_interview(self.score)
+                reply.update(type="completed", score=self.score, summary=self.summary)
+            reply["qa_pairs"] = [_qa(q) for q in questions]
+        manager.queue(turn)
+        return reply
+
+
+async def write_turns(turns):
+    """Write `turns` (in answer order) in one transaction.
+
+    Returns None once committed, or the session of the first turn whose question was
+    written elsewhere in the meantime; the transaction is rolled back then.
+    """
+    grading = []
+    async with database.AsyncSessionLocal() as db:
+        changed = {}  # interview id -> candidate id
+        turn = None
+        try:
+            for turn in turns:
+                candidate_id = turn.session.candidate_id
+                cas = await db.execute(
+                    update(Question)
+                    .where(
+                        Question.interview_id == turn.interview_id,
+                        Question.question_index == turn.question_index,
+                        Question.version == turn.version,
+                    )
+                    .values(answer=turn.answer, score=turn.score, answered_at=turn.answered_at,
+                            version=Question.version + 1)
+                    .execution_options(synchronize_session=False)
+                )
+                if cas.rowcount != 1:
+                    await db.rollback()
+                    return turn.session
+                if turn.next_question is not None:
+                    await db.execute(insert(Question), {"interview_id": turn.interview_id, **turn.next_question})
+                if turn.deferred:
+                    scoring_queue.enqueue(db, turn.interview_id, turn.question_index)
+                await search.index_answer(db, candidate_id, turn.answer)
+                changed[turn.interview_id] = candidate_id
+                if turn.status is not None:
+                    values = {"status": turn.status}
+                    if turn.status == "completed":
+                        values.update(score=turn.final_score, summary=turn.summary, completed_at=turn.answered_at)
+                    await db.execute(
+                        update(models.Interview)
+                        .where(models.Interview.id == turn.interview_id)
+                        .values(**values)
+                        .execution_options(synchronize_session=False)
+                    )
+                    if turn.status == "completed":
+                        await leaderboard.record_completion(db, candidate_id, turn.interview_id, turn.final_score)
+                    else:
+                        await leaderboard.record_status(db, candidate_id, "grading")
+                        grading.append(turn.interview_id)
+            for interview_id in changed:
+                await interview_events.bump(db, interview_id)
+            await db.commit()
+        except IntegrityError:
+            # the next question was inserted elsewhere
+            await db.rollback()
+            return turn.session
+        for interview_id in grading:
+            await scoring_queue.finalize_if_graded(db, interview_id)
+    return None
+
+
+class SessionManager:
+    """This worker's live sessions, and the queue of their unsaved turns."""
+
+    def __init__(self):
+        self._sessions = {}  # candidate_id -> InterviewSession
+        self._queue = []  # Turns, in answer order
+        self._wakeup = None  # (loop, asyncio.Event) of the flush task
+        self._tasks = set()  # flush and notification tasks; keeps them from being garbage collected
+        self._flushing = asyncio.Lock()  # one write at a time, so each session's turns commit in order
+        self.stats = {"turns": 0, "flushes": 0, "flushed_turns": 0, "conflicts": 0, "flush_errors": 0}
+
+    def ensure_not_live(self, candidate_id: int):
+        """409 for the HTTP interview writes while a WebSocket session here holds the interview."""
+        session = self._sessions.get(candidate_id)
+        if session is not None and (session.websocket is not None or session.unsaved):
+            raise HTTPException(status_code=409, detail="This interview is live on a WebSocket connection")
+
+    async def open(self, candidate_id: int, websocket):
+        """The candidate's session, attached to `websocket`; returns (session, the socket it replaced)."""
+        session = self._sessions.get(candidate_id)
+        if session is None:
+            session = self._sessions[candidate_id] = InterviewSession(candidate_id)
+        try:
+            async with session.lock:
+                if session.generation == 0 or session.stale:
+                    await session.load()
+        except Exception:
+            self._forget(session)
+            raise
+        previous, session.websocket = session.websocket, websocket
+        return session, previous
+
+    def detach(self, session: InterviewSession, websocket):
+        if session.websocket is websocket:
+            session.websocket = None
+        self._forget(session)
+
+    def _forget(self, session: InterviewSession):
+        # kept while connected or while it has turns to save
+        if session.websocket is None and not session.unsaved and self._sessions.get(session.candidate_id) is session:
+            del self._sessions[session.candidate_id]
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def queue(self, turn: Turn):
+        self._queue.append(turn)
+        turn.session.unsaved += 1
+        self.stats["turns"] += 1
+        loop = asyncio.get_running_loop()
+        if self._wakeup is None or self._wakeup[0] is not loop:
+            # asyncio primitives are bound to one loop
+            self._wakeup = (loop, asyncio.Event())
+            self._spawn(self._run(self._wakeup[1]))
+        self._wakeup[1].set()
+
+    async def _run(self, wakeup: asyncio.Event):
+        while True:
+            await wakeup.wait()
+            wakeup.clear()
+            if len(self._queue) < SESSION_FLUSH_BATCH:
+                # let turns from other sessions join this transaction
+                await asyncio.sleep(SESSION_FLUSH_MS / 1000)
+            while self._queue:
+                if not await self.flush():
+                    await asyncio.sleep(1)  # the turns stay queued until the database is back
+
+    async def flush(self, limit: int = SESSION_FLUSH_BATCH):
+        """Write up to `limit` queued turns in one transaction; False if the database failed."""
+        async with self._flushing:
+            return await self._flush(limit)
+
+    async def _flush(self, limit: int):
+        batch = self._queue[:limit]
+        del self._queue[:len(batch)]
+        start = time.perf_counter()
+        while batch:
+            try:
+                conflicted = await write_turns(batch)
+            except Exception:
+                logger.exception("Writing %d interview turns failed; retrying", len(batch))
+                self._queue[:0] = batch
+                self.stats["flush_errors"] += 1
+                return False
+            if conflicted is None:
+                break
+            self._conflict(conflicted)
+            batch = [turn for turn in batch if turn.session is not conflicted]
+        if not batch:
+            return True
+        flush_latency.observe(time.perf_counter() - start)
+        flush_turns.observe(len(batch))
+        self.stats["flushes"] += 1
+        self.stats["flushed_turns"] += len(batch)
+        saved = {}
+        for turn in batch:
+            turn.session.unsaved -= 1
+            saved[turn.session] = turn.question_index
+        for session, question_index in saved.items():
+            self._spawn(session.send({"type": "saved", "question_index": question_index, "unsaved": session.unsaved}))
+            self._forget(session)
+        return True
+
+    def _conflict(self, session: InterviewSession):
+        self.stats["conflicts"] += 1
+        self._queue = [turn for turn in self._queue if turn.session is not session]
+        session.unsaved = 0
+        session.stale = True
+        session.generation += 1  # turns being evaluated now are refused
+        self._spawn(self._resync(session))
+
+    async def _resync(self, session: InterviewSession):
+        async with session.lock:
+            if session.stale:
+                await session.load()
+            await session.send({
+                "type": "conflict",
+                "detail": "The interview was changed elsewhere; unsaved answers were dropped",
+                **session.state(),
+            })
+        self._forget(session)
+
+    async def close(self):
+        """Write every queued turn (worker shutdown)."""
+        for _ in range(3):
+            while self._queue:
+                if not await self.flush():
+                    break
+            if not self._queue:
+                return
+            await asyncio.sleep(1)
+        logger.error("Dropping %d unsaved interview turns at shutdown", len(self._queue))
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "sessions": len(self._sessions),
+            "connected": sum(session.websocket is not None for session in self._sessions.values()),
+            "queued": len(self._queue),
+        }
+
+
+manager = SessionManager()
@@ -0,0 +1,192 @@
+"""
+Candidate leaderboard (candidate_scores), maintained as interviews change.
+
+Each write happens in the transaction that changes the interview: signup adds the row,
+start/grading update the latest status, completion folds the score in with single-row
+UPDATEs. Dashboard reads are then an index range over candidate_scores plus primary-key
+joins, independent of the number of interviews.
+
+`python rebuild_leaderboard.py` recomputes every row from the interviews table.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import case, delete, func, insert, literal, or_, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app import analytics, models
+
+Score = models.CandidateScore
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def add_candidate(db: AsyncSession, candidate_id: int):
+    db.add(Score(candidate_id=candidate_id, score=0, interview_count=0))
+
+
+async def add_candidates(db: AsyncSession, candidate_ids):
+    """Rows for a batch of new candidates (bulk import), as one multi-row INSERT."""
+    if candidate_ids:
+        await db.execute(insert(Score), [
+            {"candidate_id": candidate_id, "score": 0, "interview_count": 0} for candidate_id in candidate_ids
+        ])
+
+
+async def record_status(db: AsyncSession, candidate_id: int, status: str):
+    """The candidate's latest interview moved to `status` (in_progress, grading)."""
+    result = await db.execute(
+        update(Score)
+        .where(Score.candidate_id == candidate_id)
+        .values(latest_status=status, last_activity_at=_now())
+    )
+    if result.rowcount == 0:
+        await refresh(db, candidate_id)
+
+
+async def record_completion(db: AsyncSession, candidate_id: int, interview_id: int, score: int):
+    """Fold a completed interview's score into the candidate's row."""
+    analytics.interview_completed(db)
+    # a newer interview may already have completed; it keeps the "latest" fields
+    newer = or_(Score.latest_interview_id.is_(None), Score.latest_interview_id < interview_id)
+    result = await db.execute(
+        update(Score)
+        .where(Score.candidate_id == candidate_id)
+        .values(
+            score=case((newer, score), else_=Score.score),
+            latest_interview_id=case((newer, interview_id), else_=Score.latest_interview_id),
+            best_score=case(
+                (or_(Score.best_score.is_(None), Score.best_score < score), score), else_=Score.best_score
+            ),
+            interview_count=Score.interview_count + 1,
+            latest_status="completed",
+            last_activity_at=_now(),
+        )
+    )
+    if result.rowcount == 0:
+        await refresh(db, candidate_id)
+
+
+def score_rows(candidate_id: int = None):
+    """SELECT producing candidate_scores rows from the source tables (all, or one candidate)."""
+    interview = models.Interview
+
+    def per_candidate(stmt, column):
+        return stmt.where(column == candidate_id) if candidate_id is not None else stmt
+
+    latest = per_candidate(
+        select(interview.candidate_id, func.max(interview.id).label("interview_id"))
+        .group_by(interview.candidate_id),
+        interview.candidate_id,
+    ).subquery()
+    latest_scored = per_candidate(
+        select(interview.candidate_id, func.max(interview.id).label("interview_id"))
+        .where(interview.score.isnot(None))
+        .group_by(interview.candidate_id),
+        interview.candidate_id,
+    ).subquery()
+    # archived interviews count towards the totals; latest ones and recent activity are never archived
+    archived = models.InterviewArchive
+    history = union_all(
+        per_candidate(select(interview.candidate_id, interview.score, interview.status), interview.candidate_id),
+        per_candidate(
+            select(archived.candidate_id, archived.score, literal("completed").label("status")),
+            archived.candidate_id,
+        ),
+    ).subquery()
+    totals = (
+        select(
+            history.c.candidate_id,
+            func.max(history.c.score).label("best_score"),
+            func.sum(case((history.c.status == "completed", 1), else_=0)).label("interview_count"),
+        ).group_by(history.c.candidate_id)
+    ).subquery()
+    activity = per_candidate(
+        select(interview.candidate_id, func.max(models.InterviewQuestion.answered_at).label("last_at"))
+        .join(models.InterviewQuestion, models.InterviewQuestion.interview_id == interview.id)
+        .group_by(interview.candidate_id),
+        interview.candidate_id,
+    ).subquery()
+    current = aliased(interview)
+    scored = aliased(interview)
+
+    stmt = (
+        select(
+            models.Candidate.id.label("candidate_id"),
+            func.coalesce(scored.score, 0).label("score"),
+            scored.id.label("latest_interview_id"),
+            totals.c.best_score,
+            func.coalesce(totals.c.interview_count, 0).label("interview_count"),
+            current.status.label("latest_status"),
+            func.coalesce(activity.c.last_at, models.Candidate.created_at).label("last_activity_at"),
+        )
+        .outerjoin(latest, latest.c.candidate_id == models.Candidate.id)
+        .outerjoin(current, current.id == latest.c.interview_id)
+        .outerjoin(latest_scored, latest_scored.c.candidate_id == models.Candidate.id)
+        .outerjoin(scored, scored.id == latest_scored.c.interview_id)
+        .outerjoin(totals, totals.c.candidate_id == models.Candidate.id)
+        .outerjoin(activity, activity.c.candidate_id == models.Candidate.id)
+    )
+    return per_candidate(stmt, models.Candidate.id)
+
+
+_COLUMNS = [
+    "candidate_id", "score", "latest_interview_id", "best_score",
+    "interview_count", "latest_status", "last_activity_at",
+]
+
+
+async def refresh(db: AsyncSession, candidate_id: int):
+    """Recompute one candidate's row (fallback for rows that predate the table)."""
+    await db.flush()  # include the caller's pending interview changes
+    await db.execute(delete(Score).where(Score.candidate_id == candidate_id))
+    await db.execute(insert(Score).from_select(_COLUMNS, score_rows(candidate_id)))
+
+
+def rebuild_statements():
+    """DELETE + INSERT ... SELECT that rebuild the whole table; run them in one transaction."""
+    return [delete(Score), insert(Score).from_select(_COLUMNS, score_rows())]
+
+
+# --- reads ---
+
+async def top(db: AsyncSession, n: int, status: str = None):
+    stmt = (
+        select(
+            models.Candidate.id, models.Candidate.name, models.Candidate.email,
+            Score.score, Score.best_score, Score.interview_count, Score.latest_status, Score.last_activity_at,
+        )
+        .join(models.Candidate, models.Candidate.id == Score.candidate_id)
+    )
+    if status is not None:
+        stmt = stmt.where(Score.latest_status == status)
+    stmt = stmt.order_by(Score.score.desc(), Score.candidate_id.asc()).limit(n)
+    return (await db.execute(stmt)).all()
+
+
+async def percentile_of(db: AsyncSession, candidate_id: int):
+    """(score, percentile): the share of candidates scoring strictly lower, 0-100. None if unknown."""
+    score = (await db.execute(select(Score.score).where(Score.candidate_id == candidate_id))).scalar()
+    if score is None:
+        return None
+    below, total = (await db.execute(
+        select(func.sum(case((Score.score < score, 1), else_=0)), func.count()).select_from(Score)
+    )).one()
+    return score, round(100.0 * below / total, 2)
+
+
+async def score_percentiles(db: AsyncSession, percentiles):
+    """Score at each requested percentile (nearest rank), plus the candidate count."""
+    total = (await db.execute(select(func.count()).select_from(Score))).scalar()
+    scores = {}
+    for p in percentiles:
+        if not total:
+            scores[p] = None
+            continue
+        offset = min(total - 1, max(0, int(round(p / 100 * total)) - 1))
+        scores[p] = (await db.execute(
+            select(Score.score).order_by(Score.score.asc()).offset(offset).limit(1)
+        )).scalar()
+    return total, scores
@@ -1,12 +1,57 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from sqlalchemy import text
+from app import interview_events, interview_sessions, ratelimit, scoring_queue, transcripts
 from app.routers import auth, candidate, interview, interviewer
-from app.database import Base, engine
+from app.auth import password_pool_stats, shutdown_password_pool
+from app.config import settings
+from app.database import AsyncSessionLocal, dispose_engines, get_async_engine, get_pool_metrics
+from app.schema import migrate
+from app.utils import metrics
+from app.utils.evaluator import get_evaluator
+from app.utils.question_bank import get_bank, load_bank
+from app.utils.resume_parser import shutdown_resume_pool
 from fastapi.middleware.cors import CORSMiddleware
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Swipe AI Interview Assistant Backend")
+READY_DB_TIMEOUT = 2.0
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing touches the database at import; each worker does its start-up work here.
+    started = time.perf_counter()
+    app.state.ready = False
+    engine = get_async_engine()
+    if settings.create_schema_on_startup:
+        # SQLite fallback / AUTO_CREATE_SCHEMA=1; on Postgres, `python init_db.py` migrates once per deploy
+        async with engine.begin() as connection:
+            await connection.run_sync(migrate)
+    # index the question bank once per worker instead of on the first interview
+    await load_bank()
+    # Postgres LISTEN for status versions bumped by other processes; no-op on SQLite
+    await interview_events.start_listener(engine)
+    app.state.startup_seconds = round(time.perf_counter() - started, 4)
+    app.state.ready = True
+    logger.info("Worker ready in %.3fs", app.state.startup_seconds)
+    yield
+    app.state.ready = False
+    # answers acknowledged on WebSocket sessions but not yet written
+    await interview_sessions.manager.close()
+    await interview_events.stop_listener()
+    shutdown_password_pool()
+    shutdown_resume_pool()
+    await dispose_engines()
+
+app = FastAPI(
+    title="Swipe AI Interview Assistant Backend",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 # Allow CORS
 # Development: allow all origins
@@ -20,8 +65,13 @@ app.add_middleware(
     allow_credentials=False,     # must be False when allow_origins=['*']
     allow_methods=["*"],       # allow all methods (POST, GET, etc.)
     allow_headers=["*"],       # allow all headers
+    # pagination cursor for /api/interviewer/candidates; caching/range headers for resume downloads
+    expose_headers=["X-Next-Cursor", "ETag", "Content-Range", "Accept-Ranges"],
 )
 
+# outermost, so latency covers CORS handling too
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Alternative (allows credentials and echoes the request Origin):
 # Uncomment if you need to allow credentials from any origin (use with caution):
 #
@@ -41,3 +91,63 @@ app.include_router(interviewer.router, prefix="/api/interviewer", tags=["intervi
 @app.get("/")
 def root():
     return {"message": "Backend is running!"}
+
+@app.get("/ready")
+async def readiness():
+    # for load balancers / orchestrators: start-up finished and the database answers
+    if not getattr(app.state, "ready", False):
+        return ORJSONResponse({"status": "starting"}, status_code=503)
+    try:
+        async with asyncio.timeout(READY_DB_TIMEOUT):
+            async with get_async_engine().connect() as connection:
+                await connection.execute(text("SELECT 1"))
+    except Exception as exc:
+        logger.warning("Readiness check failed: %r", exc)
+        return ORJSONResponse({"status": "unavailable", "database": "error"}, status_code=503)
+    return {
+        "status": "ready",
+        "database": "ok",
+        "questions": len(get_bank()),
+        "startup_seconds": app.state.startup_seconds,
+    }
+
+# existing stats dicts, exported as gauges on GET /metrics
+metrics.register_collector("db_pool", get_pool_metrics)
+metrics.register_collector("principal_cache", lambda: candidate.principal_cache.stats())
+metrics.register_collector("password_pool", password_pool_stats)
+metrics.register_collector("evaluator", lambda: get_evaluator().stats)
+metrics.register_collector("question_bank", lambda: {"questions": len(get_bank())})
+metrics.register_collector("status_versions", interview_events.notifier.stats)
+metrics.register_collector("admission", ratelimit.stats)
+metrics.register_collector("transcripts", transcripts.stats)
+metrics.register_collector("interview_sessions", interview_sessions.manager.snapshot)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    # Prometheus text format: route latency, per-request DB queries, AI call timings, gauges
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    # checkout wait, in-use and overflow counters for the async connection pool
+    return get_pool_metrics()
+
+@app.get("/metrics/principal-cache")
+def principal_cache_metrics():
+    # hit/miss counters for the token -> principal cache in get_current_candidate
+    return candidate.principal_cache.stats()
+
+@app.get("/metrics/password-pool")
+def password_pool_metrics():
+    return password_pool_stats()
+
+@app.get("/metrics/evaluator")
+def evaluator_metrics():
+    evaluator = get_evaluator()
+    return {"backend": evaluator.backend.name, **evaluator.stats}
+
+@app.get("/metrics/scoring-queue")
+async def scoring_queue_metrics():
+    # depth and enqueue-to-score latency of the deferred scoring queue
+    async with AsyncSessionLocal() as db:
+        return await scoring_queue.queue_stats(db)
@@ -1,5 +1,5 @@
-from sqlalchemy import JSON, Column, ForeignKey, Integer, String, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import JSON, Boolean, Column, Float, ForeignKey, Index, Integer, LargeBinary, String, DateTime
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -11,12 +11,25 @@ class Candidate(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     phone = Column(String, nullable=True)
     hashed_password = Column(String, nullable=False)
-    resume_text = Column(String, nullable=True)
+    resume_text = deferred(Column(String, nullable=True))  # can be large; load explicitly
     role = Column(String, default="interviewee")  # interviewee | interviewer
     created_at = Column(DateTime(timezone=True), server_default=func.now())
      # Relationships
     interviews = relationship("Interview", back_populates="candidate")
 
+class ResumeParse(Base):
+    __tablename__ = "resume_parses"
+    id = Column(Integer, primary_key=True, index=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), index=True)
+    filename = Column(String, nullable=True)
+    content_hash = Column(String, index=True, nullable=False)  # sha256 of the uploaded bytes
+    status = Column(String, default="pending")  # pending | processing | done | failed
+    error = Column(String, nullable=True)
+    page_count = Column(Integer, nullable=True)
+    text = Column(String, nullable=True)  # kept so identical uploads are not parsed again
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
 class Interview(Base):
     __tablename__ = "interviews"
     id = Column(Integer, primary_key=True, index=True)
@@ -24,9 +37,27 @@ class Interview(Base):
     status = Column(String, default="in_progress")  # in_progress | completed
     score = Column(Integer, nullable=True)
     summary = Column(String, nullable=True)
-    qa_pairs = Column(JSON, default=list)  # <-- use default=list instead of default=[]
+    qa_pairs = Column(JSON, default=list)  # legacy; questions now live in interview_questions
+    # bumped by every change visible in /api/interview/status (see app.interview_events)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    completed_at = Column(DateTime(timezone=True), nullable=True)  # when status became "completed"
 
     candidate = relationship("Candidate", back_populates="interviews")
+    questions = relationship(
+        "InterviewQuestion", back_populates="interview", order_by="InterviewQuestion.question_index"
+    )
+
+    __table_args__ = (
+        # "latest interview per candidate" lookups scan this index only
+        Index("ix_interviews_candidate_id_id", "candidate_id", "id"),
+        # analytics score distribution: index-only scan of completed interviews
+        Index("ix_interviews_status_score", "status", "score"),
+        # the answer path's "active interview" lookup: only unfinished interviews are indexed
+        Index(
+            "ix_interviews_active", "candidate_id", "id",
+            postgresql_where=status != "completed", sqlite_where=status != "completed",
+        ),
+    )
 
     def __repr__(self):
         return (
@@ -35,3 +66,129 @@ class Interview(Base):
             f"summary='{self.summary}', qa_pairs={self.qa_pairs})>"
         )
 
+
+
+class InterviewQuestion(Base):
+    """One question of an interview; answering it updates only this row."""
+    __tablename__ = "interview_questions"
+    interview_id = Column(Integer, ForeignKey("interviews.id"), primary_key=True)
+    question_index = Column(Integer, primary_key=True)
+    question = Column(String, nullable=False)
+    difficulty = Column(String, nullable=False)
+    answer = Column(String, nullable=True)
+    score = Column(Integer, nullable=True)
+    asked_at = Column(DateTime(timezone=True), server_default=func.now())
+    answered_at = Column(DateTime(timezone=True), nullable=True)  # set once an answer (even empty) is recorded
+    # bumped by every answer write; submit_answer only writes if it still matches what it read
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __table_args__ = (
+        # analytics GROUP BY difficulty, question reads this index only, already in group order
+        Index("ix_interview_questions_stats", "difficulty", "question", "score"),
+    )
+
+    interview = relationship("Interview", back_populates="questions")
+
+    def to_qa_dict(self):
+        # same shape as the old qa_pairs entries: answer/score keys only once attempted
+        qa = {"question": self.question, "difficulty": self.difficulty}
+        if self.answered_at is not None:
+            qa["answer"] = self.answer
+            qa["score"] = self.score
+        return qa
+
+
+class InterviewArchive(Base):
+    """A completed interview moved out of the hot tables (see app/archive.py)."""
+    __tablename__ = "interview_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)  # the interview's id
+    completed_at = Column(DateTime(timezone=True), primary_key=True)  # partition key on Postgres
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False)
+    score = Column(Integer, nullable=True)
+    summary = Column(String, nullable=True)
+    questions_answered = Column(Integer, nullable=False)
+    questions = Column(LargeBinary, nullable=False)  # zlib-compressed JSON list of the question rows
+    archived_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_interview_archive_candidate_id_id", "candidate_id", "id"),
+        Index("ix_interview_archive_score", "score"),
+        # one partition per month, created by app/archive.py as it archives into it
+        {"postgresql_partition_by": "RANGE (completed_at)"},
+    )
+
+
+class ArchivedAnswerScore(Base):
+    """Graded answers of archived interviews, counted per (difficulty, question, score), for analytics."""
+    __tablename__ = "archived_answer_scores"
+    difficulty = Column(String, primary_key=True)
+    question = Column(String, primary_key=True)
+    score = Column(Integer, primary_key=True)
+    answers = Column(Integer, nullable=False)
+
+
+class ScoringJob(Base):
+    """Deferred grading of one answered question (see app/scoring_queue.py)."""
+    __tablename__ = "scoring_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    interview_id = Column(Integer, ForeignKey("interviews.id"), nullable=False)
+    question_index = Column(Integer, nullable=False)
+    status = Column(String, default="queued")  # queued | running | done | failed
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # workers poll for the oldest queued job
+        Index("ix_scoring_jobs_status_id", "status", "id"),
+        Index("ix_scoring_jobs_interview_id", "interview_id"),
+    )
+
+
+class IdempotencyKey(Base):
+    """A client's Idempotency-Key and the response it produced (see app/idempotency.py)."""
+    __tablename__ = "idempotency_keys"
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), primary_key=True)
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)  # sha256 of the endpoint and request body
+    response = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)  # None while the request runs
+
+
+class RateLimitBucket(Base):
+    """Token bucket shared by all API processes (RATE_LIMIT_BACKEND=database, see app/ratelimit.py)."""
+    __tablename__ = "rate_limit_buckets"
+    key = Column(String, primary_key=True)  # "<route class>:<candidate id or client ip>"
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # unix time of the last take
+    allowed = Column(Boolean, nullable=False)  # outcome of the last take
+
+
+class CandidateScore(Base):
+    """Per-candidate leaderboard row, kept current by app/leaderboard.py."""
+    __tablename__ = "candidate_scores"
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), primary_key=True)
+    score = Column(Integer, nullable=False, default=0)  # latest scored interview, 0 if none
+    latest_interview_id = Column(Integer, nullable=True)  # the interview `score` came from
+    best_score = Column(Integer, nullable=True)
+    interview_count = Column(Integer, nullable=False, default=0)  # completed interviews
+    latest_status = Column(String, nullable=True)  # status of the most recent interview
+    last_activity_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # dashboard pages: ORDER BY score DESC, candidate_id ASC
+        Index("ix_candidate_scores_rank", score.desc(), "candidate_id"),
+        Index("ix_candidate_scores_status_rank", "latest_status", score.desc(), "candidate_id"),
+    )
+
+
+class BankQuestion(Base):
+    """Question bank entries, loaded into memory when QUESTION_BANK_PATH=table."""
+    __tablename__ = "question_bank"
+    id = Column(Integer, primary_key=True, index=True)
+    question = Column(String, nullable=False)
+    difficulty = Column(String, nullable=False)  # Easy | Medium | Hard
+    topics = Column(String, nullable=True)  # ";"-separated, e.g. "react;javascript"
@@ -0,0 +1,249 @@
+"""
+Admission control for the expensive endpoints, by route class:
+
+- auth (signup, login: bcrypt), keyed by client IP
+- resume (upload_resume: spooling and PDF parsing), keyed by candidate
+- answer (submit_answer: evaluation), keyed by candidate
+- import (candidates/import: a bcrypt hash per row), keyed by interviewer
+
+Each request first takes a token from its key's bucket (RATE_LIMIT_<CLASS> = "N/S": bursts
+of N, refilled at N per S seconds); an empty bucket is answered 429 with Retry-After. It
+then needs one of CONCURRENCY_<CLASS> slots in this process. Up to CONCURRENCY_MAX_QUEUE
+requests wait for a slot, for at most CONCURRENCY_QUEUE_TIMEOUT seconds; beyond that the
+request is shed with 503 and Retry-After.
+
+Buckets live in a backend: "memory" (per process) or "database" (a rate_limit_buckets row
+per key updated with one atomic upsert, so every process shares it; SQLite works as a
+local stand-in for Postgres). Other backends can be added with register_backend().
+"""
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import case, delete
+from sqlalchemy.dialects.postgresql import insert as postgres_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import database, models
+from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import Counter, Histogram
+
+RATE_LIMIT_ENABLED = settings.rate_limit_enabled
+RATE_LIMIT_BACKEND = settings.rate_limit_backend
+CONCURRENCY_MAX_QUEUE = settings.concurrency_max_queue
+CONCURRENCY_QUEUE_TIMEOUT = settings.concurrency_queue_timeout
+
+logger = logging.getLogger(__name__)
+
+admission_rejected = Counter(
+    "admission_rejected_total", "Requests turned away by admission control", ("route_class", "reason")
+)
+admission_wait = Histogram(
+    "admission_queue_wait_seconds", "Time queued requests waited for a concurrency slot", ("route_class",)
+)
+
+
+def parse_rate(value: str):
+    """"N/S" -> (burst, tokens per second)."""
+    count, seconds = value.split("/")
+    return float(count), float(count) / float(seconds)
+
+
+# --- token bucket backends ---
+
+class RateLimitBackend:
+    """Interface for bucket stores. `take` removes one token if there is one."""
+
+    name = "base"
+
+    async def take(self, key: str, burst: float, rate: float):
+        """Return (allowed, seconds until a token is available)."""
+        raise NotImplementedError
+
+
+def _wait_for_token(tokens: float, rate: float):
+    return max(0.0, (1 - tokens) / rate)
+
+
+class MemoryBackend(RateLimitBackend):
+    name = "memory"
+
+    def __init__(self, maxsize: int = 100000, clock=time.monotonic):
+        self.clock = clock
+        # an entry lives until its bucket would be full again; a missing entry is a full bucket
+        self._buckets = TTLCache(maxsize=maxsize, ttl=24 * 3600, clock=clock)
+
+    async def take(self, key: str, burst: float, rate: float):
+        now = self.clock()
+        tokens, updated = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets.set(key, (tokens, now), ttl=(burst - tokens) / rate)
+        return allowed, 0.0 if allowed else _wait_for_token(tokens, rate)
+
+
+class DatabaseBackend(RateLimitBackend):
+    name = "database"
+    PURGE_EVERY = 1000  # takes between deletions of buckets that have refilled
+
+    def __init__(self, clock=time.time):
+        self.clock = clock  # wall clock: shared with other processes through updated_at
+        self._takes = 0
+
+    async def take(self, key: str, burst: float, rate: float):
+        Bucket = models.RateLimitBucket
+        now = self.clock()
+        level = Bucket.tokens + (now - Bucket.updated_at) * rate
+        refilled = case((level > burst, burst), else_=level)
+        async with database.AsyncSessionLocal() as db:
+            insert = postgres_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+            # new keys start with a full bucket; existing ones refill, then pay if they can
+            stmt = insert(Bucket).values(key=key, tokens=burst - 1, updated_at=now, allowed=True)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Bucket.key],
+                set_={
+                    "tokens": case((refilled >= 1, refilled - 1), else_=refilled),
+                    "allowed": refilled >= 1,
+                    "updated_at": now,
+                },
+            ).returning(Bucket.allowed, Bucket.tokens)
+            allowed, tokens = (await db.execute(stmt)).one()
+            self._takes += 1
+            if self._takes % self.PURGE_EVERY == 0:
+                # a bucket untouched for a day is full under any sensible rate
+                await db.execute(delete(Bucket).where(Bucket.updated_at < now - 24 * 3600))
+            await db.commit()
+        return bool(allowed), 0.0 if allowed else _wait_for_token(tokens, rate)
+
+
+BACKENDS = {"memory": MemoryBackend, "database": DatabaseBackend}
+
+def register_backend(name: str, backend_cls):
+    BACKENDS[name] = backend_cls
+
+
+# --- concurrency caps ---
+
+class ConcurrencyLimit:
+    """At most `limit` requests in flight; up to `max_queue` more wait up to `timeout` seconds."""
+
+    def __init__(self, limit: int, max_queue: int = CONCURRENCY_MAX_QUEUE,
+                 timeout: float = CONCURRENCY_QUEUE_TIMEOUT):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self.queued = 0
+        self._semaphore = None  # (loop, Semaphore)
+
+    def _get_semaphore(self):
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore[0] is not loop:
+            # asyncio primitives are bound to one loop
+            self._semaphore = (loop, asyncio.Semaphore(self.limit))
+        return self._semaphore[1]
+
+    async def acquire(self, route_class: str):
+        """Take a slot; returns False when the request should be shed."""
+        semaphore = self._get_semaphore()
+        if not semaphore.locked():
+            await semaphore.acquire()
+        elif self.queued >= self.max_queue:
+            return False
+        else:
+            self.queued += 1
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.queued -= 1
+                admission_wait.observe(time.perf_counter() - start, route_class)
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._get_semaphore().release()
+
+
+class RouteClass:
+    def __init__(self, name: str, rate: str, concurrency: int):
+        self.name = name
+        self.burst, self.rate = parse_rate(rate)
+        self.concurrency = ConcurrencyLimit(concurrency)
+
+
+ROUTE_CLASSES = {
+    route_class.name: route_class for route_class in (
+        RouteClass("auth", settings.rate_limit_auth, settings.concurrency_auth),
+        RouteClass("resume", settings.rate_limit_resume, settings.concurrency_resume),
+        RouteClass("answer", settings.rate_limit_answer, settings.concurrency_answer),
+        RouteClass("import", settings.rate_limit_import, settings.concurrency_import),
+    )
+}
+
+_backend = None
+
+def get_backend() -> RateLimitBackend:
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[RATE_LIMIT_BACKEND]()
+    return _backend
+
+
+@asynccontextmanager
+async def admit(route_class_name: str, key: str):
+    """Rate limit `key` within the route class, then hold a concurrency slot for the block."""
+    if not RATE_LIMIT_ENABLED:
+        yield
+        return
+    route_class = ROUTE_CLASSES[route_class_name]
+    try:
+        allowed, retry_after = await get_backend().take(f"{route_class.name}:{key}", route_class.burst,
+                                                        route_class.rate)
+    except Exception as exc:
+        # a broken shared store must not take the endpoints down with it
+        logger.warning("Rate limit backend %s failed, allowing request: %r", get_backend().name, exc)
+        allowed, retry_after = True, 0.0
+    if not allowed:
+        admission_rejected.inc(route_class.name, "rate")
+        raise HTTPException(status_code=429, detail="Too many requests, please slow down",
+                            headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+    if not await route_class.concurrency.acquire(route_class.name):
+        admission_rejected.inc(route_class.name, "concurrency")
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+    try:
+        yield
+    finally:
+        route_class.concurrency.release()
+
+
+def admission(route_class_name: str, identity=None):
+    """Route dependency: admit per candidate (`identity` resolves the Principal) or per client IP."""
+    if identity is None:
+        async def by_client(request: Request):
+            async with admit(route_class_name, f"ip:{request.client.host if request.client else 'unknown'}"):
+                yield
+        return by_client
+
+    async def by_candidate(principal=Depends(identity)):
+        async with admit(route_class_name, f"candidate:{principal.id}"):
+            yield
+    return by_candidate
+
+
+def stats():
+    values = {}
+    for name, route_class in ROUTE_CLASSES.items():
+        values[f"{name}_in_flight"] = route_class.concurrency.in_flight
+        values[f"{name}_queued"] = route_class.concurrency.queued
+        values[f"{name}_limit"] = route_class.concurrency.limit
+    return values
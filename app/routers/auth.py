@@ -1,25 +1,52 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
-from app import schemas, crud, database, auth
+from app import schemas, crud, database, auth, ratelimit
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
-@router.post("/signup", response_model=schemas.CandidateResponse)
-def signup(candidate: schemas.CandidateCreate, db: Session = Depends(database.get_db)):
-    existing = crud.get_candidate_by_email(db, candidate.email)
+def password_pool_busy():
+    # shed load fast instead of queueing behind a burst of bcrypt work
+    return HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+
+@router.post("/signup", response_model=schemas.CandidateResponse, dependencies=[Depends(ratelimit.admission("auth"))])
+async def signup(candidate: schemas.CandidateCreate, db: AsyncSession = Depends(database.get_async_db)):
+    existing = await crud.get_candidate_by_email(db, candidate.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
-    new_candidate = crud.create_candidate(db, candidate)
+    try:
+        new_candidate = await crud.create_candidate(db, candidate)
+    except auth.PasswordPoolBusy:
+        raise password_pool_busy()
     return new_candidate
 
-@router.post("/login")
-def login(candidate: schemas.CandidateLogin, db: Session = Depends(database.get_db)):
-    db_candidate = crud.get_candidate_by_email(db, candidate.email)
-    if not db_candidate or not auth.verify_password(candidate.password, db_candidate.hashed_password):
+@router.post("/login", dependencies=[Depends(ratelimit.admission("auth"))])
+async def login(candidate: schemas.CandidateLogin, db: AsyncSession = Depends(database.get_async_db)):
+    db_candidate = await crud.get_candidate_by_email(db, candidate.email)
+    try:
+        valid = db_candidate is not None and await auth.verify_password_async(
+            candidate.password, db_candidate.hashed_password
+        )
+    except auth.PasswordPoolBusy:
+        raise password_pool_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = auth.create_access_token({"sub": db_candidate.email})
+
+    # upgrade the stored hash when BCRYPT_ROUNDS changed; retried on a later login if the pool is full
+    if auth.needs_rehash(db_candidate.hashed_password):
+        try:
+            db_candidate.hashed_password = await auth.hash_password_async(candidate.password)
+            await db.commit()
+        except auth.PasswordPoolBusy:
+            pass
+
+    # cid/role let get_current_candidate resolve the caller without a DB lookup
+    token = auth.create_access_token({
+        "sub": db_candidate.email,
+        "cid": db_candidate.id,
+        "role": db_candidate.role or "interviewee",
+    })
     return {
         "access_token": token, 
         "token_type": "bearer",
@@ -1,50 +1,188 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from sqlalchemy.orm import Session
-from app import database, models, schemas
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import auth, crud, database, models, ratelimit, schemas, search
+from app.config import settings
+from app.utils import resume_parser
+from app.utils.cache import TTLCache
+from app.utils.question_bank import forget_resume_topics
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
-import PyPDF2, docx
+from jose import JWTError, jwt
+from datetime import datetime, timezone
+import asyncio
+import contextlib
+import logging
 import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
+import time
 router = APIRouter()
+logger = logging.getLogger(__name__)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
-SECRET_KEY = os.getenv("SECRET_KEY", "YOUR_SECRET_KEY")
+SECRET_KEY = settings.secret_key
+
+# Resolved principals keyed by token subject (email). The token's signature and expiry are
+# checked on every request before the lookup; an entry lives no longer than the token
+# that filled it.
+principal_cache = TTLCache(
+    maxsize=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl,
+)
 
-def get_current_candidate(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+def invalidate_principal(email: str):
+    """Drop cached identities for `email`; call after the candidate's profile or resume changes."""
+    principal_cache.pop(email)
+
+async def get_current_candidate(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_async_db)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        email = payload.get("sub")
-        candidate = db.query(models.Candidate).filter(models.Candidate.email == email).first()
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    email = payload.get("sub")
+    if not email:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
+
+    if "cid" in payload and "role" in payload:
+        # tokens issued by /login carry the id and role, so no lookup is needed
+        principal = auth.Principal(id=payload["cid"], email=email, role=payload["role"])
+    else:
+        candidate = await crud.get_candidate_by_email(db, email)
         if not candidate:
             raise HTTPException(status_code=401, detail="Candidate not found")
-        return candidate
-    except:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        principal = auth.Principal(id=candidate.id, email=candidate.email, role=candidate.role or "interviewee")
+
+    exp = payload.get("exp")
+    principal_cache.set(email, principal, ttl=(exp - time.time()) if exp else None)
+    return principal
+
+async def get_current_interviewer(principal: auth.Principal = Depends(get_current_candidate)):
+    # for interviewer-only routes
+    if principal.role != "interviewer":
+        raise HTTPException(status_code=403, detail="Interviewer access required")
+    return principal
+
+async def get_current_candidate_row(principal: auth.Principal = Depends(get_current_candidate),
+                                    db: AsyncSession = Depends(database.get_async_db)):
+    # for routes that read or modify the full candidate row
+    candidate = await crud.get_candidate_with_resume(db, principal.id)
+    if not candidate:
+        raise HTTPException(status_code=401, detail="Candidate not found")
+    return candidate
+
+async def run_resume_parse(parse_id: int, path: str, kind: str):
+    """Background job: extract the spooled resume and store the text on the candidate."""
+    try:
+        async with database.AsyncSessionLocal() as db:
+            parse = await db.get(models.ResumeParse, parse_id)
+            parse.status = "processing"
+            await db.commit()  # releases the connection while the pool works
+            try:
+                text, page_count = await resume_parser.extract_text(path, kind)
+            except resume_parser.ResumeParseError as exc:
+                parse.status = "failed"
+                parse.error = str(exc)
+            else:
+                parse.status = "done"
+                parse.text = text
+                parse.page_count = page_count
+                candidate = await db.get(models.Candidate, parse.candidate_id)
+                candidate.resume_text = text
+                await search.index_resume(db, candidate.id, text)
+                invalidate_principal(candidate.email)
+                forget_resume_topics(candidate.id)
+            parse.finished_at = datetime.now(timezone.utc)
+            await db.commit()
+    except BaseException as exc:
+        # cancelled (shutdown) or an unexpected error: the row must not stay "processing"
+        if isinstance(exc, asyncio.CancelledError):
+            error = "Resume processing was interrupted"
+        else:
+            logger.exception("Resume parse %d failed", parse_id)
+            error = "Could not process resume"
+        await asyncio.shield(mark_parse_failed(parse_id, error))
+        raise
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+async def mark_parse_failed(parse_id: int, error: str):
+    async with database.AsyncSessionLocal() as db:
+        await db.execute(
+            update(models.ResumeParse)
+            .where(models.ResumeParse.id == parse_id, models.ResumeParse.status.in_(("pending", "processing")))
+            .values(status="failed", error=error, finished_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+
+def resume_parse_response(parse: models.ResumeParse):
+    return schemas.ResumeParseResponse(
+        parse_id=parse.id, status=parse.status, error=parse.error, page_count=parse.page_count
+    )
 
 @router.get("/profile", response_model=schemas.CandidateResponse)
-def get_profile(candidate: models.Candidate = Depends(get_current_candidate)):
+async def get_profile(candidate: models.Candidate = Depends(get_current_candidate_row)):
     return candidate
 
-@router.post("/upload_resume", response_model=schemas.CandidateResponse)
-def upload_resume(file: UploadFile = File(...), db: Session = Depends(database.get_db),
-                  candidate: models.Candidate = Depends(get_current_candidate)):
-    text = ""
-    if file.filename.endswith(".pdf"):
-        pdf = PyPDF2.PdfReader(file.file)
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    elif file.filename.endswith(".docx"):
-        doc = docx.Document(file.file)
-        for para in doc.paragraphs:
-            text += para.text + "\n"
+# the body is streamed by resume_parser.spool_request (no File() parameter), so describe it here
+_UPLOAD_BODY = {
+    "required": True,
+    "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"file": {"type": "string", "format": "binary"}},
+        "required": ["file"],
+    }}},
+}
+
+@router.post("/upload_resume", response_model=schemas.ResumeParseResponse, status_code=202,
+             dependencies=[Depends(ratelimit.admission("resume", get_current_candidate))],
+             openapi_extra={"requestBody": _UPLOAD_BODY})
+async def upload_resume(request: Request, background_tasks: BackgroundTasks, response: Response,
+                        db: AsyncSession = Depends(database.get_async_db),
+                        candidate: auth.Principal = Depends(get_current_candidate)):
+    # auth and admission run before any of the body is read; oversized uploads stop at the limit
+    try:
+        filename, path, content_hash = await resume_parser.spool_request(request)
+    except resume_parser.ResumeTooLarge:
+        raise HTTPException(status_code=413, detail="Resume file too large")
+    except resume_parser.InvalidUpload as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    kind = resume_parser.resume_kind(filename)
+
+    parse = models.ResumeParse(candidate_id=candidate.id, filename=filename, content_hash=content_hash)
+    result = await db.execute(
+        select(models.ResumeParse)
+        .where(models.ResumeParse.content_hash == content_hash, models.ResumeParse.status == "done")
+        .order_by(models.ResumeParse.id.desc())
+        .limit(1)
+    )
+    cached = result.scalars().first()
+    if cached:
+        # same bytes were parsed before: reuse the text, no job needed
+        os.unlink(path)
+        parse.status = "done"
+        parse.page_count = cached.page_count
+        parse.finished_at = datetime.now(timezone.utc)
+        row = await db.get(models.Candidate, candidate.id)
+        row.resume_text = cached.text
+        await search.index_resume(db, candidate.id, cached.text)
+        db.add(parse)
+        await db.commit()
+        invalidate_principal(candidate.email)
+        forget_resume_topics(candidate.id)
+        response.status_code = 200
     else:
-        raise HTTPException(status_code=400, detail="Invalid file type")
+        parse.status = "pending"
+        db.add(parse)
+        await db.commit()
+        background_tasks.add_task(run_resume_parse, parse.id, path, kind)
+    return resume_parse_response(parse)
 
-    candidate.resume_text = text
-    db.commit()
-    db.refresh(candidate)
-    return candidate
+@router.get("/resume_status/{parse_id}", response_model=schemas.ResumeParseResponse)
+async def get_resume_status(parse_id: int, db: AsyncSession = Depends(database.get_async_db),
+                            candidate: auth.Principal = Depends(get_current_candidate)):
+    parse = await db.get(models.ResumeParse, parse_id)
+    if not parse or parse.candidate_id != candidate.id:
+        raise HTTPException(status_code=404, detail="Resume upload not found")
+    return resume_parse_response(parse)
@@ -1,26 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy.orm.attributes import flag_modified
-from app import models, schemas, database
-from app.utils.ai_utils import generate_question, evaluate_answer
+import asyncio
+import time
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
+from jose import jwt
+from app import auth, crud, models, schemas, database, idempotency, interview_events, interview_sessions, leaderboard, ratelimit, scoring_queue, search
+from app.utils.question_bank import get_resume_topics
+from app.utils import metrics
+from app.utils.http_utils import etag_matches, make_etag, trusted_response
+from app.utils.ai_utils import summarize_interview
+from app.utils.evaluator import EvaluationUnavailable, get_evaluator
 from app.routers.candidate import get_current_candidate  # import auth dependency
 
 router = APIRouter()
-TOTAL_QUESTIONS = 6
+TOTAL_QUESTIONS = interview_sessions.TOTAL_QUESTIONS
+SSE_KEEPALIVE = 15  # seconds between comment frames on an idle status stream
+# (interview id, question index) pairs whose answer this process is evaluating right now
+_answering = set()
 
 @router.post("/start")
-def start_interview(
-    db: Session = Depends(database.get_db),
-    candidate: models.Candidate = Depends(get_current_candidate)  # add auth
+async def start_interview(
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database.get_async_db),
+    candidate: auth.Principal = Depends(get_current_candidate)  # add auth
 ):
+    interview_sessions.manager.ensure_not_live(candidate.id)
+    return await idempotency.run_once(
+        db, candidate.id, idempotency_key, "interview.start", None,
+        lambda: create_interview(db, candidate),
+    )
 
+async def create_interview(db: AsyncSession, candidate: auth.Principal):
+    try:
+        topics = await get_resume_topics(db, candidate.id)
+        first_q = await get_evaluator().generate_question(0, topics=topics)
+    except EvaluationUnavailable:
+        raise HTTPException(status_code=503, detail="Question generation unavailable, please retry")
     interview = models.Interview(candidate_id=candidate.id, qa_pairs=[])
-    first_q = generate_question(0)
-    interview.qa_pairs.append(first_q)
 
     db.add(interview)
-    db.commit()
-    db.refresh(interview)
+    await db.flush()  # assigns interview.id
+    db.add(models.InterviewQuestion(interview_id=interview.id, question_index=0, **first_q))
+    await interview_events.changed(db, candidate.id, interview.id, interview.version)
+    await leaderboard.record_status(db, candidate.id, "in_progress")
+    await db.commit()
 
     # return counts to help the frontend show progress
     return {
@@ -30,45 +58,25 @@ def start_interview(
         "total_questions": TOTAL_QUESTIONS,
     }
 
-@router.get("/status")
-def get_interview_status(
-    db: Session = Depends(database.get_db),
-    candidate: models.Candidate = Depends(get_current_candidate)
-):
-    interview = (
-        db.query(models.Interview)
-        .filter(models.Interview.candidate_id == candidate.id)
-        .order_by(models.Interview.id.desc())
-        .first()
-    )
-    if not interview:
-        raise HTTPException(status_code=404, detail="Interview not found")
+def status_etag(interview_id: int, version: int):
+    return make_etag("interview-status", interview_id, version)
+
+async def build_status(db: AsyncSession, interview: models.Interview):
+    questions = await crud.get_interview_questions(db, interview.id)
+    grading = await scoring_queue.grading_states(db, interview.id, questions)
+    qa_pairs = [{**q.to_qa_dict(), "grading_status": state} for q, state in zip(questions, grading)]
 
-    qa_pairs = interview.qa_pairs
-    
-    # Find all questions that have been attempted (have an 'answer' field)
-    attempted_indices = [i for i, q in enumerate(qa_pairs) if "answer" in q]
-    
-    # If we have attempted questions, current_question should be the next one
-    # If no questions attempted, start at 0
-    current_question = (max(attempted_indices) + 1) if attempted_indices else 0
-    
-    # Don't exceed the last question index
-    if current_question >= len(qa_pairs):
-        current_question = len(qa_pairs) - 1
-    
+    # current_question is the one after the last attempted question (0 if none),
+    # capped at the last question asked
+    attempted = [q.question_index for q in questions if q.answered_at is not None]
+    current_question = min(attempted[-1] + 1 if attempted else 0, len(questions) - 1)
     total_questions = TOTAL_QUESTIONS
-    
-    print(f"Status check - Attempted questions: {attempted_indices}")
-    print(f"Status check - Next question to attempt: {current_question}")
-    
-    print(f"Status check - Total questions in qa_pairs: {len(qa_pairs)}")
-    print(f"Status check - Questions attempted (including empty): {current_question}")
-    print(f"Status check - Current question index: {current_question}")
-    
-    print(f"Status check - Questions with any answer: {[i for i, q in enumerate(qa_pairs) if 'answer' in q]}")
-    print(f"Status check - Questions with non-empty answers: {[i for i, q in enumerate(qa_pairs) if q.get('answer', '').strip()]}")
-    print(f"Status check - Current question index: {current_question}")
+
+    if metrics.sampled():
+        metrics.log_sampled(
+            "interview.status", interview_id=interview.id, attempted=attempted,
+            current_question=current_question, questions=len(questions),
+        )
 
     return {
         "interview_id": interview.id,
@@ -80,53 +88,272 @@ def get_interview_status(
         "total_questions": total_questions,
     }
 
-@router.post("/answer")
-def submit_answer(
+async def wait_for_change(db: AsyncSession, candidate_id: int, known, timeout: float):
+    """Return the latest (interview id, version) once it differs from `known`, or `known` after `timeout`."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return known
+        if not interview_events.notifier.listening:
+            # other processes' changes only show up once the cached version expires
+            remaining = min(remaining, interview_events.STATUS_VERSION_TTL)
+        await interview_events.notifier.wait(candidate_id, remaining)
+        current = await interview_events.current_version(db, candidate_id)
+        if current is not None and current != known:
+            return current
+
+@router.get("/status", response_model=schemas.InterviewStatusResponse)
+async def get_interview_status(
+    wait: float = Query(0, ge=0, le=interview_events.STATUS_LONG_POLL_MAX),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database.get_async_db),
+    candidate: auth.Principal = Depends(get_current_candidate)
+):
+    # Unchanged interviews are answered from the in-memory version (304) without a query;
+    # with `wait`, a matching If-None-Match holds the request until the interview changes.
+    current = await interview_events.current_version(db, candidate.id)
+    if current is None:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    headers = {"ETag": status_etag(*current), "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        if wait:
+            current = await wait_for_change(db, candidate.id, current, wait)
+            headers["ETag"] = status_etag(*current)
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+    interview = await crud.get_latest_interview(db, candidate.id)
+    # the row read may be newer than the cached version
+    interview_events.notifier.remember(candidate.id, interview.id, interview.version)
+    headers["ETag"] = status_etag(interview.id, interview.version)
+    return trusted_response(schemas.InterviewStatusResponse, await build_status(db, interview), headers=headers)
+
+@router.get("/status/stream")
+async def stream_interview_status(
+    candidate: auth.Principal = Depends(get_current_candidate)
+):
+    """Server-Sent Events: a `status` event with the /status body whenever the interview changes."""
+    async def events():
+        known = None
+        async with database.AsyncSessionLocal() as db:
+            while True:
+                if known is None:
+                    current = await interview_events.current_version(db, candidate.id)
+                else:
+                    current = await wait_for_change(db, candidate.id, known, SSE_KEEPALIVE)
+                if current is None or current == known:
+                    yield ": keepalive\n\n"
+                    if current is None:
+                        # no interview yet; start_interview publishes the first version
+                        await interview_events.notifier.wait(candidate.id, SSE_KEEPALIVE)
+                    continue
+                # fresh session per event: the identity map would hand back stale rows
+                async with database.AsyncSessionLocal() as read_db:
+                    interview = await crud.get_latest_interview(read_db, candidate.id)
+                    payload = await build_status(read_db, interview)
+                known = (interview.id, interview.version)
+                yield f"id: {interview.id}.{interview.version}\nevent: status\ndata: {orjson.dumps(payload).decode()}\n\n"
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# WebSocket close codes (application range)
+WS_UNAUTHORIZED = 4401
+WS_SUPERSEDED = 4409
+
+@router.websocket("/ws")
+async def interview_socket(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """Live interview on one connection, state held in memory (app/interview_sessions.py).
+
+    Authenticate with ?token= or an Authorization: Bearer header, then send JSON messages:
+    {"type": "start"}, {"type": "answer", "answer": "...", "question_index": 2} (optional
+    index: the answer is refused unless that is the current question) or {"type": "state"}.
+    """
+    if token is None:
+        scheme, _, token = websocket.headers.get("authorization", "").partition(" ")
+        token = token if scheme.lower() == "bearer" else None
+    await websocket.accept()
+    try:
+        if not token:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        async with database.AsyncSessionLocal() as db:
+            candidate = await get_current_candidate(token, db)
+    except HTTPException as exc:
+        await websocket.close(code=WS_UNAUTHORIZED, reason=exc.detail)
+        return
+    expires = jwt.get_unverified_claims(token).get("exp")
+
+    session, previous = await interview_sessions.manager.open(candidate.id, websocket)
+    if previous is not None:
+        try:
+            await previous.close(code=WS_SUPERSEDED, reason="Interview opened on another connection")
+        except RuntimeError:
+            pass  # already closed
+    try:
+        await session.send({"type": "state", **session.state()})
+        while True:
+            message = await websocket.receive()
+            start = time.perf_counter()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if session.websocket is not websocket:
+                return  # superseded
+            if expires is not None and time.time() >= expires:
+                await websocket.close(code=WS_UNAUTHORIZED, reason="Token expired")
+                return
+            # JSON in text or binary frames
+            reply = await handle_session_message(session, candidate, message.get("text") or message.get("bytes"))
+            await session.send(reply)
+            interview_sessions.turn_latency.observe(time.perf_counter() - start, reply["type"])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        interview_sessions.manager.detach(session, websocket)
+
+async def handle_session_message(session: interview_sessions.InterviewSession, candidate: auth.Principal, data):
+    """The reply to one client message; errors are replies too ({"type": "error", "status", "detail"})."""
+    try:
+        try:
+            message = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Messages must be JSON objects")
+        kind = message.get("type") if isinstance(message, dict) else None
+        async with session.lock:
+            if kind == "answer":
+                answer, question_index = message.get("answer"), message.get("question_index")
+                if not isinstance(answer, str) or not isinstance(question_index, (int, type(None))):
+                    raise HTTPException(status_code=422, detail="answer must be a string, question_index an integer")
+                async with ratelimit.admit("answer", f"candidate:{candidate.id}"):
+                    return await session.answer(answer, question_index)
+            if kind == "start":
+                async with database.AsyncSessionLocal() as db:
+                    await create_interview(db, candidate)
+                await session.load()
+                return {"type": "state", **session.state()}
+            if kind == "state":
+                return {"type": "state", **session.state()}
+        raise HTTPException(status_code=400, detail="Unknown message type; expected start, answer or state")
+    except HTTPException as exc:
+        reply = {"type": "error", "status": exc.status_code, "detail": exc.detail}
+        if exc.headers and "Retry-After" in exc.headers:
+            reply["retry_after"] = int(exc.headers["Retry-After"])
+        return reply
+
+@router.post("/answer", dependencies=[Depends(ratelimit.admission("answer", get_current_candidate))])
+async def submit_answer(
     req: schemas.AnswerRequest,
-    db: Session = Depends(database.get_db),
-    candidate: models.Candidate = Depends(get_current_candidate)
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database.get_async_db),
+    candidate: auth.Principal = Depends(get_current_candidate)
 ):
-    answer = req.answer
-    # Find the latest active interview for the candidate
-    interview = (
-        db.query(models.Interview)
-        .filter(models.Interview.candidate_id == candidate.id, models.Interview.status != "completed")
-        .order_by(models.Interview.id.desc())
-        .first()
+    interview_sessions.manager.ensure_not_live(candidate.id)
+    # a retry with the same Idempotency-Key gets the first response back instead of a second evaluation
+    return await idempotency.run_once(
+        db, candidate.id, idempotency_key, "interview.answer", req.model_dump(),
+        lambda: record_answer(db, candidate, req.answer),
     )
-    if not interview:
+
+async def record_answer(db: AsyncSession, candidate: auth.Principal, answer: str):
+    # Find the latest active interview for the candidate
+    interview = await crud.get_active_interview(db, candidate.id)
+    if not interview or interview.status != "in_progress":
         raise HTTPException(status_code=404, detail="Active interview not found")
 
-    qa_pairs = interview.qa_pairs
+    questions = await crud.get_interview_questions(db, interview.id)
     # Find the first question without any answer attempt
-    current_index = next((i for i, q in enumerate(qa_pairs) if "answer" not in q), len(qa_pairs) - 1)
-    
-    print(f"Submitting answer for question {current_index}")
-    print(f"Current qa_pairs state: {qa_pairs}")
-    
-    # Record the answer attempt
-    qa_pairs[current_index]["answer"] = answer
-    if answer.strip():
-        qa_pairs[current_index]["score"] = evaluate_answer(answer, qa_pairs[current_index]["difficulty"])
-    else:
-        qa_pairs[current_index]["score"] = 0
-
-    interview.qa_pairs = list(qa_pairs)
-    flag_modified(interview, "qa_pairs")  # <-- explicitly mark as modified
+    current = next((q for q in questions if q.answered_at is None), questions[-1])
+
+    if metrics.sampled():
+        metrics.log_sampled("interview.answer", interview_id=interview.id, question_index=current.question_index)
+
+    deferred = scoring_queue.SCORING_MODE == "deferred" and bool(answer.strip())
+    topics = await get_resume_topics(db, candidate.id) if len(questions) < TOTAL_QUESTIONS else ()
+
+    # End the read transaction so the pooled connection is free while the model works;
+    # the loaded rows stay usable (expire_on_commit=False) and are written afterwards.
+    await db.commit()
+    # a second submission for this question in this process would only lose the CAS below
+    # after paying for its own evaluation; turn it away now
+    answering = (interview.id, current.question_index)
+    if answering in _answering:
+        raise HTTPException(status_code=409, detail="This question is already being answered")
+    _answering.add(answering)
+    try:
+        return await write_answer(db, candidate, interview, questions, current, answer, deferred, topics)
+    finally:
+        _answering.discard(answering)
 
+async def write_answer(db: AsyncSession, candidate: auth.Principal, interview: models.Interview,
+                       questions, current: models.InterviewQuestion, answer: str, deferred: bool, topics):
     # compute progress after recording the answer
-    questions_done = len(qa_pairs)
+    questions_done = len(questions)
     total_questions = TOTAL_QUESTIONS
+    evaluator = get_evaluator()
+    try:
+        if deferred:
+            score = None  # graded later by app.scoring_worker
+        else:
+            score = await evaluator.evaluate(answer, current.difficulty) if answer.strip() else 0
+        next_q = None
+        if len(questions) < total_questions:
+            next_q = await evaluator.generate_question(
+                len(questions),
+                exclude={q.question for q in questions},
+                topics=topics,
+            )
+    except EvaluationUnavailable:
+        raise HTTPException(status_code=503, detail="Answer evaluation unavailable, please retry")
+
+    # Record the answer attempt: a single-row compare-and-swap UPDATE on interview_questions.
+    # If another request (another process, or a retry without a key) answered this question
+    # since we read it, the version has moved on, nothing is written and the caller gets 409.
+    values = {"answer": answer, "score": score, "answered_at": datetime.now(timezone.utc)}
+    cas = await db.execute(
+        update(models.InterviewQuestion)
+        .where(
+            models.InterviewQuestion.interview_id == interview.id,
+            models.InterviewQuestion.question_index == current.question_index,
+            models.InterviewQuestion.version == current.version,
+        )
+        .values(**values, version=models.InterviewQuestion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if cas.rowcount != 1:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="This question was already answered; reload the interview status")
+    for name, value in {**values, "version": current.version + 1}.items():
+        set_committed_value(current, name, value)
+    if deferred:
+        scoring_queue.enqueue(db, interview.id, current.question_index)
+    await search.index_answer(db, candidate.id, answer)
+    await interview_events.bump(db, interview.id)
 
     # Finalize if 6 questions are present
-    if len(qa_pairs) == 6:
-        if all(q.get("answer") for q in qa_pairs):
+    if len(questions) == 6:
+        qa_pairs = [q.to_qa_dict() for q in questions]
+        if all(q.answer for q in questions) and any(q.score is None for q in questions):
+            # some scores are still queued; the worker completes the interview
+            interview.status = "grading"
+            await leaderboard.record_status(db, candidate.id, "grading")
+            await db.commit()
+            await scoring_queue.finalize_if_graded(db, interview.id)
+            return {
+                "message": "Interview submitted for grading",
+                "questions_done": questions_done,
+                "total_questions": total_questions,
+                "qa_pairs": qa_pairs,
+            }
+        if all(q.answer for q in questions):
             interview.status = "completed"
-            interview.score = sum(q["score"] for q in qa_pairs)
-            interview.summary = f"Candidate performed well with total score {interview.score}."
-            flag_modified(interview, "qa_pairs")  # mark again if changed
-            db.commit()
-            db.refresh(interview)
+            interview.completed_at = datetime.now(timezone.utc)
+            interview.score = sum(q.score for q in questions)
+            interview.summary = summarize_interview(interview.score)
+            await leaderboard.record_completion(db, candidate.id, interview.id, interview.score)
+            await db.commit()
             return {
                 "message": "Interview completed",
                 "score": interview.score,
@@ -136,9 +363,7 @@ def submit_answer(
                 "qa_pairs": qa_pairs,
             }
         else:
-            flag_modified(interview, "qa_pairs")
-            db.commit()
-            db.refresh(interview)
+            await db.commit()
             return {
                 "message": "Interview completed",
                 "questions_done": questions_done,
@@ -146,22 +371,19 @@ def submit_answer(
                 "qa_pairs": qa_pairs,
             }
 
-    # Generate next question if needed
-    if len(qa_pairs) < total_questions:
-        next_q = generate_question(len(qa_pairs))
-        qa_pairs.append(next_q)
-        interview.qa_pairs = list(qa_pairs)
-        flag_modified(interview, "qa_pairs")
-        db.commit()
-        db.refresh(interview)
+    # Generate next question if needed: a single INSERT
+    if next_q is not None:
+        db.add(models.InterviewQuestion(interview_id=interview.id, question_index=len(questions), **next_q))
+        await db.commit()
         return {
             "next_question": next_q,
-            "questions_done": len(qa_pairs) - 1,  # -1 because we just added a new question
+            "questions_done": len(questions),
             "total_questions": total_questions,
         }
 
     # If we have all questions but not all answered
-    answered_count = len([q for q in qa_pairs if q.get("answer", "").strip()])
+    await db.commit()
+    answered_count = len([q for q in questions if (q.answer or "").strip()])
     return {
         "message": "Continue answering",
         "questions_done": answered_count,
@@ -1,94 +1,248 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app import database, models
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+import time
+from typing import List, Optional
+from app import analytics, bulk, crud, database, leaderboard, ratelimit, schemas, search, transcripts
+from app.routers.candidate import get_current_interviewer
+from app.utils.http_utils import compressible_response, etag_matches, make_etag, parse_range, trusted_response
 
 router = APIRouter()
+REVIEW_BATCH_MAX = 100  # candidates per /candidates/review request
 
 
-def get_db():
-    return database.get_db()
-
-
-@router.get("/candidates")
-def list_candidates(db: Session = Depends(database.get_db)):
-    candidates = db.query(models.Candidate).all()
-    out = []
-    for c in candidates:
-        # find best or latest interview score
-        score = 0
-        if c.interviews:
-            # pick latest interview with a score
-            interviews_with_score = [iv for iv in c.interviews if iv.score is not None]
-            if interviews_with_score:
-                # use latest by id
-                interviews_with_score.sort(key=lambda x: x.id, reverse=True)
-                score = interviews_with_score[0].score or 0
-        out.append({
-            "id": c.id,
-            "name": c.name,
-            "email": c.email,
-            "score": score,
-        })
-    # sort by score desc
-    out.sort(key=lambda x: x["score"] or 0, reverse=True)
-    return out
+@router.get("/candidates", response_model=List[schemas.CandidateScoreItem])
+async def list_candidates(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    status: Optional[str] = None,
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    # cursor is "<score>:<id>" of the last row of the previous page
+    after = None
+    if cursor:
+        try:
+            after_score, after_id = cursor.split(":")
+            after = (int(after_score), int(after_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = await crud.list_candidate_scores(
+        db, limit, after=after, min_score=min_score, max_score=max_score, status=status
+    )
+    out = [
+        {"id": row.id, "name": row.name, "email": row.email, "score": row.score}
+        for row in rows
+    ]
+    # a full page means there may be more; hand out the keyset for the next one
+    headers = {}
+    if len(out) == limit:
+        headers["X-Next-Cursor"] = f"{out[-1]['score']}:{out[-1]['id']}"
+    return trusted_response(List[schemas.CandidateScoreItem], out, headers=headers)
+
+
+@router.get("/candidates/review", response_model=schemas.CandidateReviewBatch)
+async def review_candidates(
+    ids: List[int] = Query(..., max_length=REVIEW_BATCH_MAX),
+    accept_encoding: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """Profile, summary and chat of each candidate in `ids` (repeat the parameter), in that order."""
+    candidates, not_found = await transcripts.reviews(db, ids)
+    return compressible_response(
+        schemas.CandidateReviewBatch, {"candidates": candidates, "not_found": not_found}, accept_encoding
+    )
+
+
+@router.post("/candidates/import", dependencies=[Depends(ratelimit.admission("import", get_current_interviewer))])
+async def import_candidates(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """Create interviewee accounts from a CSV (name,email,phone,password) or NDJSON body."""
+    fmt = fmt or bulk.format_for(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson (or ?format=)")
+    try:
+        return await bulk.import_candidates(db, request.stream(), fmt)
+    except bulk.BulkFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/export/{table}", dependencies=[Depends(get_current_interviewer)])
+async def export(table: str, fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$")):
+    """Stream every candidate (with leaderboard figures) or every interview as CSV/NDJSON."""
+    exports = {"candidates": bulk.candidates_export, "interviews": bulk.interviews_export}
+    if table not in exports:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    return StreamingResponse(
+        bulk.stream_export(exports[table](), fmt),
+        media_type=bulk.FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{fmt}"'},
+    )
+
+
+@router.get("/leaderboard")
+async def get_leaderboard(
+    top: int = Query(10, ge=1, le=100),
+    status: Optional[str] = None,
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    rows = await leaderboard.top(db, top, status=status)
+    return [
+        {
+            "rank": rank,
+            "id": row.id,
+            "name": row.name,
+            "email": row.email,
+            "score": row.score,
+            "best_score": row.best_score,
+            "interview_count": row.interview_count,
+            "latest_status": row.latest_status,
+            "last_activity_at": row.last_activity_at,
+        }
+        for rank, row in enumerate(rows, 1)
+    ]
+
+
+@router.get("/leaderboard/percentiles")
+async def get_score_percentiles(
+    p: List[float] = Query([50, 75, 90, 99]),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    if any(not 0 < value <= 100 for value in p):
+        raise HTTPException(status_code=400, detail="Percentiles must be in (0, 100]")
+    total, scores = await leaderboard.score_percentiles(db, p)
+    return {"candidates": total, "scores": {f"p{value:g}": score for value, score in scores.items()}}
+
+
+@router.get("/analytics")
+async def get_analytics(
+    questions: int = Query(50, ge=0, le=1000),
+    refresh: bool = False,
+):
+    """Score distribution, per-difficulty averages and per-question pass rates (cached)."""
+    result = await analytics.get_analytics(refresh=refresh)
+    return {
+        **result,
+        "question_count": len(result["questions"]),
+        "questions": result["questions"][:questions],
+    }
+
+
+@router.get("/search")
+async def search_candidates(
+    q: str = Query(..., max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """Full-text search over resumes and interview answers, best match first."""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Empty search query")
+    start = time.perf_counter()
+    rows = await search.search(db, q, limit, offset)
+    took_ms = round((time.perf_counter() - start) * 1000, 2)
+    return {
+        "query": q,
+        "hits": [
+            {"id": row.id, "name": row.name, "email": row.email, "rank": row.rank,
+             "snippet": search.highlight(row.snippet)}
+            for row in rows
+        ],
+        # a full page means there may be more
+        "next_offset": offset + limit if len(rows) == limit else None,
+        "took_ms": took_ms,
+    }
 
 
 @router.get("/candidate/{candidate_id}")
-def get_candidate(candidate_id: int, db: Session = Depends(database.get_db)):
-    c = db.query(models.Candidate).filter(models.Candidate.id == candidate_id).first()
+async def get_candidate(
+    candidate_id: int,
+    # resume_text stays inlined for existing clients; resume_text=false skips loading it
+    # (the text is then fetched from resume_url when needed)
+    resume_text: bool = True,
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    c = await crud.get_candidate_overview(db, candidate_id, with_resume=resume_text)
     if not c:
         raise HTTPException(status_code=404, detail="Candidate not found")
-    score = 0
-    latest_summary = None
-    if c.interviews:
-        interviews_with_score = [iv for iv in c.interviews if iv.score is not None]
-        if interviews_with_score:
-            interviews_with_score.sort(key=lambda x: x.id, reverse=True)
-            score = interviews_with_score[0].score or 0
-            latest_summary = interviews_with_score[0].summary
 
-    return {
+    result = {
         "id": c.id,
         "name": c.name,
         "email": c.email,
         "phone": c.phone,
-        "resume_text": c.resume_text,
-        "score": score,
-        "latest_summary": latest_summary,
+        "resume_url": f"/api/interviewer/candidate/{c.id}/resume" if c.has_resume else None,
+        "score": c.score or 0,
+        "latest_summary": c.summary,
     }
+    if resume_text:
+        result["resume_text"] = c.resume_text
+    return result
 
 
-@router.get("/candidate/{candidate_id}/chat")
-def get_candidate_chat(candidate_id: int, db: Session = Depends(database.get_db)):
-    c = db.query(models.Candidate).filter(models.Candidate.id == candidate_id).first()
-    if not c:
+@router.get("/candidate/{candidate_id}/resume")
+async def get_candidate_resume(
+    candidate_id: int,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    found, text = await crud.get_resume_text(db, candidate_id)
+    if not found:
         raise HTTPException(status_code=404, detail="Candidate not found")
-    # pick latest interview
-    if not c.interviews:
-        return []
-    iv = sorted(c.interviews, key=lambda x: x.id, reverse=True)[0]
-    messages = []
-    for qa in iv.qa_pairs or []:
-        # question from system/ai
-        messages.append({
-            "from": "ai",
-            "message": qa.get("question"),
-        })
-        if qa.get("answer") is not None:
-            messages.append({
-                "from": "candidate",
-                "message": qa.get("answer"),
-            })
-    return messages
+    if text is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+
+    body = text.encode("utf-8")
+    headers = {"ETag": make_etag(body), "Accept-Ranges": "bytes"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        byte_range = parse_range(range_header, len(body))
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(body)}"})
+    if byte_range is None:
+        return Response(body, media_type="text/plain; charset=utf-8", headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+    return Response(body[start:end + 1], status_code=206, media_type="text/plain; charset=utf-8", headers=headers)
+
+
+@router.get("/candidate/{candidate_id}/chat", response_model=List[schemas.ChatMessage])
+async def get_candidate_chat(
+    candidate_id: int,
+    accept_encoding: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    if not await crud.candidate_exists(db, candidate_id):
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    # pick latest interview; its rendered transcript is cached per version
+    iv = await crud.get_latest_interview(db, candidate_id)
+    messages = (await transcripts.transcripts(db, {iv.id: iv.version}))[iv.id] if iv else []
+    return compressible_response(List[schemas.ChatMessage], messages, accept_encoding)
 
 
 @router.get("/candidate/{candidate_id}/summary")
-def get_candidate_summary(candidate_id: int, db: Session = Depends(database.get_db)):
-    c = db.query(models.Candidate).filter(models.Candidate.id == candidate_id).first()
-    if not c:
+async def get_candidate_summary(candidate_id: int, db: AsyncSession = Depends(database.get_async_db)):
+    if not await crud.candidate_exists(db, candidate_id):
         raise HTTPException(status_code=404, detail="Candidate not found")
-    if not c.interviews:
+    iv = await crud.get_latest_interview(db, candidate_id)
+    if not iv:
         return {"final_score": None, "summary": None}
-    iv = sorted(c.interviews, key=lambda x: x.id, reverse=True)[0]
     return {"final_score": iv.score, "summary": iv.summary}
+
+
+@router.get("/candidate/{candidate_id}/percentile")
+async def get_candidate_percentile(candidate_id: int, db: AsyncSession = Depends(database.get_async_db)):
+    result = await leaderboard.percentile_of(db, candidate_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    score, percentile = result
+    # share of candidates with a strictly lower score
+    return {"candidate_id": candidate_id, "score": score, "percentile": percentile}
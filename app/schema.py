@@ -0,0 +1,46 @@
+"""
+Schema creation and in-place upgrades.
+
+`migrate` is the deployment's migration step (`python init_db.py`). The API runs it at
+startup only when AUTO_CREATE_SCHEMA is on (the default for the SQLite fallback), so
+Postgres workers boot without reflecting the schema.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+from app import models  # noqa: F401 (registers the tables on Base.metadata)
+from app.database import Base
+from app.search import create_search_table
+
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns(connection):
+    """create_all doesn't alter existing tables; add new columns (with their server defaults)."""
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(connection.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            logger.info("Adding column %s.%s", table.name, column.name)
+            connection.execute(text(ddl))
+
+
+def migrate(connection):
+    """Create missing tables, columns and indexes (sync connection, inside a transaction)."""
+    Base.metadata.create_all(bind=connection)
+    add_missing_columns(connection)
+    # create_all skips indexes on tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+    create_search_table(connection)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Any
 
 class CandidateCreate(BaseModel):
@@ -23,12 +23,63 @@ class CandidateResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class ResumeParseResponse(BaseModel):
+    parse_id: int
+    status: str  # pending | processing | done | failed
+    error: Optional[str] = None
+    page_count: Optional[int] = None
+
 class QAItem(BaseModel):
     question: str
     answer: Optional[str] = None
     difficulty: str
     score: Optional[int] = None
 
+class QAStatusItem(QAItem):
+    # answer/score are left out until the question is attempted
+    grading_status: str  # unanswered | pending | graded | failed
+
+class InterviewStatusResponse(BaseModel):
+    interview_id: int
+    status: str
+    score: Optional[int] = None
+    summary: Optional[str] = None
+    qa_pairs: List[QAStatusItem]
+    current_question: int
+    total_questions: int
+
+class CandidateScoreItem(BaseModel):
+    id: int
+    name: Optional[str]
+    email: str
+    score: int
+
+class ChatMessage(BaseModel):
+    from_: str = Field(alias="from")  # ai | candidate
+    message: str
+
+class CandidateProfile(BaseModel):
+    id: int
+    name: Optional[str]
+    email: str
+    phone: Optional[str]
+    resume_url: Optional[str]
+    score: int  # latest scored interview, 0 if none
+    latest_summary: Optional[str]
+
+class InterviewSummary(BaseModel):
+    final_score: Optional[int] = None
+    summary: Optional[str] = None
+
+class CandidateReview(CandidateProfile):
+    """Profile, latest-interview summary and chat transcript of one candidate."""
+    summary: InterviewSummary
+    chat: List[ChatMessage]
+
+class CandidateReviewBatch(BaseModel):
+    candidates: List[CandidateReview]
+    not_found: List[int]
+
 class InterviewBase(BaseModel):
     candidate_id: int
     status: str = "in_progress"
@@ -0,0 +1,187 @@
+"""
+Durable, database-backed queue for deferred answer scoring (SCORING_MODE=deferred).
+
+submit_answer stores the answer and enqueues a ScoringJob; `python -m app.scoring_worker`
+processes claim jobs with a compare-and-swap UPDATE (works on Postgres and SQLite, any
+number of workers), score them through the evaluator and finalize the interview once
+its last score lands.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import exists, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import interview_events, leaderboard, models
+from app.config import settings
+from app.utils.ai_utils import summarize_interview
+from app.utils.evaluator import EvaluationUnavailable, get_evaluator
+
+SCORING_MODE = settings.scoring_mode  # inline | deferred
+SCORING_MAX_ATTEMPTS = settings.scoring_max_attempts
+# a job "running" longer than this is assumed to belong to a dead worker and is re-queued
+SCORING_JOB_TIMEOUT = settings.scoring_job_timeout
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def enqueue(db: AsyncSession, interview_id: int, question_index: int):
+    """Add a scoring job to the caller's transaction."""
+    db.add(models.ScoringJob(interview_id=interview_id, question_index=question_index, status="queued"))
+
+
+def _claimable(now):
+    stale = now - timedelta(seconds=SCORING_JOB_TIMEOUT)
+    return or_(
+        models.ScoringJob.status == "queued",
+        (models.ScoringJob.status == "running") & (models.ScoringJob.started_at < stale),
+    )
+
+
+async def claim_jobs(db: AsyncSession, limit: int):
+    """Claim up to `limit` jobs. Each claim is a CAS UPDATE, so concurrent workers never share a job."""
+    now = _now()
+    result = await db.execute(
+        select(models.ScoringJob.id).where(_claimable(now)).order_by(models.ScoringJob.id).limit(limit)
+    )
+    claimed = []
+    for job_id in result.scalars().all():
+        cas = await db.execute(
+            update(models.ScoringJob)
+            .where(models.ScoringJob.id == job_id, _claimable(now))
+            .values(status="running", started_at=now, attempts=models.ScoringJob.attempts + 1)
+        )
+        if cas.rowcount == 1:
+            claimed.append(job_id)
+    await db.commit()
+    if not claimed:
+        return []
+    result = await db.execute(select(models.ScoringJob).where(models.ScoringJob.id.in_(claimed)))
+    return result.scalars().all()
+
+
+async def process_job(db: AsyncSession, job: models.ScoringJob):
+    question = await db.get(models.InterviewQuestion, (job.interview_id, job.question_index))
+    if question is None:
+        # the interview was archived or deleted after the job was queued
+        job.status = "failed"
+        job.error = "Question no longer exists"
+        job.finished_at = _now()
+        await db.commit()
+        return False
+    await db.commit()  # don't hold a connection while the evaluator works
+    try:
+        score = await get_evaluator().evaluate(question.answer or "", question.difficulty)
+    except EvaluationUnavailable as exc:
+        job.error = str(exc)
+        if job.attempts < SCORING_MAX_ATTEMPTS:
+            job.status = "queued"  # back to the queue
+            await db.commit()
+            return False
+        # out of attempts: the question stays unscored (grading_status "failed") and the
+        # interview completes on the answers that were graded
+        job.status = "failed"
+        job.finished_at = _now()
+        await interview_events.bump(db, job.interview_id)
+        await db.commit()
+        await finalize_if_graded(db, job.interview_id)
+        return False
+
+    question.score = score
+    job.status = "done"
+    job.error = None
+    job.finished_at = _now()
+    await interview_events.bump(db, job.interview_id)
+    await db.commit()
+    # separate transaction, so the last of several concurrent workers sees every score
+    await finalize_if_graded(db, job.interview_id)
+    return True
+
+
+async def finalize_if_graded(db: AsyncSession, interview_id: int):
+    """Complete an interview in the "grading" state once every answered question is scored or
+    its scoring job has failed for good; the total counts the scored answers only."""
+    total = (await db.execute(
+        select(func.coalesce(func.sum(models.InterviewQuestion.score), 0))
+        .where(models.InterviewQuestion.interview_id == interview_id)
+    )).scalar()
+    failed = exists().where(
+        models.ScoringJob.interview_id == interview_id,
+        models.ScoringJob.question_index == models.InterviewQuestion.question_index,
+        models.ScoringJob.status == "failed",
+    )
+    ungraded = exists().where(
+        models.InterviewQuestion.interview_id == interview_id,
+        models.InterviewQuestion.score.is_(None),
+        ~failed,
+    )
+    finalized = (await db.execute(
+        update(models.Interview)
+        .where(models.Interview.id == interview_id, models.Interview.status == "grading", ~ungraded)
+        .values(
+            status="completed", score=total, summary=summarize_interview(total), completed_at=_now(),
+            version=models.Interview.version + 1,
+        )
+        .returning(models.Interview.candidate_id, models.Interview.version)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if finalized is not None:
+        await interview_events.changed(db, finalized.candidate_id, interview_id, finalized.version)
+        await leaderboard.record_completion(db, finalized.candidate_id, interview_id, total)
+    await db.commit()
+    return finalized is not None
+
+
+async def grading_states(db: AsyncSession, interview_id: int, questions):
+    """Per-question grading state: unanswered | pending | graded | failed (left unscored)."""
+    failed = set((await db.execute(
+        select(models.ScoringJob.question_index).where(
+            models.ScoringJob.interview_id == interview_id, models.ScoringJob.status == "failed"
+        )
+    )).scalars().all())
+    states = []
+    for q in questions:
+        if q.answered_at is None:
+            states.append("unanswered")
+        elif q.question_index in failed:
+            states.append("failed")
+        elif q.score is not None:
+            states.append("graded")
+        else:
+            states.append("pending")
+    return states
+
+
+async def queue_stats(db: AsyncSession):
+    counts = dict((await db.execute(
+        select(models.ScoringJob.status, func.count()).group_by(models.ScoringJob.status)
+    )).all())
+    oldest = (await db.execute(
+        select(func.min(models.ScoringJob.created_at)).where(models.ScoringJob.status == "queued")
+    )).scalar()
+    recent = (await db.execute(
+        select(models.ScoringJob.created_at, models.ScoringJob.finished_at)
+        .where(models.ScoringJob.status == "done")
+        .order_by(models.ScoringJob.id.desc())
+        .limit(100)
+    )).all()
+    latencies = sorted(
+        (_as_utc(finished) - _as_utc(created)).total_seconds() for created, finished in recent if finished
+    )
+    return {
+        "mode": SCORING_MODE,
+        "depth": counts.get("queued", 0),
+        "running": counts.get("running", 0),
+        "done": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+        "oldest_queued_age_seconds": (_now() - _as_utc(oldest)).total_seconds() if oldest else 0.0,
+        # enqueue -> score persisted, over the last 100 finished jobs
+        "latency_seconds_p50": latencies[len(latencies) // 2] if latencies else None,
+        "latency_seconds_max": latencies[-1] if latencies else None,
+    }
+
+
+def _as_utc(value):
+    # SQLite hands back naive datetimes; everything is stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
@@ -0,0 +1,35 @@
+"""
+Deferred scoring worker. Run one or more of these next to the API when SCORING_MODE=deferred:
+
+    python -m app.scoring_worker [--batch 16] [--poll 0.5]
+"""
+import argparse
+import asyncio
+
+from app import database, models, scoring_queue
+
+
+async def _process(job_id: int):
+    async with database.AsyncSessionLocal() as db:
+        job = await db.get(models.ScoringJob, job_id)
+        await scoring_queue.process_job(db, job)
+
+
+async def run_worker(batch: int, poll: float):
+    print(f"Scoring worker started (batch={batch}, poll={poll}s)")
+    while True:
+        async with database.AsyncSessionLocal() as db:
+            jobs = await scoring_queue.claim_jobs(db, batch)
+        if not jobs:
+            await asyncio.sleep(poll)
+            continue
+        # scored concurrently, so the evaluator can micro-batch them
+        await asyncio.gather(*(_process(job.id) for job in jobs))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process deferred answer scoring jobs")
+    parser.add_argument("--batch", type=int, default=16, help="jobs claimed per poll")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds to sleep when the queue is empty")
+    args = parser.parse_args()
+    asyncio.run(run_worker(args.batch, args.poll))
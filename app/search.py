@@ -0,0 +1,199 @@
+"""
+Full-text search over candidate resumes and interview answers.
+
+One document per candidate in `candidate_search` (resume + every answer given):
+- Postgres: a table with a generated, weighted tsvector column and a GIN index,
+  queried with websearch_to_tsquery / ts_rank_cd / ts_headline.
+- SQLite: an FTS5 virtual table (rowid = candidate id), queried with MATCH / bm25 / snippet.
+
+The document is updated in the transaction that stores a resume or an answer.
+`python rebuild_search_index.py` rebuilds it from the source tables (archived answers are
+decompressed and appended in Python).
+"""
+import html
+import re
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Snippets are cut from candidate-submitted text. The database marks matches with these
+# control characters; `highlight` escapes the text and only then turns them into tags.
+SNIPPET_START = "\x02"
+SNIPPET_STOP = "\x03"
+_HIGHLIGHT = {SNIPPET_START: "<b>", SNIPPET_STOP: "</b>"}
+_MARKERS = re.compile(f"[{SNIPPET_START}{SNIPPET_STOP}]")
+
+_POSTGRES_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS candidate_search (
+        candidate_id INTEGER PRIMARY KEY REFERENCES candidates(id),
+        resume TEXT,
+        answers TEXT,
+        document TSVECTOR GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(resume, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(answers, '')), 'B')
+        ) STORED
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_candidate_search_document ON candidate_search USING GIN (document)",
+]
+_SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS candidate_search "
+    "USING fts5(resume, answers, tokenize='porter unicode61')",
+]
+
+
+def create_search_table(connection):
+    """Create the dialect's search table if missing (sync connection; called at startup)."""
+    statements = _POSTGRES_SCHEMA if connection.dialect.name == "postgresql" else _SQLITE_SCHEMA
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def _is_postgres(db: AsyncSession):
+    return db.bind.dialect.name == "postgresql"
+
+
+# --- incremental updates (caller's transaction) ---
+
+async def index_resume(db: AsyncSession, candidate_id: int, resume_text: str):
+    if _is_postgres(db):
+        await db.execute(text(
+            "INSERT INTO candidate_search (candidate_id, resume) VALUES (:id, :resume) "
+            "ON CONFLICT (candidate_id) DO UPDATE SET resume = EXCLUDED.resume"
+        ), {"id": candidate_id, "resume": resume_text})
+        return
+    result = await db.execute(
+        text("UPDATE candidate_search SET resume = :resume WHERE rowid = :id"),
+        {"id": candidate_id, "resume": resume_text},
+    )
+    if result.rowcount == 0:
+        await db.execute(
+            text("INSERT INTO candidate_search (rowid, resume, answers) VALUES (:id, :resume, NULL)"),
+            {"id": candidate_id, "resume": resume_text},
+        )
+
+
+_APPEND_POSTGRES = text(
+    "INSERT INTO candidate_search (candidate_id, answers) VALUES (:id, :answer) "
+    "ON CONFLICT (candidate_id) DO UPDATE SET answers = "
+    "coalesce(candidate_search.answers || E'\\n', '') || EXCLUDED.answers"
+)
+_APPEND_SQLITE = text(
+    "UPDATE candidate_search SET answers = coalesce(answers || char(10), '') || :answer WHERE rowid = :id"
+)
+_INSERT_ANSWER_SQLITE = text("INSERT INTO candidate_search (rowid, resume, answers) VALUES (:id, NULL, :answer)")
+
+
+async def index_answer(db: AsyncSession, candidate_id: int, answer: str):
+    """Append one answer to the candidate's document."""
+    if not answer or not answer.strip():
+        return
+    params = {"id": candidate_id, "answer": answer}
+    if _is_postgres(db):
+        await db.execute(_APPEND_POSTGRES, params)
+        return
+    result = await db.execute(_APPEND_SQLITE, params)
+    if result.rowcount == 0:
+        await db.execute(_INSERT_ANSWER_SQLITE, params)
+
+
+def append_answers(connection, candidate_id: int, answers: str):
+    """index_answer on a sync connection, for rebuild_search_index.py."""
+    params = {"id": candidate_id, "answer": answers}
+    if connection.dialect.name == "postgresql":
+        connection.execute(_APPEND_POSTGRES, params)
+    elif connection.execute(_APPEND_SQLITE, params).rowcount == 0:
+        connection.execute(_INSERT_ANSWER_SQLITE, params)
+
+
+def rebuild_statements(dialect_name: str):
+    """Statements that refill candidate_search from candidates + interview_questions."""
+    if dialect_name == "postgresql":
+        answers = "string_agg(q.answer, E'\\n' ORDER BY q.interview_id, q.question_index)"
+        insert = "INSERT INTO candidate_search (candidate_id, resume, answers)"
+    else:
+        answers = "group_concat(q.answer, char(10))"
+        insert = "INSERT INTO candidate_search (rowid, resume, answers)"
+    return [
+        text("DELETE FROM candidate_search"),
+        text(
+            f"{insert} "
+            f"SELECT c.id, c.resume_text, a.answers FROM candidates c "
+            f"LEFT JOIN (SELECT i.candidate_id, {answers} AS answers "
+            f"           FROM interview_questions q JOIN interviews i ON i.id = q.interview_id "
+            f"           WHERE q.answer IS NOT NULL AND q.answer <> '' "
+            f"           GROUP BY i.candidate_id) a ON a.candidate_id = c.id "
+            f"WHERE c.resume_text IS NOT NULL OR a.answers IS NOT NULL"
+        ),
+    ]
+
+
+# --- queries ---
+
+_TERM = re.compile(r'"[^"]+"|\S+')
+
+def fts5_query(query: str):
+    """Turn user input into an FTS5 MATCH expression: every term (or "quoted phrase") must
+    match; a trailing * makes a prefix search. Operators in the input are not interpreted."""
+    terms = []
+    for term in _TERM.findall(query):
+        prefix = term.endswith("*")
+        term = term.strip('"*').replace('"', '""').strip()
+        if term:
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+async def search(db: AsyncSession, query: str, limit: int, offset: int = 0):
+    """Ranked hits: rows of (id, name, email, rank, snippet), best first."""
+    if _is_postgres(db):
+        stmt = text(f"""
+            WITH hits AS (
+                SELECT s.candidate_id, s.resume, s.answers, ts_rank_cd(s.document, q) AS rank, q
+                FROM candidate_search s, websearch_to_tsquery('english', :query) q
+                WHERE s.document @@ q
+                ORDER BY rank DESC, s.candidate_id
+                LIMIT :limit OFFSET :offset
+            )
+            SELECT c.id, c.name, c.email, h.rank,
+                   ts_headline('english', coalesce(h.resume, '') || ' ' || coalesce(h.answers, ''), h.q,
+                               'MaxFragments=2, MinWords=5, MaxWords=20, FragmentDelimiter=" … ", '
+                               'StartSel="{SNIPPET_START}", StopSel="{SNIPPET_STOP}"') AS snippet
+            FROM hits h JOIN candidates c ON c.id = h.candidate_id
+            ORDER BY h.rank DESC, c.id
+        """)
+        params = {"query": query, "limit": limit, "offset": offset}
+    else:
+        match = fts5_query(query)
+        if not match:
+            return []
+        # rank is bm25() (lower is better) with resume matches weighted twice as much as
+        # answers; snippets are only built for the page of hits
+        stmt = text("""
+            WITH hits AS (
+                SELECT rowid AS candidate_id, rank
+                FROM candidate_search
+                WHERE candidate_search MATCH :match AND rank MATCH 'bm25(2.0, 1.0)'
+                ORDER BY rank, rowid
+                LIMIT :limit OFFSET :offset
+            )
+            SELECT c.id, c.name, c.email, -h.rank AS rank,
+                   snippet(candidate_search, -1, :start, :stop, '…', 16) AS snippet
+            FROM hits h
+            JOIN candidate_search ON candidate_search.rowid = h.candidate_id
+            JOIN candidates c ON c.id = h.candidate_id
+            WHERE candidate_search MATCH :match
+            ORDER BY h.rank, c.id
+        """)
+        params = {"match": match, "limit": limit, "offset": offset,
+                  "start": SNIPPET_START, "stop": SNIPPET_STOP}
+    return (await db.execute(stmt, params)).all()
+
+
+def highlight(snippet):
+    """A search snippet as HTML: the text escaped, matches wrapped in <b>...</b>."""
+    if snippet is None:
+        return None
+    # markers that were in the text itself only ever become <b> or </b>
+    return _MARKERS.sub(lambda m: _HIGHLIGHT[m.group()], html.escape(snippet))
@@ -0,0 +1,91 @@
+"""
+Interview transcripts for the interviewer views, single and batched.
+
+A transcript (the chat: each question, then the answer if one was given) is rendered once
+per (interview id, version) and kept in a bounded LRU as zlib-compressed JSON, a few KB per
+interview. Every change to an interview's questions or answers bumps its version (see
+app.interview_events), so entries are never stale; superseded versions fall out of the LRU.
+
+`reviews` serves GET /api/interviewer/candidates/review: profile, latest-interview summary
+and transcript for many candidates, from one query for the candidates and their latest
+interviews plus, on a cold cache, one query for the questions of the missing transcripts.
+"""
+import zlib
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, models
+from app.config import settings
+from app.utils.cache import TTLCache
+
+TRANSCRIPT_CACHE_SIZE = settings.transcript_cache_size
+
+# (interview id, version) -> zlib-compressed JSON list of chat messages
+transcript_cache = TTLCache(maxsize=TRANSCRIPT_CACHE_SIZE, ttl=24 * 3600)
+
+
+def render(questions):
+    """Chat messages from (question, answer) rows in question order."""
+    messages = []
+    for question, answer in questions:
+        messages.append({"from": "ai", "message": question})
+        if answer is not None:
+            messages.append({"from": "candidate", "message": answer})
+    return messages
+
+
+async def transcripts(db: AsyncSession, versions):
+    """{interview id: chat messages} for {interview id: version}; cache misses cost one query."""
+    found, missing = {}, []
+    for interview_id, version in versions.items():
+        data = transcript_cache.get((interview_id, version))
+        if data is None:
+            missing.append(interview_id)
+        else:
+            found[interview_id] = orjson.loads(zlib.decompress(data))
+    if missing:
+        Question = models.InterviewQuestion
+        rows = {interview_id: [] for interview_id in missing}
+        for interview_id, question, answer in await db.execute(
+            select(Question.interview_id, Question.question, Question.answer)
+            .where(Question.interview_id.in_(missing))
+            .order_by(Question.interview_id, Question.question_index)
+        ):
+            rows[interview_id].append((question, answer))
+        for interview_id, questions in rows.items():
+            found[interview_id] = messages = render(questions)
+            transcript_cache.set((interview_id, versions[interview_id]), zlib.compress(orjson.dumps(messages)))
+    return found
+
+
+async def reviews(db: AsyncSession, candidate_ids):
+    """(reviews in the order of `candidate_ids`, ids not found); duplicates are served once."""
+    candidate_ids = list(dict.fromkeys(candidate_ids))
+    rows = {row.id: row for row in await crud.get_candidate_reviews(db, candidate_ids)}
+    chats = await transcripts(db, {
+        row.interview_id: row.version for row in rows.values() if row.interview_id is not None
+    })
+    result = []
+    for candidate_id in candidate_ids:
+        row = rows.get(candidate_id)
+        if row is None:
+            continue
+        result.append({
+            # same fields as GET /candidate/{id}, /candidate/{id}/summary and /candidate/{id}/chat
+            "id": row.id,
+            "name": row.name,
+            "email": row.email,
+            "phone": row.phone,
+            "resume_url": f"/api/interviewer/candidate/{row.id}/resume" if row.has_resume else None,
+            "score": row.score or 0,
+            "latest_summary": row.latest_summary,
+            "summary": {"final_score": row.final_score, "summary": row.summary},
+            "chat": chats.get(row.interview_id, []),
+        })
+    return result, [candidate_id for candidate_id in candidate_ids if candidate_id not in rows]
+
+
+def stats():
+    return transcript_cache.stats()
@@ -13,20 +13,37 @@ HARD_QUESTIONS = [
     "Explain the event loop in depth with Node.js."
 ]
 
-def generate_question(index: int):
+# topic tags for the built-in questions (used when no QUESTION_BANK_PATH is set)
+BUILTIN_TOPICS = {
+    "What is JSX in React?": ("react",),
+    "Explain difference between var, let, and const in JS.": ("javascript",),
+    "How does useEffect work in React?": ("react",),
+    "Explain how Node.js handles async operations.": ("node.js", "javascript"),
+    "How would you optimize performance in a React app?": ("react",),
+    "Explain the event loop in depth with Node.js.": ("node.js", "javascript"),
+}
+
+def difficulty_for(index: int):
     if index < 2:
-        difficulty = "Easy"
-        question = random.choice(EASY_QUESTIONS)
+        return "Easy"
     elif index < 4:
-        difficulty = "Medium"
-        question = random.choice(MEDIUM_QUESTIONS)
-    else:
-        difficulty = "Hard"
-        question = random.choice(HARD_QUESTIONS)
-    return {"question": question, "difficulty": difficulty}
+        return "Medium"
+    return "Hard"
+
+def generate_question(index: int, exclude=(), topics=()):
+    # exclude: questions already asked in this interview; topics: matched from the resume
+    from app.utils.question_bank import get_bank
+
+    return get_bank().sample(difficulty_for(index), exclude=exclude, topics=topics)
+
+# most points an answer can score, per difficulty
+MAX_POINTS = {"Easy": 10, "Medium": 20, "Hard": 30}
 
 def evaluate_answer(answer: str, difficulty: str):
     if not answer:
         return 0
-    base = {"Easy": 10, "Medium": 20, "Hard": 30}[difficulty]
+    base = MAX_POINTS[difficulty]
     return random.randint(base - 5, base)
+
+def summarize_interview(total_score: int):
+    return f"Candidate performed well with total score {total_score}."
@@ -0,0 +1,184 @@
+"""
+Async answer evaluation / question generation behind a pluggable backend.
+
+Concurrent `evaluate()` calls are collected into micro-batches (up to EVAL_MAX_BATCH
+items or EVAL_BATCH_WAIT_MS), each batch goes to the backend under a per-backend
+concurrency limit, with a timeout and jittered exponential-backoff retries.
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+from app.config import settings
+from app.utils import ai_utils
+from app.utils.metrics import ai_call_latency
+
+EVAL_BACKEND = settings.eval_backend
+EVAL_MAX_BATCH = settings.eval_max_batch
+EVAL_BATCH_WAIT_MS = settings.eval_batch_wait_ms
+EVAL_TIMEOUT = settings.eval_timeout
+EVAL_RETRIES = settings.eval_retries
+EVAL_RETRY_BACKOFF = settings.eval_retry_backoff
+
+logger = logging.getLogger(__name__)
+
+
+class EvaluationUnavailable(Exception):
+    """The backend failed or timed out on every attempt."""
+
+
+@dataclass
+class EvalItem:
+    answer: str
+    difficulty: str
+
+
+class EvaluationBackend:
+    """Interface for model backends. Subclasses override the two coroutines."""
+
+    name = "base"
+    max_concurrency = 4  # batches in flight against this backend
+
+    async def evaluate_batch(self, items):
+        """Return one integer score per EvalItem, in order."""
+        raise NotImplementedError
+
+    async def generate_question(self, index: int, exclude=(), topics=()):
+        """Return {"question": ..., "difficulty": ...} for question number `index`.
+
+        `exclude` holds questions already asked in this interview; `topics` are
+        resume-derived topics to prefer.
+        """
+        raise NotImplementedError
+
+
+class StubBackend(EvaluationBackend):
+    """Offline backend built on the static rules in ai_utils; EVAL_STUB_LATENCY_MS simulates a model."""
+
+    name = "stub"
+    max_concurrency = settings.eval_concurrency
+
+    def __init__(self, latency: float = None):
+        self.latency = settings.eval_stub_latency_ms / 1000 if latency is None else latency
+
+    async def evaluate_batch(self, items):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [ai_utils.evaluate_answer(item.answer, item.difficulty) for item in items]
+
+    async def generate_question(self, index: int, exclude=(), topics=()):
+        return ai_utils.generate_question(index, exclude=exclude, topics=topics)
+
+
+BACKENDS = {"stub": StubBackend}
+
+def register_backend(name: str, backend_cls):
+    BACKENDS[name] = backend_cls
+
+
+class Evaluator:
+    def __init__(self, backend: EvaluationBackend, max_batch: int = EVAL_MAX_BATCH,
+                 batch_wait: float = EVAL_BATCH_WAIT_MS / 1000, timeout: float = EVAL_TIMEOUT,
+                 retries: int = EVAL_RETRIES, backoff: float = EVAL_RETRY_BACKOFF):
+        self.backend = backend
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._pending = []  # [(EvalItem, Future)]
+        self._flush_handle = None
+        self._semaphore = None  # (loop, Semaphore)
+        self._tasks = set()  # running batches; keeps them from being garbage collected
+        self.stats = {"items": 0, "batches": 0, "retries": 0, "timeouts": 0, "failures": 0}
+
+    async def evaluate(self, answer: str, difficulty: str) -> int:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((EvalItem(answer, difficulty), future))
+        self.stats["items"] += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_wait, self._flush)
+        return await future
+
+    async def generate_question(self, index: int, exclude=(), topics=()):
+        return await self._call(self.backend.generate_question, index, exclude, topics)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch):
+        self.stats["batches"] += 1
+        error = None
+        try:
+            scores = await self._call(self.backend.evaluate_batch, [item for item, _ in batch])
+            if scores is None or len(scores) != len(batch):
+                self.stats["failures"] += 1
+                error = EvaluationUnavailable(
+                    f"{self.backend.name} backend returned {0 if scores is None else len(scores)} "
+                    f"scores for {len(batch)} answers"
+                )
+            else:
+                for (_, future), score in zip(batch, scores):
+                    if not future.done():
+                        future.set_result(score)
+        except EvaluationUnavailable as exc:
+            error = exc
+        except Exception as exc:
+            logger.exception("Evaluating a batch of %d answers failed", len(batch))
+            error = EvaluationUnavailable(f"{self.backend.name} batch failed: {exc!r}")
+        finally:
+            # every caller awaits its future with no timeout of its own (also on cancellation)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error or EvaluationUnavailable(f"{self.backend.name} batch failed"))
+
+    async def _call(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore[0] is not loop:
+            # asyncio primitives are bound to one loop
+            self._semaphore = (loop, asyncio.Semaphore(self.backend.max_concurrency))
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                # exponential backoff with jitter so retries from many workers don't align
+                await asyncio.sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+            async with self._semaphore[1]:
+                start = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(fn(*args), self.timeout)
+                except asyncio.TimeoutError:
+                    self.stats["timeouts"] += 1
+                    ai_call_latency.observe(time.perf_counter() - start, fn.__name__, "timeout")
+                    logger.warning("%s.%s timed out after %ss (attempt %d of %d)", self.backend.name,
+                                   fn.__name__, self.timeout, attempt + 1, self.retries + 1)
+                    continue
+                except Exception:
+                    ai_call_latency.observe(time.perf_counter() - start, fn.__name__, "error")
+                    logger.warning("%s.%s failed (attempt %d of %d)", self.backend.name, fn.__name__,
+                                   attempt + 1, self.retries + 1, exc_info=True)
+                    continue
+                ai_call_latency.observe(time.perf_counter() - start, fn.__name__, "ok")
+                return result
+        self.stats["failures"] += 1
+        raise EvaluationUnavailable(f"{self.backend.name} backend failed after {self.retries + 1} attempts")
+
+
+_evaluator = None
+
+def get_evaluator() -> Evaluator:
+    global _evaluator
+    if _evaluator is None:
+        _evaluator = Evaluator(BACKENDS[EVAL_BACKEND]())
+    return _evaluator
@@ -0,0 +1,109 @@
+import functools
+import gzip
+import hashlib
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.config import settings
+
+# check trusted payloads against their response model anyway (development, tests)
+VALIDATE_RESPONSES = settings.validate_responses
+GZIP_MIN_BYTES = settings.gzip_min_bytes
+GZIP_LEVEL = 5  # most of level 9's ratio on JSON text at a fraction of the CPU
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag over the given parts (str/bytes/ints)."""
+    digest = hashlib.sha1()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode("utf-8")
+        digest.update(part)
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as If-None-Match requires
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def parse_range(header: str, size: int):
+    """Parse a single-range `bytes=` header into an inclusive (start, end).
+
+    Returns None when the header is absent or not a byte range we support (serve the
+    whole body), and raises ValueError when the range cannot be satisfied (416).
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_s, sep, end_s = header[len("bytes="):].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        suffix = int(end_s) if start_s == "" else None
+        start = None if start_s == "" else int(start_s)
+        end = int(end_s) if end_s and start is not None else size - 1
+    except ValueError:
+        return None
+    if suffix is not None:
+        # suffix range: last N bytes; nothing to send from an empty body
+        if suffix <= 0 or size == 0:
+            raise ValueError("range not satisfiable")
+        return max(size - suffix, 0), size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, min(end, size - 1)
+
+
+@functools.lru_cache(maxsize=None)
+def _adapter(model):
+    return TypeAdapter(model)
+
+
+def trusted_response(model, content, status_code: int = 200, headers=None):
+    """Encode `content` with orjson as is.
+
+    For payloads a route builds itself from DB rows: returning them would have FastAPI
+    validate them against `response_model` again and walk them with jsonable_encoder.
+    `model` is the route's response_model; VALIDATE_RESPONSES=1 checks content against it.
+    """
+    if VALIDATE_RESPONSES:
+        _adapter(model).validate_python(content)
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (by name, else through `*`; q=0 refuses)."""
+    q_values = {}
+    for item in (accept_encoding or "").split(","):
+        coding, *params = item.split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        q_values.setdefault(coding.strip().lower(), q)
+    return q_values.get("gzip", q_values.get("*", 0.0)) > 0
+
+
+def compressible_response(model, content, accept_encoding: str = None, headers=None):
+    """trusted_response, gzip-encoded when the client accepts it and the body is large enough."""
+    if VALIDATE_RESPONSES:
+        _adapter(model).validate_python(content)
+    body = orjson.dumps(content)
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    if len(body) >= GZIP_MIN_BYTES and accepts_gzip(accept_encoding):
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,229 @@
+"""
+In-process metrics with Prometheus text exposition (GET /metrics).
+
+- MetricsMiddleware records per-route latency and, through SQLAlchemy cursor events,
+  the number of queries and DB time spent by each request.
+- The evaluator records backend call timings.
+- Existing stats dicts (pool, caches, ...) are exported through register_collector().
+
+Debug logging is sampled: `sampled()` is true for DEBUG_LOG_SAMPLE_RATE of requests (and
+only when the "app.requests" logger is at DEBUG), so hot endpoints build log fields only then.
+"""
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+
+from sqlalchemy import event
+
+from app.config import settings
+
+DEBUG_LOG_SAMPLE_RATE = settings.debug_log_sample_rate
+PREFIX = "swipe_"
+
+logger = logging.getLogger("app.requests")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in items:
+            yield f"{self.name}{_labels(self.labels, label_values)} {_num(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = PREFIX + name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._values = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = _labels(self.labels + ("le",), label_values + (_num(bound),))
+                yield f"{self.name}_bucket{le} {cumulative}"
+            labels = _labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_num(series[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+def _num(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+_REGISTRY = []
+_COLLECTORS = []  # (name, fn returning a flat dict)
+
+
+def register_collector(name: str, fn):
+    """Export the numeric values of `fn()` as gauges named swipe_<name>_<key>."""
+    _COLLECTORS.append((name, fn))
+
+
+def render() -> str:
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    for name, fn in _COLLECTORS:
+        for key, value in fn().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            metric = f"{PREFIX}{name}_{key}".replace("-", "_")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {_num(value)}")
+    return "\n".join(lines) + "\n"
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route", "status")
+)
+request_db_queries = Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ("route",), buckets=COUNT_BUCKETS
+)
+request_db_seconds = Histogram("http_request_db_seconds", "Time spent in SQL per request", ("route",))
+db_queries = Counter("db_queries_total", "SQL statements executed", ("engine",))
+ai_call_latency = Histogram("ai_call_duration_seconds", "Evaluator backend calls", ("operation", "outcome"))
+
+
+# --- per-request DB accounting ---
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "sampled")
+
+    def __init__(self, sampled: bool):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.sampled = sampled
+
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+def sampled() -> bool:
+    """True when the current request was picked for debug logging."""
+    stats = _current.get()
+    return stats is not None and stats.sampled
+
+
+def log_sampled(event_name: str, **fields):
+    logger.debug(json.dumps({"event": event_name, **fields}, default=str))
+
+
+def instrument_engine(sync_engine, name: str):
+    """Count statements and time spent in them; async engines pass `.sync_engine`."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        db_queries.inc(name)
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        # after_cursor_execute doesn't fire for a failed statement
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
+
+
+class MetricsMiddleware:
+    """ASGI middleware: latency per route template plus per-request DB counts."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        debug = logger.isEnabledFor(logging.DEBUG) and random.random() < DEBUG_LOG_SAMPLE_RATE
+        stats = RequestStats(debug)
+        token = _current.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            # route template, not the raw path, to keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            request_latency.observe(elapsed, scope["method"], route, status)
+            request_db_queries.observe(stats.queries, route)
+            request_db_seconds.observe(stats.db_seconds, route)
+            if debug:
+                log_sampled(
+                    "request", method=scope["method"], route=route, status=status,
+                    duration_ms=round(elapsed * 1000, 2), db_queries=stats.queries,
+                    db_ms=round(stats.db_seconds * 1000, 2),
+                )
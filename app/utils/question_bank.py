@@ -0,0 +1,206 @@
+"""
+In-memory question bank index.
+
+Questions are loaded once into flat arrays, bucketed by difficulty and by
+(difficulty, topic). Sampling is a random probe into a bucket, so its cost does not
+depend on the size of the bank.
+
+QUESTION_BANK_PATH selects the source: a .jsonl, .json or .csv file with
+question/difficulty/topics fields, "table" for the question_bank table, or unset for
+the built-in lists in ai_utils.
+"""
+import asyncio
+import csv
+import json
+import random
+import re
+from array import array
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+QUESTION_BANK_PATH = settings.question_bank_path
+# chance of drawing from a resume-matched topic bucket when one is available
+TOPIC_BIAS = settings.question_topic_bias
+MAX_RESUME_TOPICS = 5
+_PROBES = 8
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+
+class QuestionBank:
+    def __init__(self):
+        self._texts = []  # question id -> text
+        self._ids_by_text = {}
+        self._topic_ids = {}  # topic name -> small int
+        self._by_difficulty = {d: array("I") for d in range(len(DIFFICULTIES))}
+        self._by_topic = {}  # (difficulty, topic id) -> array of question ids
+
+    def __len__(self):
+        return len(self._texts)
+
+    @property
+    def topics(self):
+        return self._topic_ids.keys()
+
+    def add(self, question: str, difficulty: str, topics=()):
+        if question in self._ids_by_text:
+            return
+        d = DIFFICULTIES.index(difficulty)
+        qid = len(self._texts)
+        self._texts.append(question)
+        self._ids_by_text[question] = qid
+        self._by_difficulty[d].append(qid)
+        for topic in topics:
+            topic = topic.strip().lower()
+            if not topic:
+                continue
+            tid = self._topic_ids.setdefault(topic, len(self._topic_ids))
+            self._by_topic.setdefault((d, tid), array("I")).append(qid)
+
+    def sample(self, difficulty: str, exclude=(), topics=()):
+        """Pick a question of `difficulty` not in `exclude` (question texts), preferring `topics`.
+
+        Returns {"question", "difficulty"} or None if the difficulty bucket is empty.
+        """
+        d = DIFFICULTIES.index(difficulty)
+        if not self._by_difficulty[d]:
+            return None
+        used = {self._ids_by_text[t] for t in exclude if t in self._ids_by_text}
+        buckets = []
+        topic_buckets = [self._by_topic[(d, self._topic_ids[t])] for t in topics
+                         if t in self._topic_ids and (d, self._topic_ids[t]) in self._by_topic]
+        if topic_buckets and random.random() < TOPIC_BIAS:
+            buckets.append(random.choice(topic_buckets))
+        buckets.append(self._by_difficulty[d])
+
+        for bucket in buckets:
+            # a few random probes; an interview excludes only a handful of ids
+            for _ in range(_PROBES):
+                qid = bucket[random.randrange(len(bucket))]
+                if qid not in used:
+                    return {"question": self._texts[qid], "difficulty": difficulty}
+        # tiny or nearly exhausted bucket: fall back to a scan, then allow a repeat
+        bucket = self._by_difficulty[d]
+        free = [qid for qid in bucket if qid not in used] or bucket
+        return {"question": self._texts[random.choice(free)], "difficulty": difficulty}
+
+    def missing_difficulties(self):
+        return [difficulty for d, difficulty in enumerate(DIFFICULTIES) if not self._by_difficulty[d]]
+
+    def match_topics(self, text: str, limit: int = MAX_RESUME_TOPICS):
+        """Bank topics mentioned in `text` (e.g. a resume), most frequent first."""
+        if not text:
+            return []
+        words = _WORD.findall(text.lower())
+        counts = {}
+        for i, word in enumerate(words):
+            # single words and two-word phrases ("machine learning")
+            for term in (word, f"{word} {words[i + 1]}" if i + 1 < len(words) else None):
+                if term in self._topic_ids:
+                    counts[term] = counts.get(term, 0) + 1
+        return sorted(counts, key=counts.get, reverse=True)[:limit]
+
+
+def _load_file(bank: QuestionBank, path: str):
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                bank.add(row["question"], row["difficulty"], (row.get("topics") or "").split(";"))
+        return
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            items = (json.loads(line) for line in f if line.strip())
+        else:
+            items = json.load(f)
+        for item in items:
+            topics = item.get("topics") or []
+            if isinstance(topics, str):
+                topics = topics.split(";")
+            bank.add(item["question"], item["difficulty"], topics)
+
+
+async def _load_table(bank: QuestionBank):
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.models import BankQuestion
+
+    stmt = (
+        select(BankQuestion.question, BankQuestion.difficulty, BankQuestion.topics)
+        .execution_options(yield_per=5000)
+    )
+    # the API's engine and pool; rows arrive in batches without blocking the event loop
+    async with AsyncSessionLocal() as db:
+        async for question, difficulty, topics in await db.stream(stmt):
+            bank.add(question, difficulty, (topics or "").split(";"))
+
+
+def _load_builtin(bank: QuestionBank):
+    from app.utils import ai_utils
+
+    for difficulty, questions in (("Easy", ai_utils.EASY_QUESTIONS),
+                                  ("Medium", ai_utils.MEDIUM_QUESTIONS),
+                                  ("Hard", ai_utils.HARD_QUESTIONS)):
+        for question in questions:
+            bank.add(question, difficulty, ai_utils.BUILTIN_TOPICS.get(question, ()))
+
+
+def _checked(bank: QuestionBank, source: str) -> QuestionBank:
+    # every interview asks Easy, Medium and Hard questions; fail at startup, not mid-interview
+    missing = bank.missing_difficulties()
+    if missing:
+        raise ValueError(f"Question bank {source} has no {', '.join(missing)} questions")
+    return bank
+
+
+def build_bank(path: str = None) -> QuestionBank:
+    """A bank from a file, or from the built-in lists when `path` is unset ("table": see load_bank)."""
+    bank = QuestionBank()
+    if path:
+        _load_file(bank, path)
+    else:
+        _load_builtin(bank)
+    return _checked(bank, path or "(built-in)")
+
+
+_bank = None
+
+def get_bank() -> QuestionBank:
+    global _bank
+    if _bank is None:
+        if QUESTION_BANK_PATH == "table":
+            raise RuntimeError("QUESTION_BANK_PATH=table: the bank is loaded by load_bank() at startup")
+        _bank = build_bank(QUESTION_BANK_PATH)
+    return _bank
+
+async def load_bank():
+    """Build the index eagerly (called at app startup), off the event loop."""
+    global _bank
+    if _bank is None:
+        if QUESTION_BANK_PATH == "table":
+            bank = QuestionBank()
+            await _load_table(bank)
+            _checked(bank, "table")
+        else:
+            bank = await asyncio.to_thread(build_bank, QUESTION_BANK_PATH)
+        _bank = bank
+    return _bank
+
+
+# Topics matched against each candidate's resume, so later questions don't reload resume_text
+resume_topics_cache = TTLCache(maxsize=10000, ttl=3600)
+
+async def get_resume_topics(db, candidate_id: int):
+    """Bank topics found in the candidate's resume; cached so resume_text is read once."""
+    from app import crud
+
+    topics = resume_topics_cache.get(candidate_id)
+    if topics is None:
+        _, resume_text = await crud.get_resume_text(db, candidate_id)
+        topics = get_bank().match_topics(resume_text)
+        resume_topics_cache.set(candidate_id, topics)
+    return topics
+
+def forget_resume_topics(candidate_id: int):
+    resume_topics_cache.pop(candidate_id)
@@ -0,0 +1,238 @@
+import asyncio
+import contextlib
+import functools
+import hashlib
+import multiprocessing
+import os
+import signal
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import PyPDF2
+import docx
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.config import settings
+
+MAX_RESUME_BYTES = settings.max_resume_bytes
+MAX_RESUME_PAGES = settings.max_resume_pages
+RESUME_PAGE_TIMEOUT = settings.resume_page_timeout
+RESUME_WORKERS = settings.resume_workers
+RESUME_SPOOL_DIR = settings.resume_spool_dir
+# boundaries, part headers and small form fields around the file in a multipart body
+MULTIPART_OVERHEAD = 64 * 1024
+
+SUPPORTED_TYPES = (".pdf", ".docx")
+
+
+class ResumeTooLarge(Exception):
+    pass
+
+
+class ResumeParseError(Exception):
+    pass
+
+
+class InvalidUpload(Exception):
+    """Not a multipart upload with a supported "file" part."""
+
+
+def resume_kind(filename: str):
+    """Return ".pdf"/".docx" for supported uploads, else None."""
+    for ext in SUPPORTED_TYPES:
+        if filename and filename.endswith(ext):
+            return ext
+    return None
+
+
+class _FileSpool:
+    """python-multipart callbacks: the "file" part goes straight to `out`, hashed on the way."""
+
+    def __init__(self, out, max_bytes: int):
+        self.out = out
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.filename = None
+        self._headers = {}
+        self._field = self._value = b""
+        self._in_file = False
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._in_file = False
+
+    def on_header_field(self, data, start, end):
+        self._field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name") != b"file" or b"filename" not in options or self.filename is not None:
+            return
+        self.filename = options[b"filename"].decode("utf-8", "replace")
+        if resume_kind(self.filename) is None:
+            raise InvalidUpload("Invalid file type")
+        self._in_file = True
+
+    def on_part_data(self, data, start, end):
+        if not self._in_file:
+            return
+        self.size += end - start
+        if self.size > self.max_bytes:
+            raise ResumeTooLarge()
+        chunk = data[start:end]
+        self.digest.update(chunk)
+        self.out.write(chunk)
+
+    def on_part_end(self):
+        self._in_file = False
+
+
+async def spool_request(request, max_bytes: int = MAX_RESUME_BYTES):
+    """Stream the "file" part of a multipart request body to a temp file, hashing as we go.
+
+    The body is read here, not by the framework, so nothing is buffered or copied twice.
+    Returns (filename, path, sha256 hex digest). Raises ResumeTooLarge as soon as the
+    declared Content-Length or the bytes received pass the limit, InvalidUpload for
+    anything but a multipart body with a .pdf/.docx "file" part.
+    """
+    limit = max_bytes + MULTIPART_OVERHEAD
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > limit:
+        raise ResumeTooLarge()
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise InvalidUpload("Expected a multipart/form-data upload")
+
+    fd, path = tempfile.mkstemp(prefix="resume-", dir=RESUME_SPOOL_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            spool = _FileSpool(out, max_bytes)
+            parser = MultipartParser(params[b"boundary"], {
+                name: getattr(spool, name) for name in (
+                    "on_part_begin", "on_header_field", "on_header_value", "on_header_end",
+                    "on_headers_finished", "on_part_data", "on_part_end",
+                )
+            })
+            received = 0
+            try:
+                async for chunk in request.stream():
+                    received += len(chunk)
+                    if received > limit:  # chunked bodies have no Content-Length
+                        raise ResumeTooLarge()
+                    parser.write(chunk)
+                parser.finalize()
+            except MultipartParseError as exc:
+                raise InvalidUpload(f"Malformed multipart body: {exc}")
+        if spool.filename is None:
+            raise InvalidUpload("No file in upload")
+    except BaseException:
+        os.unlink(path)
+        raise
+    return spool.filename, path, spool.digest.hexdigest()
+
+
+# --- worker-side functions (run inside the process pool) ---
+
+class _Timeout(Exception):
+    pass
+
+def _raise_timeout(signum, frame):
+    raise _Timeout()
+
+@contextlib.contextmanager
+def _time_limit(seconds: float):
+    # Pool workers run jobs on their main thread, so SIGALRM can interrupt a stuck
+    # (pure-Python) parse and free the worker. No-op where setitimer is unavailable.
+    if not hasattr(signal, "setitimer"):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+@functools.lru_cache(maxsize=4)
+def _load_pdf(path: str, mtime_ns: int):
+    # PdfReader loads the file into memory, so consecutive pages of one resume reuse it
+    return PyPDF2.PdfReader(path)
+
+def _open_pdf(path: str):
+    # mtime in the key: spool file names can be reused once a parse is finished
+    return _load_pdf(path, os.stat(path).st_mtime_ns)
+
+def _pdf_page_count(path: str, timeout: float):
+    try:
+        with _time_limit(timeout):
+            return len(_open_pdf(path).pages)
+    except _Timeout:
+        raise ResumeParseError("Timed out reading PDF")
+
+def _pdf_page_text(path: str, index: int, timeout: float):
+    try:
+        with _time_limit(timeout):
+            return _open_pdf(path).pages[index].extract_text() or ""
+    except _Timeout:
+        # skip a pathological page instead of failing the whole resume
+        return ""
+
+def _docx_paragraphs(path: str, timeout: float):
+    try:
+        with _time_limit(timeout):
+            return [para.text for para in docx.Document(path).paragraphs]
+    except _Timeout:
+        raise ResumeParseError("Timed out reading DOCX")
+
+
+_resume_pool = None
+
+def _get_resume_pool():
+    global _resume_pool
+    if _resume_pool is None:
+        _resume_pool = ProcessPoolExecutor(
+            max_workers=RESUME_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _resume_pool
+
+def shutdown_resume_pool():
+    global _resume_pool
+    if _resume_pool is not None:
+        _resume_pool.shutdown(wait=False, cancel_futures=True)
+        _resume_pool = None
+
+
+async def _run(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_resume_pool(), fn, *args, RESUME_PAGE_TIMEOUT)
+
+
+async def extract_text(path: str, kind: str):
+    """Extract resume text off the event loop. Returns (text, page_count)."""
+    try:
+        if kind == ".pdf":
+            page_count = await _run(_pdf_page_count, path)
+            if page_count > MAX_RESUME_PAGES:
+                raise ResumeParseError(f"Resume has {page_count} pages (limit {MAX_RESUME_PAGES})")
+            parts = await asyncio.gather(*(_run(_pdf_page_text, path, i) for i in range(page_count)))
+        elif kind == ".docx":
+            page_count = None
+            parts = await _run(_docx_paragraphs, path)
+        else:
+            raise ResumeParseError("Invalid file type")
+    except ResumeParseError:
+        raise
+    except Exception as exc:
+        raise ResumeParseError(f"Could not read resume: {exc}")
+    # join once; same layout as before: one line per page/paragraph
+    return "".join(part + "\n" for part in parts), page_count
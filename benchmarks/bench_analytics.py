@@ -0,0 +1,111 @@
+"""
+Interviewer analytics over many answered questions.
+
+    python benchmarks/bench_analytics.py [--answers 1000000] [--questions 300] [--database-url URL]
+
+Seeds completed six-question interviews (--answers graded answers in total, drawn from a
+bank of --questions questions) and times each aggregation query of app/analytics.py and
+a full uncached analytics.compute(). Uses a temporary SQLite database unless
+--database-url points at an empty database (e.g. postgresql+asyncpg://...).
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+from common import percentiles, run_info, save_results
+
+
+async def seed(engine, answers: int, bank_size: int, rng: random.Random):
+    from app import models
+    from app.utils.ai_utils import MAX_POINTS
+
+    difficulties = ["Easy", "Easy", "Medium", "Medium", "Hard", "Hard"]
+    bank = {d: [f"{d} question {n}: explain how you would design it?" for n in range(bank_size // 3)]
+            for d in MAX_POINTS}
+    interviews = answers // 6
+    batch = 5000
+    async with engine.begin() as conn:
+        for low in range(0, interviews, batch):
+            ids = range(low + 1, min(low + batch, interviews) + 1)
+            await conn.execute(models.Candidate.__table__.insert(), [
+                {"id": i, "name": f"Candidate {i}", "email": f"c{i}@example.com", "phone": "555-0100",
+                 "hashed_password": "x", "role": "interviewee"} for i in ids
+            ])
+            rows = []
+            totals = {}
+            for i in ids:
+                for n, difficulty in enumerate(difficulties):
+                    score = rng.randint(0, MAX_POINTS[difficulty])
+                    totals[i] = totals.get(i, 0) + score
+                    rows.append({"interview_id": i, "question_index": n, "question": rng.choice(bank[difficulty]),
+                                 "difficulty": difficulty, "answer": "an answer", "score": score})
+            await conn.execute(models.Interview.__table__.insert(), [
+                {"id": i, "candidate_id": i, "status": "completed", "score": totals[i], "qa_pairs": []} for i in ids
+            ])
+            await conn.execute(models.InterviewQuestion.__table__.insert(), rows)
+
+
+async def run(answers: int, bank_size: int, repeat: int, database_url: str = None):
+    from sqlalchemy import func, select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app import analytics, models
+    from app.schema import migrate
+
+    tmp = None
+    if database_url is None:
+        tmp = tempfile.TemporaryDirectory(prefix="swipe-bench-")
+        database_url = f"sqlite+aiosqlite:///{tmp.name}/bench.db"
+    engine = create_async_engine(database_url)
+    session = async_sessionmaker(engine, expire_on_commit=False)
+    results = {}
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(migrate)
+        async with session() as db:
+            if (await db.execute(select(func.count()).select_from(models.Candidate))).scalar():
+                raise SystemExit("--database-url must point at an empty database")
+
+        start = time.perf_counter()
+        await seed(engine, answers, bank_size, random.Random(0))
+        print(f"seeded {answers} answers in {time.perf_counter() - start:.1f}s")
+
+        cases = {
+            "score_frequencies": lambda db: analytics.score_frequencies(db),
+            "question_stats": lambda db: analytics.question_stats(db),
+            "compute_uncached": lambda db: analytics.compute(db),
+        }
+        for name, call in cases.items():
+            samples = []
+            for _ in range(repeat):
+                async with session() as db:
+                    start = time.perf_counter()
+                    await call(db)
+                    samples.append(time.perf_counter() - start)
+            results[name] = percentiles(samples)
+            print(f"{name:<18} p50 {results[name]['p50_ms']:>9} ms  p95 {results[name]['p95_ms']:>9} ms")
+    finally:
+        await engine.dispose()
+        if tmp is not None:
+            tmp.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=1_000_000)
+    parser.add_argument("--questions", type=int, default=300, help="question bank size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", help="async URL of an empty database")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    results = {"analytics": asyncio.run(run(args.answers, args.questions, args.repeat, args.database_url))}
+    results["run"] = run_info(answers=args.answers, questions=args.questions, repeat=args.repeat)
+    save_results("analytics", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
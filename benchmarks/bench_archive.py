@@ -0,0 +1,165 @@
+"""
+Hot-path lookups and hot-table size before and after archiving interview history.
+
+    python benchmarks/bench_archive.py [--candidates 10000] [--history 10] [--database-url URL]
+
+Seeds --candidates candidates, each with --history six-question interviews completed a
+year ago and one interview in progress. Times the per-request lookups of the answer and
+status paths (active interview, latest interview, its questions) for random candidates,
+runs app.archive once, and times them again. Also reports the on-disk size of the hot
+tables with their indexes and of the archive. Uses a temporary SQLite database unless
+--database-url points at an empty database (e.g. postgresql+asyncpg://...).
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from common import percentiles, run_info, save_results
+
+HOT_TABLES = ("interviews", "interview_questions")
+ARCHIVE_TABLES = ("interview_archive", "archived_answer_scores")
+
+
+async def seed(engine, candidates: int, history: int):
+    from app import models
+    from app.utils.ai_utils import MAX_POINTS
+
+    difficulties = ["Easy", "Easy", "Medium", "Medium", "Hard", "Hard"]
+    completed_at = datetime.now(timezone.utc) - timedelta(days=365)
+    rng = random.Random(0)
+    interview_id = 0
+    batch = 1000
+    async with engine.begin() as conn:
+        for low in range(1, candidates + 1, batch):
+            ids = range(low, min(low + batch, candidates + 1))
+            await conn.execute(models.Candidate.__table__.insert(), [
+                {"id": i, "name": f"Candidate {i}", "email": f"c{i}@example.com", "phone": "555-0100",
+                 "hashed_password": "x", "role": "interviewee"} for i in ids
+            ])
+            interviews, questions = [], []
+            for i in ids:
+                for n in range(history + 1):
+                    interview_id += 1
+                    in_progress = n == history
+                    scores = [rng.randint(0, MAX_POINTS[d]) for d in difficulties[:2 if in_progress else 6]]
+                    interviews.append({
+                        "id": interview_id, "candidate_id": i, "qa_pairs": [],
+                        "status": "in_progress" if in_progress else "completed",
+                        "score": None if in_progress else sum(scores),
+                        "completed_at": None if in_progress else completed_at,
+                    })
+                    for q, score in enumerate(scores):
+                        answered = not in_progress or q == 0
+                        questions.append({
+                            "interview_id": interview_id, "question_index": q, "difficulty": difficulties[q],
+                            "question": f"{difficulties[q]} question {rng.randrange(100)}: explain your approach?",
+                            "answer": "an answer with a few words in it" if answered else None,
+                            "score": score if answered else None,
+                            "answered_at": completed_at if answered else None,
+                        })
+            await conn.execute(models.Interview.__table__.insert(), interviews)
+            await conn.execute(models.InterviewQuestion.__table__.insert(), questions)
+
+
+async def table_sizes(conn, tables):
+    """Bytes on disk per table, indexes included."""
+    from sqlalchemy import text
+
+    if conn.dialect.name == "postgresql":
+        return {
+            table: (await conn.execute(text("SELECT pg_total_relation_size(:t)"), {"t": table})).scalar()
+            for table in tables
+        }
+    rows = await conn.execute(text(
+        "SELECT m.tbl_name, sum(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name GROUP BY m.tbl_name"
+    ))
+    sizes = dict(rows.all())
+    return {table: sizes.get(table, 0) for table in tables}
+
+
+async def time_lookups(session, candidates: int, lookups: int):
+    from app import crud
+
+    rng = random.Random(1)
+    samples = {"active_interview": [], "latest_interview": [], "interview_questions": []}
+    async with session() as db:
+        for _ in range(lookups):
+            candidate_id = rng.randint(1, candidates)
+            start = time.perf_counter()
+            interview = await crud.get_active_interview(db, candidate_id)
+            samples["active_interview"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            await crud.get_latest_interview(db, candidate_id)
+            samples["latest_interview"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            await crud.get_interview_questions(db, interview.id)
+            samples["interview_questions"].append(time.perf_counter() - start)
+            db.expunge_all()
+    return {name: percentiles(values) for name, values in samples.items()}
+
+
+async def run(candidates: int, history: int, lookups: int, database_url: str = None):
+    from sqlalchemy import func, select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app import archive, models
+    from app.schema import migrate
+
+    tmp = None
+    if database_url is None:
+        tmp = tempfile.TemporaryDirectory(prefix="swipe-bench-")
+        database_url = f"sqlite+aiosqlite:///{tmp.name}/bench.db"
+    engine = create_async_engine(database_url)
+    session = async_sessionmaker(engine, expire_on_commit=False)
+    results = {}
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(migrate)
+        async with session() as db:
+            if (await db.execute(select(func.count()).select_from(models.Candidate))).scalar():
+                raise SystemExit("--database-url must point at an empty database")
+
+        start = time.perf_counter()
+        await seed(engine, candidates, history)
+        print(f"seeded {candidates} candidates x {history + 1} interviews in {time.perf_counter() - start:.1f}s")
+
+        for phase in ("before", "after"):
+            if phase == "after":
+                start = time.perf_counter()
+                async with session() as db:
+                    moved = await archive.archive(db, older_than_days=90)
+                results["archive"] = {"interviews": moved, "seconds": round(time.perf_counter() - start, 2)}
+                print(f"archived {moved} interviews in {results['archive']['seconds']}s")
+            async with engine.connect() as conn:
+                sizes = await table_sizes(conn, HOT_TABLES + ARCHIVE_TABLES)
+            results[phase] = {"lookups": await time_lookups(session, candidates, lookups), "bytes": sizes}
+            print(f"{phase}: hot tables {sum(sizes[t] for t in HOT_TABLES) / 1e6:.1f} MB, "
+                  f"archive {sum(sizes[t] for t in ARCHIVE_TABLES) / 1e6:.1f} MB")
+            for name, row in results[phase]["lookups"].items():
+                print(f"  {name:<20} p50 {row['p50_ms']:>8} ms  p95 {row['p95_ms']:>8} ms")
+    finally:
+        await engine.dispose()
+        if tmp is not None:
+            tmp.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=10000)
+    parser.add_argument("--history", type=int, default=10, help="completed interviews per candidate")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--database-url", help="async URL of an empty database")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    results = {"archive": asyncio.run(run(args.candidates, args.history, args.lookups, args.database_url))}
+    results["run"] = run_info(candidates=args.candidates, history=args.history, lookups=args.lookups)
+    save_results("archive", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Question selection latency vs. bank size.
+
+    python benchmarks/bench_question_bank.py [--sizes 1000 10000 100000 1000000] [--draws 20000]
+
+Builds synthetic banks, then times one interview's worth of selections (6 questions,
+sampling without replacement, resume topics preferred). Per-question latency should stay
+flat as the bank grows.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ai_utils import difficulty_for  # noqa: E402
+from app.utils.question_bank import DIFFICULTIES, QuestionBank  # noqa: E402
+
+TOPICS = [f"topic{i}" for i in range(200)] + ["react", "node.js", "python", "machine learning"]
+RESUME = "Senior python developer. Built machine learning pipelines and React dashboards on node.js."
+
+
+def build(size: int):
+    bank = QuestionBank()
+    for i in range(size):
+        bank.add(f"Question {i}?", DIFFICULTIES[i % 3], random.sample(TOPICS, 2))
+    return bank
+
+
+def run_interviews(bank: QuestionBank, interviews: int):
+    topics = bank.match_topics(RESUME)
+    start = time.perf_counter()
+    for _ in range(interviews):
+        asked = set()
+        for index in range(6):
+            q = bank.sample(difficulty_for(index), exclude=asked, topics=topics)
+            asked.add(q["question"])
+    return (time.perf_counter() - start) / (interviews * 6)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--draws", type=int, default=20_000, help="interviews simulated per size")
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f"{'bank size':>10}  {'build s':>8}  {'us/question':>11}")
+    for size in args.sizes:
+        t0 = time.perf_counter()
+        bank = build(size)
+        build_s = time.perf_counter() - t0
+        per_question = run_interviews(bank, args.draws // 6 or 1)
+        print(f"{size:>10}  {build_s:>8.2f}  {per_question * 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
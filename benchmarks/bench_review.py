@@ -0,0 +1,130 @@
+"""
+Interviewer review of many candidates: per-candidate requests vs one batched request.
+
+    python benchmarks/bench_review.py [--candidates 1000] [--batch 50] [--repeat 20]
+
+Seeds --candidates candidates, each with a completed six-question interview with
+150-word answers, in a temporary SQLite database, and calls the real app in-process through
+httpx's ASGI transport. For --batch random candidates, times:
+- per_candidate: GET /candidate/{id}, /candidate/{id}/summary and /candidate/{id}/chat each
+- batched: one GET /candidates/review?ids=...
+each on a cold transcript cache (cleared before every sample) and a warm one, and reports
+the batched response size with and without Accept-Encoding: gzip.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from common import REPO_DIR, percentiles, run_info, save_results
+
+WORDS = ("profile the hot path cache derived data batch writes index queue shard replica latency throughput "
+         "retry backoff timeout pool connection memory allocation lock contention trace metric").split()
+
+
+def answer(rng: random.Random):
+    return " ".join(rng.choice(WORDS) for _ in range(150))
+
+
+def seed(candidates: int):
+    from app import models
+    from app.database import get_engine
+    from app.schema import migrate
+
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    with get_engine().begin() as conn:
+        migrate(conn)
+        conn.execute(models.Candidate.__table__.insert(), [
+            {"id": i, "name": f"Candidate {i}", "email": f"candidate{i}@example.com", "phone": "555-0100",
+             "hashed_password": "x", "role": "interviewee"} for i in range(1, candidates + 1)
+        ])
+        conn.execute(models.Interview.__table__.insert(), [
+            {"id": i, "candidate_id": i, "status": "completed", "score": rng.randrange(121),
+             "summary": f"Candidate performed well with total score {i % 121}.", "qa_pairs": [], "completed_at": now}
+            for i in range(1, candidates + 1)
+        ])
+        conn.execute(models.InterviewQuestion.__table__.insert(), [
+            {"interview_id": i, "question_index": n, "question": f"Question {n}: explain how you would scale it?",
+             "difficulty": "Hard", "answer": answer(rng), "score": 17, "answered_at": now}
+            for i in range(1, candidates + 1) for n in range(6)
+        ])
+
+
+async def bench(candidates: int, batch: int, repeat: int):
+    import httpx
+
+    from app import transcripts
+    from app.main import app
+
+    rng = random.Random(1)
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def per_candidate(ids):
+            for candidate_id in ids:
+                for suffix in ("", "/summary", "/chat"):
+                    (await client.get(f"/api/interviewer/candidate/{candidate_id}{suffix}")).raise_for_status()
+
+        async def batched(ids):
+            (await client.get("/api/interviewer/candidates/review", params={"ids": ids})).raise_for_status()
+
+        for name, call in (("per_candidate", per_candidate), ("batched", batched)):
+            for cache in ("cold", "warm"):
+                ids = rng.sample(range(1, candidates + 1), batch)
+                await call(ids)  # warm-up (and cache fill)
+                samples = []
+                for _ in range(repeat):
+                    if cache == "cold":
+                        transcripts.transcript_cache.clear()
+                    start = time.perf_counter()
+                    await call(ids)
+                    samples.append(time.perf_counter() - start)
+                results[f"{name}_{cache}"] = row = percentiles(samples)
+                print(f"{name}_{cache:<4} ({batch} candidates) p50 {row['p50_ms']:>8} ms  p95 {row['p95_ms']:>8} ms")
+
+        ids = rng.sample(range(1, candidates + 1), batch)
+        sizes = {}
+        for encoding in ("identity", "gzip"):
+            response = await client.get("/api/interviewer/candidates/review", params={"ids": ids},
+                                        headers={"Accept-Encoding": encoding})
+            sizes[encoding] = len(response.content) if encoding == "identity" else int(response.headers["content-length"])
+        results["bytes"] = sizes
+        print(f"batched response: {sizes['identity']} bytes, {sizes['gzip']} gzipped")
+    return results
+
+
+def run(candidates: int, batch: int, repeat: int):
+    with tempfile.TemporaryDirectory(prefix="swipe-bench-") as tmp:
+        # the app falls back to ./swipe_interview.db when no DB_* variables are set
+        os.chdir(tmp)
+        try:
+            seed(candidates)
+            results = asyncio.run(bench(candidates, batch, repeat))
+            from app.database import dispose_engines
+
+            asyncio.run(dispose_engines())
+        finally:
+            os.chdir(REPO_DIR)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=50, help="candidates reviewed per sample (max 100)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+
+    results = {"review": run(args.candidates, args.batch, args.repeat)}
+    results["run"] = run_info(candidates=args.candidates, batch=args.batch, repeat=args.repeat)
+    save_results("review", results, output)
+
+
+if __name__ == "__main__":
+    main()
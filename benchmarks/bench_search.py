@@ -0,0 +1,137 @@
+"""
+Full-text search latency over synthetic resumes.
+
+    python benchmarks/bench_search.py [--candidates 100000] [--database-url URL]
+
+Seeds candidates with generated resumes and a couple of interview answers each, builds
+candidate_search with the same statements as rebuild_search_index.py, then times
+search.search() for common, rare, multi-term, phrase and prefix queries (first page and
+a deep page). Uses a temporary SQLite database (FTS5) unless --database-url points at an
+empty database (e.g. postgresql+asyncpg://... for the tsvector/GIN path).
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+from common import percentiles, run_info, save_results
+
+SKILLS = [
+    "python", "react", "node.js", "typescript", "kubernetes", "docker", "postgres", "redis", "kafka",
+    "spark", "terraform", "aws", "gcp", "django", "fastapi", "golang", "rust", "java", "graphql",
+    "machine learning", "pytorch", "tensorflow", "airflow", "elasticsearch", "microservices",
+]
+FILLER = (
+    "built shipped owned designed migrated scaled maintained led mentored improved reduced latency "
+    "throughput pipelines services dashboards platform team customers reliability on-call billing "
+    "payments search analytics infrastructure testing deployment monitoring"
+).split()
+RARE = ["haskell", "cobol", "fortran", "erlang", "ocaml"]
+
+QUERIES = {
+    "common_term": "python",
+    "rare_term": "haskell",
+    "two_terms": "react kubernetes",
+    "phrase": '"machine learning"',
+    "prefix": "terra*",
+    "no_match": "zzzyzzx",
+}
+
+
+def resume(rng: random.Random):
+    words = rng.choices(FILLER, k=120) + rng.sample(SKILLS, 6)
+    if rng.random() < 0.01:
+        words.append(rng.choice(RARE))
+    rng.shuffle(words)
+    return " ".join(words)
+
+
+async def seed(engine, candidates: int, rng: random.Random):
+    from app import models, search
+
+    batch = 5000
+    async with engine.begin() as conn:
+        for low in range(0, candidates, batch):
+            ids = range(low + 1, min(low + batch, candidates) + 1)
+            await conn.execute(models.Candidate.__table__.insert(), [
+                {"id": i, "name": f"Candidate {i}", "email": f"c{i}@example.com", "phone": "555-0100",
+                 "hashed_password": "x", "role": "interviewee", "resume_text": resume(rng)} for i in ids
+            ])
+            await conn.execute(models.Interview.__table__.insert(), [
+                {"id": i, "candidate_id": i, "status": "completed", "score": 60, "qa_pairs": []} for i in ids
+            ])
+            await conn.execute(models.InterviewQuestion.__table__.insert(), [
+                {"interview_id": i, "question_index": n, "question": "Tell me about a project.",
+                 "difficulty": "easy", "answer": " ".join(rng.choices(FILLER + SKILLS, k=40))}
+                for i in ids for n in range(2)
+            ])
+        start = time.perf_counter()
+        for statement in search.rebuild_statements(conn.dialect.name):
+            await conn.execute(statement)
+    return time.perf_counter() - start
+
+
+async def run(candidates: int, repeat: int, database_url: str = None):
+    from sqlalchemy import func, select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app import models, search
+    from app.database import Base
+
+    tmp = None
+    if database_url is None:
+        tmp = tempfile.TemporaryDirectory(prefix="swipe-bench-")
+        database_url = f"sqlite+aiosqlite:///{tmp.name}/bench.db"
+    engine = create_async_engine(database_url)
+    session = async_sessionmaker(engine, expire_on_commit=False)
+    results = {}
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(search.create_search_table)
+        async with session() as db:
+            if (await db.execute(select(func.count()).select_from(models.Candidate))).scalar():
+                raise SystemExit("--database-url must point at an empty database")
+
+        start = time.perf_counter()
+        index_seconds = await seed(engine, candidates, random.Random(0))
+        print(f"seeded {candidates} candidates in {time.perf_counter() - start:.1f}s "
+              f"(index build {index_seconds:.1f}s)")
+        results["index_build_ms"] = round(index_seconds * 1000, 1)
+
+        for name, query in QUERIES.items():
+            for page, offset in (("first_page", 0), ("deep_page", 200)):
+                samples = []
+                hits = 0
+                for _ in range(repeat):
+                    async with session() as db:
+                        start = time.perf_counter()
+                        rows = await search.search(db, query, 20, offset)
+                        samples.append(time.perf_counter() - start)
+                        hits = len(rows)
+                results[f"{name}.{page}"] = {"query": query, "hits": hits, **percentiles(samples)}
+                print(f"{name:<12} {page:<10} {query!r:<22} p50 {results[f'{name}.{page}']['p50_ms']:>8} ms"
+                      f"  p95 {results[f'{name}.{page}']['p95_ms']:>8} ms  ({hits} hits)")
+    finally:
+        await engine.dispose()
+        if tmp is not None:
+            tmp.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", help="async URL of an empty database")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    results = {"search": asyncio.run(run(args.candidates, args.repeat, args.database_url))}
+    results["run"] = run_info(candidates=args.candidates, repeat=args.repeat)
+    save_results("search", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Response serialization cost for the large JSON endpoints.
+
+    python benchmarks/bench_serialization.py [--candidates 10000] [--repeat 20]
+
+encode: the same payloads (a 10k-row candidate list, an interview status with long
+answers, a chat transcript) serialized three ways, without a server:
+- dict_jsonable: a route returning plain dicts (jsonable_encoder + JSONResponse / json)
+- response_model: a typed response_model on the default path (validation, then jsonable_encoder)
+- trusted_orjson: http_utils.trusted_response (orjson straight from the dicts)
+
+endpoints: the real app, called in-process through httpx's ASGI transport, against a
+temporary SQLite database with --candidates candidates. This includes walking the whole
+candidate list in 1000-row pages. Run it on two commits and use compare.py for the
+before/after figures.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import List
+
+from common import REPO_DIR, percentiles, run_info, save_results, timed
+
+ANSWER = ("I would start by profiling the hot path, then cache the derived data and batch the writes. " * 25).strip()
+
+
+def payloads(candidates: int):
+    rng = random.Random(0)
+    candidate_list = [
+        {"id": i, "name": f"Candidate {i}", "email": f"candidate{i}@example.com", "score": rng.randrange(121)}
+        for i in range(1, candidates + 1)
+    ]
+    qa_pairs = [
+        {"question": f"Question {i}: explain how you would scale a Node.js API?", "difficulty": "hard",
+         "answer": ANSWER, "score": 17, "grading_status": "graded"}
+        for i in range(6)
+    ]
+    status = {"interview_id": 1, "status": "completed", "score": 102, "summary": "Strong answers." * 20,
+              "qa_pairs": qa_pairs, "current_question": 5, "total_questions": 6}
+    chat = []
+    for qa in qa_pairs:
+        chat += [{"from": "ai", "message": qa["question"]}, {"from": "candidate", "message": qa["answer"]}]
+    return candidate_list, status, chat
+
+
+def bench_encode(candidates: int, repeat: int):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+
+    from app import schemas
+    from app.utils.http_utils import trusted_response
+
+    loop = asyncio.new_event_loop()
+    candidate_list, status, chat = payloads(candidates)
+    cases = {
+        f"candidates_{candidates}": (List[schemas.CandidateScoreItem], candidate_list),
+        "interview_status": (schemas.InterviewStatusResponse, status),
+        "chat": (List[schemas.ChatMessage], chat),
+    }
+    results = {}
+    for name, (model, content) in cases.items():
+        field = create_model_field(name="Response_" + name, type_=model, mode="serialization")
+
+        def dict_jsonable():
+            return JSONResponse(jsonable_encoder(content)).body
+
+        def response_model():
+            return JSONResponse(loop.run_until_complete(serialize_response(field=field, response_content=content))).body
+
+        def trusted_orjson():
+            return trusted_response(model, content).body
+
+        assert json.loads(trusted_orjson()) == json.loads(dict_jsonable())
+        results[name] = {
+            "bytes": len(trusted_orjson()),
+            "dict_jsonable": percentiles(timed(dict_jsonable, repeat)),
+            "response_model": percentiles(timed(response_model, repeat)),
+            "trusted_orjson": percentiles(timed(trusted_orjson, repeat)),
+        }
+        row = results[name]
+        print(f"encode {name:<20} dict+jsonable {row['dict_jsonable']['p50_ms']:>8} ms  "
+              f"response_model {row['response_model']['p50_ms']:>8} ms  orjson {row['trusted_orjson']['p50_ms']:>8} ms")
+    loop.close()
+    return results
+
+
+def seed(candidates: int):
+    from app import leaderboard, models
+    from app.database import get_engine
+    from app.schema import migrate
+
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    with get_engine().begin() as conn:
+        migrate(conn)
+        conn.execute(models.Candidate.__table__.insert(), [
+            {"id": i, "name": f"Candidate {i}", "email": f"candidate{i}@example.com", "phone": "555-0100",
+             "hashed_password": "x", "role": "interviewee"} for i in range(1, candidates + 1)
+        ])
+        conn.execute(models.Interview.__table__.insert(), [
+            {"id": i, "candidate_id": i, "status": "completed", "score": rng.randrange(121), "qa_pairs": []}
+            for i in range(1, candidates + 1)
+        ])
+        conn.execute(models.InterviewQuestion.__table__.insert(), [
+            {"interview_id": 1, "question_index": n, "question": f"Question {n}: explain caching?",
+             "difficulty": "hard", "answer": ANSWER, "score": 17, "answered_at": now}
+            for n in range(6)
+        ])
+        for statement in leaderboard.rebuild_statements():
+            conn.execute(statement)
+
+
+async def bench_endpoints(candidates: int, repeat: int):
+    import httpx
+
+    from app import auth
+    from app.main import app
+
+    token = auth.create_access_token({"sub": "candidate1@example.com", "cid": 1, "role": "interviewee"})
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def all_pages():
+            cursor, rows = None, 0
+            while True:
+                params = {"limit": 1000, **({"cursor": cursor} if cursor else {})}
+                response = await client.get("/api/interviewer/candidates", params=params)
+                rows += len(response.json())
+                cursor = response.headers.get("x-next-cursor")
+                if not cursor:
+                    return rows
+
+        cases = {
+            "candidates_page_1000": lambda: client.get("/api/interviewer/candidates", params={"limit": 1000}),
+            f"candidates_all_{candidates}": all_pages,
+            "interview_status": lambda: client.get("/api/interview/status",
+                                                   headers={"Authorization": f"Bearer {token}"}),
+            "chat": lambda: client.get("/api/interviewer/candidate/1/chat"),
+        }
+        for name, call in cases.items():
+            await call()  # warm-up
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                await call()
+                samples.append(time.perf_counter() - start)
+            results[name] = percentiles(samples)
+            print(f"endpoint {name:<24} p50 {results[name]['p50_ms']:>8} ms  p95 {results[name]['p95_ms']:>8} ms")
+    return results
+
+
+def run_endpoints(candidates: int, repeat: int):
+    with tempfile.TemporaryDirectory(prefix="swipe-bench-") as tmp:
+        # the app falls back to ./swipe_interview.db when no DB_* variables are set
+        os.chdir(tmp)
+        try:
+            seed(candidates)
+            results = asyncio.run(bench_endpoints(candidates, repeat))
+            from app.database import dispose_engines
+
+            asyncio.run(dispose_engines())
+        finally:
+            os.chdir(REPO_DIR)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", choices=["encode", "endpoints"], action="append")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    only = set(args.only or ["encode", "endpoints"])
+
+    results = {}
+    if "encode" in only:
+        results["encode"] = bench_encode(args.candidates, args.repeat)
+    if "endpoints" in only:
+        results["endpoints"] = run_endpoints(args.candidates, args.repeat)
+    results["run"] = run_info(candidates=args.candidates, repeat=args.repeat, only=sorted(only))
+    save_results("serialization", results, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Interview answers over HTTP vs the WebSocket session channel.
+
+    python benchmarks/bench_ws_interview.py [--candidates 200] [--concurrency 20]
+
+Starts a server the way load_test.py does: a fresh SQLite database in a temp directory,
+or Postgres if DB_HOST etc. are set. Every virtual candidate signs up and logs in, then
+takes a six-question interview in each mode:
+- http: POST /api/interview/start, then six POST /api/interview/answer
+- ws: one /api/interview/ws connection, with a start message and six answer messages
+
+Reports per-answer latency (request or message round trip), the wall time of each mode,
+and SQL statements per interview. Statements are read from swipe_db_queries_total, which
+also counts the WebSocket session flushes; the ws figure is read once the queue is empty.
+"""
+import argparse
+import asyncio
+import random
+import re
+import tempfile
+import time
+
+import httpx
+import orjson
+from websockets.asyncio.client import connect
+
+from common import percentiles, run_info, save_results
+from load_test import ANSWERS, run_phase, start_server
+
+_GAUGE = re.compile(r"^(swipe_db_queries_total|swipe_interview_sessions_queued)(?:\{[^}]*\})? (\S+)$")
+
+
+async def server_counters(client):
+    """(SQL statements so far, WebSocket turns still queued) from /metrics."""
+    values = {"swipe_db_queries_total": 0.0, "swipe_interview_sessions_queued": 0.0}
+    for line in (await client.get("/metrics")).text.splitlines():
+        match = _GAUGE.match(line)
+        if match:
+            values[match.group(1)] += float(match.group(2))
+    return values["swipe_db_queries_total"], values["swipe_interview_sessions_queued"]
+
+
+async def post(client, url: str, body):
+    while True:
+        response = await client.post(url, json=body)
+        if response.status_code != 503:  # the password pool sheds load with 503
+            return response
+        await asyncio.sleep(0.1)
+
+
+async def login(client, index: int, run_id: str):
+    email = f"bench-{run_id}-{index}@example.com"
+    await post(client, "/api/auth/signup", {
+        "name": f"Bench {index}", "email": email, "phone": "555-0100", "password": "bench-password",
+    })
+    response = await post(client, "/api/auth/login", {"email": email, "password": "bench-password"})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def http_interview(client, token: str, samples, errors):
+    headers = {"Authorization": f"Bearer {token}"}
+    if (await client.post("/api/interview/start", headers=headers)).status_code != 200:
+        errors.append(True)
+        return
+    for _ in range(6):
+        start = time.perf_counter()
+        response = await client.post("/api/interview/answer", headers=headers, json={"answer": random.choice(ANSWERS)})
+        samples.append(time.perf_counter() - start)
+        errors.append(response.status_code != 200)
+
+
+async def ws_interview(ws_url: str, token: str, samples, errors):
+    async with connect(f"{ws_url}/api/interview/ws?token={token}") as websocket:
+
+        async def request(message):
+            await websocket.send(orjson.dumps(message).decode())
+            while True:
+                reply = orjson.loads(await websocket.recv())
+                if reply["type"] != "saved":
+                    return reply
+
+        await websocket.recv()  # the state sent on connect
+        await request({"type": "start"})
+        for _ in range(6):
+            start = time.perf_counter()
+            reply = await request({"type": "answer", "answer": random.choice(ANSWERS)})
+            samples.append(time.perf_counter() - start)
+            errors.append(reply["type"] == "error")
+
+
+async def run(args, base_url: str):
+    run_id = f"{int(time.time())}-{random.randrange(1 << 16)}"
+    ws_url = "ws" + base_url[len("http"):]
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        tokens = [None] * args.candidates
+
+        async def sign_in(i):
+            tokens[i] = await login(client, i, run_id)
+
+        # not measured; bcrypt would only queue behind a wider fan-out
+        await run_phase(min(args.concurrency, 10), [lambda i=i: sign_in(i) for i in range(args.candidates)])
+
+        for mode in ("http", "ws"):
+            samples, errors = [], []
+            statements_before, _ = await server_counters(client)
+            if mode == "http":
+                jobs = [lambda t=t: http_interview(client, t, samples, errors) for t in tokens]
+            else:
+                jobs = [lambda t=t: ws_interview(ws_url, t, samples, errors) for t in tokens]
+            wall = await run_phase(args.concurrency, jobs)
+            while True:
+                statements_after, queued = await server_counters(client)
+                if not queued:
+                    break
+                await asyncio.sleep(0.05)
+            results[mode] = row = {
+                **percentiles(samples),
+                "errors": sum(errors),
+                "wall_seconds": round(wall, 3),
+                "statements_per_interview": round((statements_after - statements_before) / len(tokens), 1),
+            }
+            print(f"{mode:<5} answer p50 {row['p50_ms']:>8} ms  p95 {row['p95_ms']:>8} ms  p99 {row['p99_ms']:>8} ms  "
+                  f"wall {row['wall_seconds']:>7}s  SQL/interview {row['statements_per_interview']:>6}  "
+                  f"errors {row['errors']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="setting for the spawned server (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    extra_env = {"RATE_LIMIT_ENABLED": "0", "BCRYPT_ROUNDS": "4", **dict(item.split("=", 1) for item in args.env)}
+    workdir = tempfile.TemporaryDirectory(prefix="swipe-bench-")
+    server, base_url = start_server(extra_env, workdir.name)
+    try:
+        results = {"interview": asyncio.run(run(args, base_url))}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        workdir.cleanup()
+    results["run"] = run_info(candidates=args.candidates, concurrency=args.concurrency, server_env=extra_env)
+    save_results("ws_interview", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
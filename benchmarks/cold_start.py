@@ -0,0 +1,130 @@
+"""
+Cold-start time of an API worker.
+
+    python benchmarks/cold_start.py [--repeat 5] [--env KEY=VALUE ...]
+
+import: a fresh interpreter running `import app.main` (what every worker, reload and
+test run pays before it can do anything), next to a bare `python -c pass`.
+
+worker: a uvicorn process from launch until GET /ready answers 200, plus the latency of
+the first real request. Measured twice, each time in a new temp directory (SQLite) or
+against DB_* from the environment (Postgres):
+- fresh_db: no database yet; the worker creates the schema at startup
+- migrated_db: `python init_db.py` ran first and the worker starts with AUTO_CREATE_SCHEMA=0
+
+To compare with an older checkout, point --app-dir at it (for trees without /ready use
+--path /) and run compare.py on the two result files.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from common import REPO_DIR, run_info, save_results
+from load_test import free_port
+
+POLL_INTERVAL = 0.01
+
+
+def summary(samples):
+    return {
+        "count": len(samples),
+        "min_ms": round(min(samples) * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def time_command(args, cwd, env):
+    start = time.perf_counter()
+    subprocess.run(args, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def bench_import(app_dir: str, env, repeat: int):
+    results = {}
+    for name, code in (("python", "pass"), ("import_app", "import app.main")):
+        samples = []
+        with tempfile.TemporaryDirectory(prefix="swipe-bench-") as workdir:
+            for _ in range(repeat):
+                samples.append(time_command([sys.executable, "-c", code], workdir, {**env, "PYTHONPATH": app_dir}))
+        results[name] = summary(samples)
+        print(f"{name:<12} median {results[name]['median_ms']:>8} ms  min {results[name]['min_ms']:>8} ms")
+    return results
+
+
+def start_worker(app_dir: str, workdir: str, env, path: str):
+    """Launch uvicorn; return (process, base_url, seconds until `path` answered 200)."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", app_dir,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env,
+    )
+    with httpx.Client(timeout=1) as client:
+        while time.perf_counter() - start < 60:
+            if server.poll() is not None:
+                raise SystemExit("worker exited during startup")
+            try:
+                if client.get(base_url + path).status_code == 200:
+                    return server, base_url, time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            time.sleep(POLL_INTERVAL)
+    server.terminate()
+    raise SystemExit("worker did not become ready within 60s")
+
+
+def bench_worker(app_dir: str, env, repeat: int, path: str, migrated: bool):
+    ready, first_request = [], []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="swipe-bench-") as workdir:
+            worker_env = dict(env)
+            if migrated:
+                # not check=True: older init_db.py versions exit non-zero on SQLite after creating the tables
+                subprocess.run([sys.executable, os.path.join(app_dir, "init_db.py")], cwd=workdir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                worker_env["AUTO_CREATE_SCHEMA"] = "0"
+            server, base_url, seconds = start_worker(app_dir, workdir, worker_env, path)
+            try:
+                start = time.perf_counter()
+                httpx.get(base_url + "/api/interviewer/candidates?limit=50", timeout=30).raise_for_status()
+                first_request.append(time.perf_counter() - start)
+                ready.append(seconds)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+    return {"ready": summary(ready), "first_request": summary(first_request)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--app-dir", default=REPO_DIR, help="checkout to measure (default: this one)")
+    parser.add_argument("--path", default="/ready", help="endpoint that answers 200 once the worker is up")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="setting for the spawned processes (repeatable)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+    app_dir = os.path.abspath(args.app_dir)
+    env = {**os.environ, **dict(item.split("=", 1) for item in args.env)}
+
+    results = {"import": bench_import(app_dir, env, args.repeat), "worker": {}}
+    for name, migrated in (("fresh_db", False), ("migrated_db", True)):
+        row = results["worker"][name] = bench_worker(app_dir, env, args.repeat, args.path, migrated)
+        print(f"{name:<12} ready median {row['ready']['median_ms']:>8} ms  "
+              f"first request {row['first_request']['median_ms']:>8} ms")
+    results["run"] = run_info(repeat=args.repeat, app_dir=app_dir, path=args.path, server_env=dict(
+        item.split("=", 1) for item in args.env))
+    save_results("cold_start", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
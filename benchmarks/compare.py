@@ -0,0 +1,54 @@
+"""
+Compare two benchmark result files.
+
+    python benchmarks/compare.py OLD.json NEW.json [--threshold 10]
+
+Prints every latency figure (*_ms) present in both files with the relative change, and
+exits with status 1 if any of them got slower by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+
+def latency_figures(node, path=()):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "run":
+                continue
+            yield from latency_figures(value, path + (key,))
+    elif isinstance(node, (int, float)) and path and path[-1].endswith("_ms"):
+        yield ".".join(path), float(node)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent slowdown counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"old: {old.get('run', {}).get('commit', '?')[:12]}  new: {new.get('run', {}).get('commit', '?')[:12]}")
+
+    new_figures = dict(latency_figures(new))
+    regressions = 0
+    for path, before in latency_figures(old):
+        after = new_figures.get(path)
+        if after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{path:<70} {before:>10.2f} {after:>10.2f} {change:>+8.1f}%{flag}")
+    print(f"{regressions} regression(s) over {args.threshold}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+End-to-end load test of the interview flow.
+
+    python benchmarks/load_test.py --candidates 100 --concurrency 20
+
+Each virtual candidate signs up, logs in, uploads a resume, starts an interview, answers
+six questions and checks the status; afterwards the interviewer dashboard (candidate list,
+detail, chat) is read at the same concurrency. Reports p50/p95/p99 latency, throughput and
+server-side DB queries per request for every endpoint, and saves the results as JSON.
+
+Without --base-url a uvicorn server is started on a fresh SQLite database in a temp
+directory (or on Postgres, if DB_HOST etc. are set in the environment). Extra server
+settings can be passed with --env, e.g. --env BCRYPT_ROUNDS=4 --env SCORING_MODE=deferred.
+Rate limiting is off in the spawned server, since every virtual candidate shares one IP;
+pass --env RATE_LIMIT_ENABLED=1 to measure with it.
+With --base-url, DB query counts come from that server's GET /metrics, which is per process.
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+from common import REPO_DIR, percentiles, run_info, save_results
+
+ANSWERS = [
+    "I would profile first, then cache the expensive calls and batch the writes.",
+    "useEffect runs after render; the dependency array controls when it re-runs.",
+    "Node hands I/O to libuv and runs callbacks from the event loop when they complete.",
+    "",
+]
+
+
+def resume_docx(index: int) -> bytes:
+    import docx
+
+    document = docx.Document()
+    document.add_paragraph(f"Candidate {index}")
+    for _ in range(20):
+        document.add_paragraph("Built React and Node.js services; python, machine learning, databases.")
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client, endpoint: str, method: str, url: str, expect=(200,), **kwargs):
+        # `endpoint` is the route template, matching the route label in /metrics
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[endpoint].append(time.perf_counter() - start)
+        if response.status_code not in expect:
+            self.errors[endpoint] += 1
+        return response
+
+
+async def candidate_flow(client, recorder: Recorder, index: int, run_id: str):
+    email = f"bench-{run_id}-{index}@example.com"
+    await recorder.call(client, "/api/auth/signup", "POST", "/api/auth/signup", json={
+        "name": f"Bench {index}", "email": email, "phone": "555-0100", "password": "bench-password",
+    })
+    response = await recorder.call(client, "/api/auth/login", "POST", "/api/auth/login", json={
+        "email": email, "password": "bench-password",
+    })
+    if response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    await recorder.call(
+        client, "/api/candidate/upload_resume", "POST", "/api/candidate/upload_resume", expect=(200, 202),
+        headers=headers, files={"file": (f"resume-{index}.docx", resume_docx(index))},
+    )
+    await recorder.call(client, "/api/interview/start", "POST", "/api/interview/start", headers=headers)
+    for _ in range(6):
+        await recorder.call(
+            client, "/api/interview/answer", "POST", "/api/interview/answer",
+            headers=headers, json={"answer": random.choice(ANSWERS)},
+        )
+        await recorder.call(client, "/api/interview/status", "GET", "/api/interview/status", headers=headers)
+
+
+async def dashboard_request(client, recorder: Recorder, candidate_ids):
+    await recorder.call(client, "/api/interviewer/candidates", "GET", "/api/interviewer/candidates?limit=50")
+    candidate_id = random.choice(candidate_ids)
+    await recorder.call(
+        client, "/api/interviewer/candidate/{candidate_id}", "GET", f"/api/interviewer/candidate/{candidate_id}"
+    )
+    await recorder.call(
+        client, "/api/interviewer/candidate/{candidate_id}/chat", "GET",
+        f"/api/interviewer/candidate/{candidate_id}/chat",
+    )
+
+
+async def run_phase(concurrency: int, jobs):
+    """Run coroutine factories with at most `concurrency` in flight; return wall time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def guarded(job):
+        async with semaphore:
+            await job()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(guarded(job) for job in jobs))
+    return time.perf_counter() - start
+
+
+_DB_LINE = re.compile(r'^swipe_http_request_db_queries_(sum|count)\{route="([^"]*)"\} (\S+)$')
+
+async def db_query_totals(client):
+    """route -> [query sum, request count] from the server's /metrics."""
+    totals = defaultdict(lambda: [0.0, 0.0])
+    response = await client.get("/metrics")
+    if response.status_code != 200:
+        return totals
+    for line in response.text.splitlines():
+        match = _DB_LINE.match(line)
+        if match:
+            kind, route, value = match.groups()
+            totals[route][0 if kind == "sum" else 1] = float(value)
+    return totals
+
+
+def report(recorder: Recorder, phase_of, walls, before, after):
+    endpoints = {}
+    for endpoint, samples in sorted(recorder.samples.items()):
+        queries, requests = (after[endpoint][i] - before[endpoint][i] for i in (0, 1))
+        endpoints[endpoint] = {
+            **percentiles(samples),
+            "errors": recorder.errors[endpoint],
+            "throughput_rps": round(len(samples) / walls[phase_of[endpoint]], 2),
+            "db_queries_per_request": round(queries / requests, 2) if requests else None,
+        }
+    return endpoints
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(extra_env, workdir):
+    port = free_port()
+    env = {**os.environ, **extra_env}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", REPO_DIR,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env,  # the SQLite fallback creates swipe_interview.db in cwd
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit("server exited during startup")
+        try:
+            if httpx.get(base_url + "/ready", timeout=1).status_code == 200:
+                return server, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("server did not start within 60s")
+
+
+async def run(args, base_url):
+    recorder = Recorder()
+    run_id = f"{int(time.time())}-{random.randrange(1 << 16)}"
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        before = await db_query_totals(client)
+        walls = {}
+        walls["interview"] = await run_phase(args.concurrency, [
+            lambda i=i: candidate_flow(client, recorder, i, run_id) for i in range(args.candidates)
+        ])
+        flow_endpoints = set(recorder.samples)
+
+        listing = await client.get(f"/api/interviewer/candidates?limit={min(args.candidates, 1000)}")
+        candidate_ids = [row["id"] for row in listing.json()] or [1]
+        walls["dashboard"] = await run_phase(args.concurrency, [
+            lambda: dashboard_request(client, recorder, candidate_ids) for _ in range(args.dashboard_requests)
+        ])
+        after = await db_query_totals(client)
+
+    phase_of = {e: "interview" if e in flow_endpoints else "dashboard" for e in recorder.samples}
+    return {
+        "phases": {name: {"wall_seconds": round(wall, 3)} for name, wall in walls.items()},
+        "endpoints": report(recorder, phase_of, walls, before, after),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="benchmark a running server instead of starting one")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--dashboard-requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="setting for the spawned server (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    extra_env = {"RATE_LIMIT_ENABLED": "0", **dict(item.split("=", 1) for item in args.env)}
+    server = None
+    workdir = tempfile.TemporaryDirectory(prefix="swipe-bench-")
+    try:
+        base_url = args.base_url
+        if base_url is None:
+            server, base_url = start_server(extra_env, workdir.name)
+        results = asyncio.run(run(args, base_url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        workdir.cleanup()
+
+    results["run"] = run_info(
+        candidates=args.candidates, concurrency=args.concurrency,
+        dashboard_requests=args.dashboard_requests, server_env=extra_env, base_url=args.base_url,
+    )
+    print(f"{'endpoint':<48} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'q/req':>6} {'err':>4}")
+    for endpoint, row in results["endpoints"].items():
+        print(f"{endpoint:<48} {row['count']:>5} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['throughput_rps']:>8.1f} "
+              f"{row['db_queries_per_request'] if row['db_queries_per_request'] is not None else '-':>6} "
+              f"{row['errors']:>4}")
+    save_results("load", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
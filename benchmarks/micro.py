@@ -0,0 +1,203 @@
+"""
+Micro-benchmarks for hot spots behind the API.
+
+    python benchmarks/micro.py [--sizes 1000 10000 100000] [--database-url URL]
+
+- password hashing / verification at BCRYPT_ROUNDS
+- resume text extraction (DOCX and multi-page PDF) through the parsing process pool
+- the interviewer dashboard ranking (crud.list_candidate_scores) at growing candidate counts
+
+The ranking benchmark seeds a temporary SQLite database, or the database given by
+--database-url (async URL, e.g. postgresql+asyncpg://...). That database must be empty:
+it is seeded incrementally and left in place afterwards.
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import tempfile
+import time
+
+from common import percentiles, run_info, save_results, timed
+
+
+def bench_passwords(repeat: int):
+    from app import auth
+
+    hashed = auth.hash_password("bench-password")
+    return {
+        "rounds": auth.BCRYPT_ROUNDS,
+        "hash_password": percentiles(timed(lambda: auth.hash_password("bench-password"), repeat)),
+        "verify_password": percentiles(timed(lambda: auth.verify_password("bench-password", hashed), repeat)),
+    }
+
+
+def make_docx(paragraphs: int) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for i in range(paragraphs):
+        document.add_paragraph(f"Paragraph {i}: shipped React, Node.js and python services at scale.")
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_pdf(pages: int) -> bytes:
+    """Minimal text PDF (one line per page), so the benchmark needs no PDF writer."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for i in range(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td (Page {i}: React, Node.js and python experience) Tj ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R "
+            f"/Resources << /Font << /F1 3 0 R >> >> >>".encode()
+        )
+        kids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {pages} >>".encode()
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+async def bench_resume_parsing(repeat: int):
+    from app.utils import resume_parser
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="swipe-bench-") as tmp:
+        for name, kind, body in (("docx_200_paragraphs", ".docx", make_docx(200)),
+                                 ("pdf_10_pages", ".pdf", make_pdf(10))):
+            path = os.path.join(tmp, f"resume{kind}")
+            with open(path, "wb") as f:
+                f.write(body)
+            start = time.perf_counter()
+            await resume_parser.extract_text(path, kind)  # includes process pool start-up
+            cold = time.perf_counter() - start
+            samples = []
+            for _ in range(repeat):
+                # fresh mtime so the worker-side PDF cache doesn't hide the parse
+                os.utime(path, ns=(time.time_ns(), time.time_ns()))
+                start = time.perf_counter()
+                await resume_parser.extract_text(path, kind)
+                samples.append(time.perf_counter() - start)
+            results[name] = {"bytes": len(body), "cold_ms": round(cold * 1000, 3), **percentiles(samples)}
+    resume_parser.shutdown_resume_pool()
+    return results
+
+
+async def seed(engine, start: int, stop: int):
+    from app import leaderboard, models
+
+    batch = 5000
+    async with engine.begin() as conn:
+        for low in range(start, stop, batch):
+            ids = range(low + 1, min(low + batch, stop) + 1)
+            await conn.execute(models.Candidate.__table__.insert(), [
+                {"id": i, "name": f"Candidate {i}", "email": f"c{i}@example.com", "phone": "555-0100",
+                 "hashed_password": "x", "role": "interviewee"} for i in ids
+            ])
+            interviews = []
+            for i in ids:
+                # 0-2 interviews each; the latest may still be in progress
+                for n in range(random.randrange(3)):
+                    done = n == 0 or random.random() < 0.7
+                    score = random.randrange(0, 121) if done else None
+                    interviews.append({
+                        "candidate_id": i, "status": "completed" if done else "in_progress",
+                        "score": score, "summary": None, "qa_pairs": [],
+                    })
+            if interviews:
+                await conn.execute(models.Interview.__table__.insert(), interviews)
+        # the dashboard reads candidate_scores, not the interviews directly
+        for statement in leaderboard.rebuild_statements():
+            await conn.execute(statement)
+
+
+async def bench_list_candidates(sizes, repeat: int, database_url: str = None):
+    from sqlalchemy import func, select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app import crud, models
+    from app.database import Base
+
+    tmp = None
+    if database_url is None:
+        tmp = tempfile.TemporaryDirectory(prefix="swipe-bench-")
+        database_url = f"sqlite+aiosqlite:///{tmp.name}/bench.db"
+    engine = create_async_engine(database_url)
+    session = async_sessionmaker(engine, expire_on_commit=False)
+    results = {}
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session() as db:
+            if (await db.execute(select(func.count()).select_from(models.Candidate))).scalar():
+                raise SystemExit("--database-url must point at an empty database")
+
+        seeded = 0
+        for size in sorted(sizes):
+            await seed(engine, seeded, size)
+            seeded = size
+            cases = {
+                "first_page": {},
+                "deep_page": {"after": (60, size // 2)},
+                "status_completed": {"status": "completed"},
+                "min_score_100": {"min_score": 100},
+            }
+            results[str(size)] = {}
+            for name, kwargs in cases.items():
+                samples = []
+                for _ in range(repeat):
+                    async with session() as db:
+                        start = time.perf_counter()
+                        await crud.list_candidate_scores(db, 50, **kwargs)
+                        samples.append(time.perf_counter() - start)
+                results[str(size)][name] = percentiles(samples)
+            print(f"list_candidate_scores @ {size}: first page p50 "
+                  f"{results[str(size)]['first_page']['p50_ms']} ms")
+    finally:
+        await engine.dispose()
+        if tmp is not None:
+            tmp.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", help="async URL of an empty database for the ranking benchmark")
+    parser.add_argument("--only", choices=["passwords", "resume", "list_candidates"], action="append")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+    random.seed(args.seed)
+    only = set(args.only or ["passwords", "resume", "list_candidates"])
+
+    results = {}
+    if "passwords" in only:
+        results["passwords"] = bench_passwords(max(1, args.repeat // 4))
+        print(f"hash_password p50 {results['passwords']['hash_password']['p50_ms']} ms")
+    if "resume" in only:
+        results["resume_parsing"] = asyncio.run(bench_resume_parsing(args.repeat))
+        for name, row in results["resume_parsing"].items():
+            print(f"extract_text {name} p50 {row['p50_ms']} ms")
+    if "list_candidates" in only:
+        results["list_candidates"] = asyncio.run(bench_list_candidates(args.sizes, args.repeat, args.database_url))
+
+    results["run"] = run_info(sizes=args.sizes, repeat=args.repeat, only=sorted(only))
+    save_results("micro", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,30 @@
 """
 Database initialization script for Supabase PostgreSQL
-Run this script to create tables in your Supabase database
+Run this script to create tables in your Supabase database, and after each upgrade:
+it is the migration step (API workers don't create or alter tables on Postgres).
 """
-from app.database import engine, Base
-from app.models import Candidate, Interview
+import logging
+from app.database import engine
+from app.schema import migrate
 from sqlalchemy import text
 
 def init_db():
     """Create all tables in the database"""
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        migrate(connection)
     print("Database tables created successfully!")
     
     # Verify connection
     with engine.connect() as connection:
-        result = connection.execute(text("SELECT version();"))
-        version = result.fetchone()
-        print(f"Connected to PostgreSQL: {version[0]}")
+        if connection.dialect.name == "sqlite":
+            version = connection.execute(text("SELECT sqlite_version()")).scalar()
+            print(f"Connected to SQLite: {version}")
+        else:
+            result = connection.execute(text("SELECT version();"))
+            version = result.fetchone()
+            print(f"Connected to PostgreSQL: {version[0]}")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     init_db()
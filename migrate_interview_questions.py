@@ -0,0 +1,48 @@
+"""
+Backfill interview_questions from the legacy Interview.qa_pairs JSON column.
+Safe to re-run: interviews that already have question rows are skipped.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import select
+from app.database import engine, Base, SessionLocal
+from app.models import Interview, InterviewQuestion
+
+BATCH_SIZE = 500
+
+def migrate():
+    print("Creating interview_questions table...")
+    Base.metadata.create_all(bind=engine, tables=[InterviewQuestion.__table__])
+
+    migrated_ids = select(InterviewQuestion.interview_id).distinct()
+    stmt = (
+        select(Interview.id, Interview.qa_pairs)
+        .where(Interview.id.not_in(migrated_ids))
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    now = datetime.now(timezone.utc)
+    migrated = 0
+    with SessionLocal() as db:
+        rows = []
+        for interview_id, qa_pairs in db.execute(stmt):
+            for index, qa in enumerate(qa_pairs or []):
+                answered = "answer" in qa
+                rows.append({
+                    "interview_id": interview_id,
+                    "question_index": index,
+                    "question": qa.get("question") or "",
+                    "difficulty": qa.get("difficulty") or "",
+                    "answer": qa.get("answer") if answered else None,
+                    "score": qa.get("score") if answered else None,
+                    "answered_at": now if answered else None,
+                })
+            migrated += 1
+            if len(rows) >= BATCH_SIZE:
+                db.execute(InterviewQuestion.__table__.insert(), rows)
+                rows = []
+        if rows:
+            db.execute(InterviewQuestion.__table__.insert(), rows)
+        db.commit()
+    print(f"Backfilled questions for {migrated} interviews.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,21 @@
+"""
+Rebuild the candidate_scores leaderboard from the interviews and interview_archive tables.
+Run once after upgrading, or any time the table is suspected to be out of date.
+Safe to re-run: the table is replaced in a single transaction.
+"""
+from sqlalchemy import func, select
+from app.database import engine, Base
+from app.leaderboard import rebuild_statements
+from app.models import CandidateScore
+
+def rebuild():
+    print("Creating candidate_scores table...")
+    Base.metadata.create_all(bind=engine, tables=[CandidateScore.__table__])
+    with engine.begin() as connection:
+        for statement in rebuild_statements():
+            connection.execute(statement)
+        count = connection.execute(select(func.count()).select_from(CandidateScore)).scalar()
+    print(f"Rebuilt leaderboard rows for {count} candidates.")
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,25 @@
+"""
+Rebuild the candidate_search full-text index from resumes and interview answers,
+archived interviews included.
+Run once after upgrading, or any time search results are suspected to be out of date.
+Safe to re-run: the index is replaced in a single transaction.
+"""
+from sqlalchemy import text
+from app.archive import archived_answers
+from app.database import engine
+from app.search import append_answers, create_search_table, rebuild_statements
+
+def rebuild():
+    print("Creating candidate_search table...")
+    with engine.begin() as connection:
+        create_search_table(connection)
+    with engine.begin() as connection:
+        for statement in rebuild_statements(engine.dialect.name):
+            connection.execute(statement)
+        for candidate_id, answers in archived_answers(connection):
+            append_answers(connection, candidate_id, answers)
+        count = connection.execute(text("SELECT count(*) FROM candidate_search")).scalar()
+    print(f"Indexed {count} candidates.")
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,17 @@
+import asyncio
+
+import pytest
+
+from app import database
+from app.schema import migrate
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """A fresh SQLite database for the test: the app falls back to ./swipe_interview.db
+    when no DB_* variables are set."""
+    monkeypatch.chdir(tmp_path)
+    with database.get_engine().begin() as conn:
+        migrate(conn)
+    yield tmp_path
+    asyncio.run(database.dispose_engines())
@@ -0,0 +1,144 @@
+"""
+POST /api/interview/answer: Idempotency-Key replay and mismatch, concurrent submissions,
+the question-version compare-and-swap and the WebSocket exclusion.
+"""
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import select, update
+
+from app import auth, database, interview_sessions, models
+from app.main import app
+from app.routers import interview
+from app.utils.evaluator import Evaluator, StubBackend
+
+HEADERS = {"Authorization": "Bearer " + auth.create_access_token(
+    {"sub": "a@example.com", "cid": 1, "role": "interviewee"})}
+
+
+class _AnsweredElsewhere(StubBackend):
+    """Another worker answers question 0 while this one is evaluating it."""
+
+    async def evaluate_batch(self, items):
+        async with database.AsyncSessionLocal() as other:
+            await other.execute(
+                update(models.InterviewQuestion)
+                .where(models.InterviewQuestion.question_index == 0)
+                .values(answer="theirs", answered_at=datetime.now(timezone.utc),
+                        version=models.InterviewQuestion.version + 1)
+            )
+            await other.commit()
+        return await super().evaluate_batch(items)
+
+
+def _use_backend(monkeypatch, backend):
+    evaluator = Evaluator(backend)
+    monkeypatch.setattr(interview, "get_evaluator", lambda: evaluator)
+
+
+async def _start(client):
+    async with database.AsyncSessionLocal() as db:
+        db.add(models.Candidate(id=1, name="A", email="a@example.com", phone="1",
+                                hashed_password="x", role="interviewee"))
+        await db.commit()
+    started = await client.post("/api/interview/start", headers=HEADERS)
+    assert started.status_code == 200
+
+
+async def _questions():
+    async with database.AsyncSessionLocal() as db:
+        rows = await db.execute(select(models.InterviewQuestion).order_by(models.InterviewQuestion.question_index))
+        return rows.scalars().all()
+
+
+def _client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_retry_with_the_same_key_replays_and_a_different_body_is_rejected(sqlite_db, monkeypatch):
+    _use_backend(monkeypatch, StubBackend(latency=0))
+
+    async def run():
+        async with _client() as client:
+            await _start(client)
+            keyed = {**HEADERS, "Idempotency-Key": "answer-1"}
+            first = await client.post("/api/interview/answer", json={"answer": "use an index"}, headers=keyed)
+            replay = await client.post("/api/interview/answer", json={"answer": "use an index"}, headers=keyed)
+            mismatch = await client.post("/api/interview/answer", json={"answer": "something else"}, headers=keyed)
+        return first, replay, mismatch, await _questions()
+
+    first, replay, mismatch, questions = asyncio.run(run())
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+    assert replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+    assert mismatch.status_code == 422
+    # answered and evaluated once: question 0 moved one version on, and only one follow-up question
+    assert [(q.question_index, q.answer, q.version) for q in questions] == [(0, "use an index", 2), (1, None, 1)]
+
+
+def test_concurrent_double_submit_is_answered_once(sqlite_db, monkeypatch):
+    _use_backend(monkeypatch, StubBackend(latency=0.2))
+
+    async def run():
+        async with _client() as client:
+            await _start(client)
+            keyed = {**HEADERS, "Idempotency-Key": "answer-1"}
+            same_key = await asyncio.gather(*(
+                client.post("/api/interview/answer", json={"answer": "use an index"}, headers=keyed)
+                for _ in range(2)
+            ))
+            # without a key the second submission is turned away while the first is evaluated
+            no_key = await asyncio.gather(*(
+                client.post("/api/interview/answer", json={"answer": f"attempt {n}"}, headers=HEADERS)
+                for n in range(2)
+            ))
+        return same_key, no_key, await _questions()
+
+    same_key, no_key, questions = asyncio.run(run())
+    assert sorted(r.status_code for r in same_key) == [200, 409]
+    in_progress = next(r for r in same_key if r.status_code == 409)
+    assert in_progress.headers["Retry-After"] == "1"
+    assert sorted(r.status_code for r in no_key) == [200, 409]
+    assert [(q.question_index, q.version) for q in questions] == [(0, 2), (1, 2), (2, 1)]
+
+
+def test_stale_question_version_gets_409_and_writes_nothing(sqlite_db, monkeypatch):
+    _use_backend(monkeypatch, _AnsweredElsewhere(latency=0))
+
+    async def run():
+        async with _client() as client:
+            await _start(client)
+            keyed = {**HEADERS, "Idempotency-Key": "answer-1"}
+            stale = await client.post("/api/interview/answer", json={"answer": "mine"}, headers=keyed)
+        async with database.AsyncSessionLocal() as db:
+            keys = (await db.execute(select(models.IdempotencyKey))).scalars().all()
+        return stale, keys, await _questions()
+
+    stale, keys, questions = asyncio.run(run())
+    assert stale.status_code == 409
+    # the other worker's answer stands, no follow-up question was added, and the key was
+    # released so the client can retry after reloading
+    assert [(q.question_index, q.answer, q.version) for q in questions] == [(0, "theirs", 2)]
+    assert keys == []
+
+
+def test_http_answer_is_refused_while_a_websocket_session_is_live(sqlite_db, monkeypatch):
+    _use_backend(monkeypatch, StubBackend(latency=0))
+    session = interview_sessions.InterviewSession(1)
+    session.websocket = object()
+    monkeypatch.setitem(interview_sessions.manager._sessions, 1, session)
+
+    async def run():
+        async with _client() as client:
+            async with database.AsyncSessionLocal() as db:
+                db.add(models.Candidate(id=1, name="A", email="a@example.com", phone="1",
+                                        hashed_password="x", role="interviewee"))
+                await db.commit()
+            return await client.post("/api/interview/answer", json={"answer": "use an index"}, headers=HEADERS)
+
+    refused = asyncio.run(run())
+    assert refused.status_code == 409
+    assert refused.json()["detail"] == "This interview is live on a WebSocket connection"
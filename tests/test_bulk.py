@@ -0,0 +1,96 @@
+"""
+Bulk candidate import and export.
+"""
+import asyncio
+
+import httpx
+
+from app import auth, bulk, database, models
+from app.main import app
+
+CSV = "email,password,name,role\nnew1@example.com,secret-pass,One,\nnew2@example.com,secret-pass,Two,interviewer\n"
+
+
+async def _fake_hashes(passwords):
+    return [f"hashed:{password}" for password in passwords]
+
+
+async def _add_accounts():
+    async with database.AsyncSessionLocal() as db:
+        db.add(models.Candidate(id=1, name="Boss", email="boss@example.com", phone="1",
+                                hashed_password="x", role="interviewer"))
+        db.add(models.Candidate(id=2, name="Cand", email="cand@example.com", phone="1",
+                                hashed_password="x", role="interviewee"))
+        await db.commit()
+
+
+def _bearer(candidate_id: int, email: str, role: str):
+    token = auth.create_access_token({"sub": email, "cid": candidate_id, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_import_and_export_need_an_interviewer(sqlite_db, monkeypatch):
+    monkeypatch.setattr(auth, "hash_passwords_bulk", _fake_hashes)
+
+    async def run():
+        await _add_accounts()
+        csv_headers = {"Content-Type": "text/csv"}
+        interviewer = _bearer(1, "boss@example.com", "interviewer")
+        interviewee = _bearer(2, "cand@example.com", "interviewee")
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            anonymous = await client.post("/api/interviewer/candidates/import", content=CSV, headers=csv_headers)
+            forbidden = await client.post("/api/interviewer/candidates/import", content=CSV,
+                                          headers={**csv_headers, **interviewee})
+            export_anonymous = await client.get("/api/interviewer/export/candidates")
+            imported = await client.post("/api/interviewer/candidates/import", content=CSV,
+                                         headers={**csv_headers, **interviewer})
+            exported = await client.get("/api/interviewer/export/candidates", headers=interviewer)
+        async with database.AsyncSessionLocal() as db:
+            new2 = await db.get(models.Candidate, 4)
+        return anonymous, forbidden, export_anonymous, imported, exported, new2
+
+    anonymous, forbidden, export_anonymous, imported, exported, new2 = asyncio.run(run())
+    assert anonymous.status_code == 401
+    assert forbidden.status_code == 403
+    assert export_anonymous.status_code == 401
+    assert imported.status_code == 200
+    report = imported.json()
+    assert report["created"] == 1
+    assert report["errors"] == [{"line": 3, "email": "new2@example.com",
+                                 "error": "role: only interviewee accounts can be imported"}]
+    assert new2 is None
+    assert exported.status_code == 200
+    assert "new1@example.com" in exported.text
+
+
+def test_row_registered_during_the_batch_fails_alone(sqlite_db, monkeypatch):
+    # the email is taken after the batch's duplicate check, so the multi-row INSERT fails and
+    # the batch is retried row by row
+    async def hash_then_register(passwords):
+        async with database.AsyncSessionLocal() as other:
+            other.add(models.Candidate(name="Racer", email="b@example.com", phone="1",
+                                       hashed_password="x", role="interviewee"))
+            await other.commit()
+        return await _fake_hashes(passwords)
+
+    monkeypatch.setattr(auth, "hash_passwords_bulk", hash_then_register)
+
+    async def body():
+        yield b"email,password\na@example.com,secret-pass\nb@example.com,secret-pass\n"
+        yield b"c@example.com,secret-pass\n"
+
+    async def run():
+        async with database.AsyncSessionLocal() as db:
+            report = await bulk.import_candidates(db, body(), "csv")
+        async with database.AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                models.Candidate.__table__.select().order_by(models.Candidate.id)
+            )).all()
+            scores = (await db.execute(models.CandidateScore.__table__.select())).all()
+        return report, [(row.email, row.name) for row in rows], len(scores)
+
+    report, rows, scores = asyncio.run(run())
+    assert report["created"] == 2
+    assert report["errors"] == [{"line": 3, "email": "b@example.com", "error": "Email already registered"}]
+    assert rows == [("b@example.com", "Racer"), ("a@example.com", None), ("c@example.com", None)]
+    assert scores == 2  # leaderboard rows for the imported candidates only
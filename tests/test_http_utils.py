@@ -0,0 +1,62 @@
+"""
+Range and conditional-request helpers.
+"""
+import pytest
+
+from app.utils.http_utils import etag_matches, make_etag, parse_range
+
+
+@pytest.mark.parametrize("header, size, expected", [
+    ("bytes=0-99", 1000, (0, 99)),
+    ("bytes=100-", 1000, (100, 999)),          # open-ended
+    ("bytes=900-5000", 1000, (900, 999)),      # end clamped to the body
+    ("bytes=-100", 1000, (900, 999)),          # suffix: the last 100 bytes
+    ("bytes=-5000", 1000, (0, 999)),           # suffix longer than the body
+    ("bytes=999-999", 1000, (999, 999)),
+    (None, 1000, None),                        # no header: the whole body
+    ("", 1000, None),
+    ("items=0-9", 1000, None),                 # not a byte range
+    ("bytes=0-9,20-29", 1000, None),           # multi-range is not supported
+    ("bytes=abc-", 1000, None),
+    ("bytes=-", 1000, None),
+    ("bytes=5", 1000, None),
+])
+def test_parse_range(header, size, expected):
+    assert parse_range(header, size) == expected
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),                     # starts past the end
+    ("bytes=1000-1100", 1000),
+    ("bytes=50-10", 1000),                     # end before start
+    ("bytes=-0", 1000),                        # empty suffix
+    ("bytes=-10", 0),                          # suffix of an empty body
+    ("bytes=0-", 0),
+])
+def test_parse_range_unsatisfiable(header, size):
+    # the caller answers 416
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+
+ETAG = make_etag("interview", 1, 7)
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (ETAG, True),
+    (f"W/{ETAG}", True),                       # weak comparison
+    (f'"other", {ETAG}', True),
+    (f'"other",W/{ETAG}', True),
+    ("*", True),
+    (" * ", True),
+    ('"other"', False),
+    (ETAG.strip('"'), False),                  # unquoted
+    ("", False),
+    (None, False),
+])
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, ETAG) is expected
+
+
+def test_etag_matches_a_weak_etag():
+    assert etag_matches(ETAG, f"W/{ETAG}")
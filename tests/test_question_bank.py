@@ -0,0 +1,40 @@
+"""
+Question bank sampling and load-time validation.
+"""
+import json
+
+import pytest
+
+from app.utils.question_bank import QuestionBank, build_bank
+
+
+def test_sample_from_empty_difficulty_returns_none():
+    bank = QuestionBank()
+    bank.add("What is a list?", "Easy", ["python"])
+    assert bank.sample("Hard") is None
+    assert bank.sample("Hard", topics=("python",)) is None
+    assert bank.sample("Easy") == {"question": "What is a list?", "difficulty": "Easy"}
+
+
+def test_sample_prefers_unused_questions():
+    bank = QuestionBank()
+    bank.add("one?", "Medium")
+    bank.add("two?", "Medium")
+    for _ in range(20):
+        assert bank.sample("Medium", exclude={"one?"})["question"] == "two?"
+    # every question used: a repeat rather than nothing
+    assert bank.sample("Medium", exclude={"one?", "two?"}) is not None
+
+
+def test_bank_missing_a_difficulty_is_rejected(tmp_path):
+    path = tmp_path / "bank.jsonl"
+    path.write_text("\n".join(json.dumps(item) for item in [
+        {"question": "Easy one?", "difficulty": "Easy"},
+        {"question": "Medium one?", "difficulty": "Medium"},
+    ]))
+    with pytest.raises(ValueError, match="Hard"):
+        build_bank(str(path))
+
+
+def test_builtin_bank_covers_every_difficulty():
+    assert build_bank().missing_difficulties() == []
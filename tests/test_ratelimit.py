@@ -0,0 +1,109 @@
+"""
+Admission control: token-bucket refill in both backends (on an injected clock), the
+concurrency cap's queue, shedding and timeout, and the 429/503 responses.
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app import ratelimit
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+async def _takes(backend, count, key="answer:candidate:1", burst=2, rate=0.5):
+    return [await backend.take(key, burst, rate) for _ in range(count)]
+
+
+def _check_refill(backend, clock):
+    async def run():
+        # a new key starts with a full bucket of 2; the third take waits for 1 token at 0.5/s
+        burst = await _takes(backend, 3)
+        clock.now += 1  # half a token
+        early = await _takes(backend, 1)
+        clock.now += 1
+        refilled = await _takes(backend, 2)
+        clock.now += 3600  # refills to the burst, not beyond
+        full = await _takes(backend, 3)
+        other_key = await _takes(backend, 1, key="answer:candidate:2")
+        return burst, early, refilled, full, other_key
+
+    burst, early, refilled, full, other_key = asyncio.run(run())
+    assert burst == [(True, 0.0), (True, 0.0), (False, pytest.approx(2.0))]
+    assert early == [(False, pytest.approx(1.0))]
+    assert refilled == [(True, 0.0), (False, pytest.approx(2.0))]
+    assert [allowed for allowed, _ in full] == [True, True, False]
+    assert other_key == [(True, 0.0)]
+
+
+def test_memory_backend_refills_on_its_clock():
+    clock = FakeClock()
+    _check_refill(ratelimit.MemoryBackend(clock=clock), clock)
+
+
+def test_database_backend_refills_on_its_clock(sqlite_db):
+    clock = FakeClock(now=1_700_000_000.0)
+    _check_refill(ratelimit.DatabaseBackend(clock=clock), clock)
+
+
+def test_concurrency_limit_queues_sheds_and_times_out():
+    limit = ratelimit.ConcurrencyLimit(1, max_queue=1, timeout=0.05)
+
+    async def run():
+        first = await limit.acquire("answer")
+        # the slot is taken: one request may queue, the next one is shed straight away
+        queued = asyncio.create_task(limit.acquire("answer"))
+        await asyncio.sleep(0)
+        shed = await limit.acquire("answer")
+        timed_out = await queued
+        # a queued request gets the slot as soon as it is released
+        waiting = asyncio.create_task(limit.acquire("answer"))
+        await asyncio.sleep(0)
+        limit.release()
+        handed_over = await waiting
+        in_flight = limit.in_flight
+        limit.release()
+        return first, shed, timed_out, handed_over, in_flight
+
+    first, shed, timed_out, handed_over, in_flight = asyncio.run(run())
+    assert (first, shed, timed_out, handed_over) == (True, False, False, True)
+    assert in_flight == 1
+    assert (limit.in_flight, limit.queued) == (0, 0)
+
+
+def test_admit_answers_429_with_retry_after_then_503_when_busy(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(ratelimit, "_backend", ratelimit.MemoryBackend(clock=clock))
+    route_class = ratelimit.RouteClass("answer", "1/10", 1)
+    route_class.concurrency.max_queue = 0
+    monkeypatch.setitem(ratelimit.ROUTE_CLASSES, "answer", route_class)
+
+    async def run():
+        async with ratelimit.admit("answer", "candidate:1"):
+            # candidate 2 has tokens but the only slot is held by candidate 1
+            with pytest.raises(HTTPException) as busy:
+                async with ratelimit.admit("answer", "candidate:2"):
+                    pass
+        clock.now += 2.5
+        with pytest.raises(HTTPException) as limited:
+            async with ratelimit.admit("answer", "candidate:1"):
+                pass
+        clock.now += 7.5
+        async with ratelimit.admit("answer", "candidate:1"):
+            pass
+        return busy.value, limited.value
+
+    busy, limited = asyncio.run(run())
+    assert busy.status_code == 503
+    assert busy.headers == {"Retry-After": "1"}
+    assert limited.status_code == 429
+    assert limited.headers == {"Retry-After": "8"}  # 7.5 s to the next token, rounded up
+    assert route_class.concurrency.in_flight == 0
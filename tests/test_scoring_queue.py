@@ -0,0 +1,82 @@
+"""
+Deferred scoring: jobs that cannot be scored must not leave their interview in "grading",
+and must not invent a score.
+"""
+import asyncio
+from datetime import datetime, timezone
+
+from app import database, models, scoring_queue
+from app.utils.evaluator import EvaluationUnavailable
+
+
+class _Unavailable:
+    async def evaluate(self, answer, difficulty):
+        raise EvaluationUnavailable("backend down")
+
+
+async def _seed(db, scores):
+    """Candidate 1 with interview 1 in "grading", one answered question per entry in `scores`."""
+    now = datetime.now(timezone.utc)
+    db.add(models.Candidate(id=1, name="A", email="a@example.com", phone="1",
+                            hashed_password="x", role="interviewee"))
+    db.add(models.Interview(id=1, candidate_id=1, status="grading", qa_pairs=[]))
+    for index, score in enumerate(scores):
+        db.add(models.InterviewQuestion(interview_id=1, question_index=index, question=f"Q{index}?",
+                                        difficulty="Easy", answer="because caching helps",
+                                        score=score, answered_at=now))
+    await db.commit()
+
+
+def test_job_out_of_attempts_stays_unscored_and_interview_completes(sqlite_db, monkeypatch):
+    monkeypatch.setattr(scoring_queue, "get_evaluator", _Unavailable)
+
+    async def run():
+        async with database.AsyncSessionLocal() as db:
+            await _seed(db, [7, None])
+            job = models.ScoringJob(interview_id=1, question_index=1, status="running",
+                                    attempts=scoring_queue.SCORING_MAX_ATTEMPTS)
+            db.add(job)
+            await db.commit()
+
+            assert await scoring_queue.process_job(db, job) is False
+
+            interview = await db.get(models.Interview, 1, populate_existing=True)
+            questions = [await db.get(models.InterviewQuestion, (1, i), populate_existing=True) for i in (0, 1)]
+            states = await scoring_queue.grading_states(db, 1, questions)
+            return job.status, [q.score for q in questions], interview.status, interview.score, states
+
+    job_status, scores, status, total, states = asyncio.run(run())
+    assert job_status == "failed"
+    assert scores == [7, None]  # no made-up grade
+    assert status == "completed"
+    assert total == 7  # the graded answers only
+    assert states == ["graded", "failed"]
+
+
+def test_job_with_attempts_left_is_requeued(sqlite_db, monkeypatch):
+    monkeypatch.setattr(scoring_queue, "get_evaluator", _Unavailable)
+
+    async def run():
+        async with database.AsyncSessionLocal() as db:
+            await _seed(db, [None])
+            job = models.ScoringJob(interview_id=1, question_index=0, status="running", attempts=1)
+            db.add(job)
+            await db.commit()
+            await scoring_queue.process_job(db, job)
+            interview = await db.get(models.Interview, 1, populate_existing=True)
+            return job.status, interview.status
+
+    assert asyncio.run(run()) == ("queued", "grading")
+
+
+def test_job_for_a_missing_question_fails(sqlite_db):
+    async def run():
+        async with database.AsyncSessionLocal() as db:
+            await _seed(db, [])
+            job = models.ScoringJob(interview_id=1, question_index=3, status="running", attempts=1)
+            db.add(job)
+            await db.commit()
+            assert await scoring_queue.process_job(db, job) is False
+            return job.status, job.error
+
+    assert asyncio.run(run()) == ("failed", "Question no longer exists")